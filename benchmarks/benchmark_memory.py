@@ -0,0 +1,141 @@
+# Copyright 2021 eprbell
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# Memory benchmark of ledger entries: measures the memory allocated per InTransaction, OutTransaction, IntraTransaction and GainLoss, and
+# per gain/loss stored in a GainLossSet (which keeps columns instead of GainLoss objects).
+# Entries are built the way the parser builds them (every row has its own copy of strings and numbers).
+# Run with: python benchmarks/benchmark_memory.py [-n NUMBER]
+
+import argparse
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List
+
+from rp2.abstract_entry import AbstractEntry
+from rp2.configuration import Configuration
+from rp2.gain_loss import GainLoss
+from rp2.gain_loss_set import GainLossSet
+from rp2.in_transaction import InTransaction
+from rp2.intra_transaction import IntraTransaction
+from rp2.out_transaction import OutTransaction
+from rp2.plugin.country.us import US
+from rp2.rp2_decimal import RP2Decimal
+
+_DEFAULT_NUMBER: int = 100000
+_CONFIGURATION_PATH: str = "config/test_data.ini"
+_START_TIMESTAMP: datetime = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+# Returns a copy of the string, like the one the parser produces for every cell it reads
+def _copy(value: str) -> str:
+    return "".join(list(value))
+
+
+def _create_in_transaction(configuration: Configuration, index: int) -> InTransaction:
+    return InTransaction(
+        configuration,
+        _START_TIMESTAMP + timedelta(seconds=index),
+        _copy("B1"),
+        _copy("Coinbase"),
+        _copy("Bob"),
+        _copy("BUY"),
+        RP2Decimal(f"{1000 + index % 1000}.25"),
+        RP2Decimal(f"{1 + index % 10}.5"),
+        fiat_fee=RP2Decimal("0"),
+        internal_id=index,
+    )
+
+
+def _create_out_transaction(configuration: Configuration, index: int) -> OutTransaction:
+    return OutTransaction(
+        configuration,
+        _START_TIMESTAMP + timedelta(days=365, seconds=index),
+        _copy("B1"),
+        _copy("Coinbase"),
+        _copy("Bob"),
+        _copy("SELL"),
+        RP2Decimal(f"{2000 + index % 1000}.75"),
+        RP2Decimal(f"{1 + index % 10}.5"),
+        RP2Decimal("0"),
+        internal_id=index,
+    )
+
+
+def _create_intra_transaction(configuration: Configuration, index: int) -> IntraTransaction:
+    return IntraTransaction(
+        configuration,
+        _START_TIMESTAMP + timedelta(seconds=index),
+        _copy("B1"),
+        _copy("Coinbase"),
+        _copy("Bob"),
+        _copy("Kraken"),
+        _copy("Alice"),
+        RP2Decimal(f"{1000 + index % 1000}.25"),
+        RP2Decimal(f"{1 + index % 10}.5"),
+        RP2Decimal(f"{1 + index % 10}.5"),
+        internal_id=index,
+    )
+
+
+# Bytes allocated per entry (including its fields, excluding objects shared with other entries like configuration)
+def _measure(create_entry: Callable[[int], AbstractEntry], number: int) -> float:
+    tracemalloc.start()
+    before: int = tracemalloc.get_traced_memory()[0]
+    entries: List[AbstractEntry] = [create_entry(index) for index in range(number)]
+    after: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    if len(entries) != number:
+        raise RuntimeError("Internal error: unexpected number of entries")
+    return (after - before) / number
+
+
+# Bytes allocated per gain/loss added to a GainLossSet (including the sort, which computes fractions and running sums)
+def _measure_gain_loss_set(configuration: Configuration, in_transactions: List[InTransaction], out_transactions: List[OutTransaction]) -> float:
+    tracemalloc.start()
+    before: int = tracemalloc.get_traced_memory()[0]
+    gain_loss_set: GainLossSet = GainLossSet(configuration, "B1")
+    for in_transaction, out_transaction in zip(in_transactions, out_transactions):
+        gain_loss_set.add_trusted_gain_loss(out_transaction, in_transaction, out_transaction.crypto_out_no_fee)
+    gain_loss_set.get_transaction_type_count(out_transactions[0].transaction_type)
+    after: int = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / gain_loss_set.count
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Memory benchmark of ledger entries (bytes per entry)")
+    parser.add_argument("-n", "--number", type=int, default=_DEFAULT_NUMBER, help="Entries to create for each type")
+    args: argparse.Namespace = parser.parse_args()
+
+    configuration: Configuration = Configuration(_CONFIGURATION_PATH, US())
+    in_transactions: List[InTransaction] = [_create_in_transaction(configuration, index) for index in range(args.number)]
+    out_transactions: List[OutTransaction] = [_create_out_transaction(configuration, index) for index in range(args.number)]
+
+    benchmarks: Dict[str, Callable[[int], AbstractEntry]] = {
+        "InTransaction": lambda index: _create_in_transaction(configuration, index),
+        "OutTransaction": lambda index: _create_out_transaction(configuration, index),
+        "IntraTransaction": lambda index: _create_intra_transaction(configuration, index),
+        # Gain/losses only reference existing transactions: their cost is the GainLoss object and its own fields
+        "GainLoss": lambda index: GainLoss(configuration, out_transactions[index].crypto_out_no_fee, out_transactions[index], in_transactions[index]),
+    }
+
+    print(f"{'entry':<20}{'bytes/entry':>12}")
+    for name, create_entry in benchmarks.items():
+        print(f"{name:<20}{_measure(create_entry, args.number):>12.0f}")
+    print(f"{'GainLossSet row':<20}{_measure_gain_loss_set(configuration, in_transactions, out_transactions):>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# Copyright 2021 eprbell
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# Micro-benchmark of RP2Decimal operators. Each operator is timed on RP2Decimal, on a reference subclass that compares values by quantizing
+# their difference (the way RP2Decimal used to) and on plain Decimal (lower bound). Run with: python benchmarks/benchmark_rp2_decimal.py
+
+import argparse
+from decimal import Decimal
+from timeit import Timer
+from typing import Callable, Dict, List, NamedTuple, Type
+
+from rp2.rp2_decimal import CRYPTO_DECIMAL_MASK, ZERO, RP2Decimal
+
+_DEFAULT_NUMBER: int = 100000
+_REPEAT: int = 5
+
+_FIRST: str = "1234.5678901234567"
+_SECOND: str = "1234.5678901234"
+_THIRD: str = "0.1000000000001"
+
+
+# Reference implementation of RP2Decimal comparison operators
+class _QuantizedRP2Decimal(RP2Decimal):
+    def __eq__(self, other: object) -> bool:
+        return (self - other).quantize(CRYPTO_DECIMAL_MASK).__eq__(ZERO)  # type: ignore
+
+    def __ne__(self, other: object) -> bool:
+        return not self.__eq__(other)
+
+    def __ge__(self, other: object) -> bool:
+        return (self - other).quantize(CRYPTO_DECIMAL_MASK).__ge__(ZERO)  # type: ignore
+
+    def __gt__(self, other: object) -> bool:
+        return (self - other).quantize(CRYPTO_DECIMAL_MASK).__gt__(ZERO)  # type: ignore
+
+    def __le__(self, other: object) -> bool:
+        return not self.__gt__(other)
+
+    def __lt__(self, other: object) -> bool:
+        return not self.__ge__(other)
+
+    def __hash__(self) -> int:
+        return Decimal.__hash__(self)
+
+
+class _Operands(NamedTuple):
+    first: Decimal
+    second: Decimal
+    third: Decimal
+
+
+class _Benchmark(NamedTuple):
+    name: str
+    operation: Callable[[_Operands], object]
+
+
+_BENCHMARKS: List[_Benchmark] = [
+    _Benchmark("== (identical)", lambda operands: operands.first == operands.first),  # pylint: disable=comparison-with-itself
+    _Benchmark("== (within precision)", lambda operands: operands.first == operands.second),
+    _Benchmark("== (different)", lambda operands: operands.first == operands.third),
+    _Benchmark(">= (within precision)", lambda operands: operands.first >= operands.second),
+    _Benchmark("> (within precision)", lambda operands: operands.first > operands.second),
+    _Benchmark("> (different)", lambda operands: operands.first > operands.third),
+    _Benchmark("< (different)", lambda operands: operands.third < operands.first),
+    _Benchmark("+", lambda operands: operands.first + operands.second),
+    _Benchmark("-", lambda operands: operands.first - operands.second),
+    _Benchmark("*", lambda operands: operands.first * operands.second),
+    _Benchmark("/", lambda operands: operands.first / operands.second),
+]
+
+_DECIMAL_TYPES: Dict[str, Type[Decimal]] = {
+    "RP2Decimal": RP2Decimal,
+    "reference": _QuantizedRP2Decimal,
+    "Decimal": Decimal,
+}
+
+
+# Best of _REPEAT runs, in nanoseconds per operation
+def _time(operation: Callable[[_Operands], object], operands: _Operands, number: int) -> float:
+    timer: Timer = Timer(lambda: operation(operands))
+    return min(timer.repeat(repeat=_REPEAT, number=number)) * 1e9 / number
+
+
+def main() -> None:
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Micro-benchmark of RP2Decimal operators (ns per operation)")
+    parser.add_argument("-n", "--number", type=int, default=_DEFAULT_NUMBER, help="Operations per timing run")
+    args: argparse.Namespace = parser.parse_args()
+
+    operands: Dict[str, _Operands] = {
+        name: _Operands(decimal_type(_FIRST), decimal_type(_SECOND), decimal_type(_THIRD)) for name, decimal_type in _DECIMAL_TYPES.items()
+    }
+
+    print(f"{'operation':<24}" + "".join(f"{name:>14}" for name in _DECIMAL_TYPES))
+    for benchmark in _BENCHMARKS:
+        timings: str = "".join(f"{_time(benchmark.operation, operands[name], args.number):>14.0f}" for name in _DECIMAL_TYPES)
+        print(f"{benchmark.name:<24}{timings}")
+
+
+if __name__ == "__main__":
+    main()
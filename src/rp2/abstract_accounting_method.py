@@ -14,7 +14,8 @@
 
 
 from enum import Enum
-from typing import Dict, List, NamedTuple, Optional
+from heapq import heappop, heappush
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 from rp2.abstract_transaction import AbstractTransaction
 from rp2.in_transaction import InTransaction
@@ -32,29 +33,95 @@ class AcquiredLotCandidatesOrder(Enum):
     NEWER_TO_OLDER: str = "newer_to_older"
 
 
+# Index an accounting method needs to select acquired lots: the accounting engine builds it once per asset and keeps it up to date across all
+# taxable events. Methods declaring QUEUE, STACK or HEAP get amortized O(log m) (or better) lot selection for free, while ARBITRARY methods
+# iterate over all candidates (in the order specified by lot_candidates_order()) and are O(m) per taxable event.
+class AcquiredLotIndexType(Enum):
+    # Oldest non-exhausted lot first (e.g. FIFO)
+    QUEUE = "queue"
+    # Newest non-exhausted lot first (e.g. LIFO)
+    STACK = "stack"
+    # Non-exhausted lot with the lowest heap_key() first, ties broken by chronological order (e.g. HIFO)
+    HEAP = "heap"
+    # Any lot: the accounting method iterates over candidates and chooses (e.g. specific identification)
+    ARBITRARY = "arbitrary"
+
+
+# Lot candidates are created once per accounting method by the accounting engine and they are reused for all the taxable events of an asset.
+# Taxable events are processed in chronological order, so up_to_index never decreases. Remaining amounts of acquired lots are kept in a list
+# that is shared by all lot candidates of an asset and is indexed by lot position (None means the lot was never used, so its remaining amount
+# is crypto_in; ZERO means the lot is either exhausted or currently paired with a taxable event).
 class AcquiredLotCandidates:
     def __init__(
         self,
         accounting_method: "AbstractAccountingMethod",
         acquired_lot_list: List[InTransaction],
-        acquired_lot_2_partial_amount: Dict[InTransaction, RP2Decimal],
-        up_to_index: int,
+        partial_amount_list: List[Optional[RP2Decimal]],
+        acquired_lot_2_index: Dict[InTransaction, int],
     ) -> None:
         self.__accounting_method: AbstractAccountingMethod = accounting_method
         self.__acquired_lot_list = acquired_lot_list
-        self.__acquired_lot_2_partial_amount = acquired_lot_2_partial_amount
+        self.__partial_amount_list = partial_amount_list
+        self.__acquired_lot_2_index = acquired_lot_2_index
+        self.__up_to_index = -1
+
+    @property
+    def accounting_method(self) -> "AbstractAccountingMethod":
+        return self.__accounting_method
+
+    @property
+    def acquired_lot_list(self) -> List[InTransaction]:
+        return self.__acquired_lot_list
+
+    @property
+    def up_to_index(self) -> int:
+        return self.__up_to_index
+
+    def set_up_to_index(self, up_to_index: int) -> None:
+        if up_to_index < self.__up_to_index:
+            raise RP2RuntimeError(f"Internal error: up_to_index moved backwards ({self.__up_to_index} -> {up_to_index})")
         self.__up_to_index = up_to_index
 
+    # Position-based accessors: used by lot indexes to avoid hashing acquired lots.
+    def _is_non_exhausted_at(self, index: int) -> bool:
+        partial_amount: Optional[RP2Decimal] = self.__partial_amount_list[index]
+        return partial_amount is None or partial_amount > ZERO
+
+    def _get_amount_at(self, index: int) -> RP2Decimal:
+        partial_amount: Optional[RP2Decimal] = self.__partial_amount_list[index]
+        return self.__acquired_lot_list[index].crypto_in if partial_amount is None else partial_amount
+
+    # Marks the lot at index as paired with a taxable event and returns it with its remaining amount.
+    def _check_out_at(self, index: int) -> AcquiredLotAndAmount:
+        result: AcquiredLotAndAmount = AcquiredLotAndAmount(acquired_lot=self.__acquired_lot_list[index], amount=self._get_amount_at(index))
+        self.__partial_amount_list[index] = ZERO
+        return result
+
+    def _get_index(self, acquired_lot: InTransaction) -> int:
+        index: Optional[int] = self.__acquired_lot_2_index.get(acquired_lot)
+        if index is None:
+            raise RP2RuntimeError(f"Internal error: unknown acquired lot: {acquired_lot}")
+        return index
+
+    # Returns True if the acquired lot still has some crypto left (either it was never used or it has a positive partial amount).
+    def is_non_exhausted(self, acquired_lot: InTransaction) -> bool:
+        return self._is_non_exhausted_at(self._get_index(acquired_lot))
+
+    # Returns the crypto left in the acquired lot (either crypto_in or its partial amount).
+    def get_amount(self, acquired_lot: InTransaction) -> RP2Decimal:
+        return self._get_amount_at(self._get_index(acquired_lot))
+
     def has_partial_amount(self, acquired_lot: InTransaction) -> bool:
-        return acquired_lot in self.__acquired_lot_2_partial_amount
+        return self.__partial_amount_list[self._get_index(acquired_lot)] is not None
 
     def get_partial_amount(self, acquired_lot: InTransaction) -> RP2Decimal:
-        if not self.has_partial_amount(acquired_lot):
+        partial_amount: Optional[RP2Decimal] = self.__partial_amount_list[self._get_index(acquired_lot)]
+        if partial_amount is None:
             raise RP2RuntimeError(f"Internal error: acquired lot has no partial amount: {acquired_lot}")
-        return self.__acquired_lot_2_partial_amount[acquired_lot]
+        return partial_amount
 
     def set_partial_amount(self, acquired_lot: InTransaction, amount: RP2Decimal) -> None:
-        self.__acquired_lot_2_partial_amount[acquired_lot] = amount
+        self.__partial_amount_list[self._get_index(acquired_lot)] = amount
 
     def clear_partial_amount(self, acquired_lot: InTransaction) -> None:
         self.set_partial_amount(acquired_lot, ZERO)
@@ -63,6 +130,102 @@ class AcquiredLotCandidates:
         return AccountingMethodIterator(self.__acquired_lot_list, self.__up_to_index, self.__accounting_method.lot_candidates_order())
 
 
+# Superclass of lot candidates maintaining an index (see AcquiredLotIndexType): subclasses find the position of the top non-exhausted lot. Note
+# that seek_non_exhausted_acquired_lot() is only called after the previously selected lot has been either exhausted or given back to the engine
+# with its partial amount, so a lot with zero partial amount found while seeking is permanently exhausted and can be dropped from the index.
+class AbstractIndexedAcquiredLotCandidates(AcquiredLotCandidates):
+    def _seek_top_index(self) -> Optional[int]:
+        raise NotImplementedError("Abstract function")
+
+    def get_top_non_exhausted_acquired_lot(self) -> Optional[InTransaction]:
+        index: Optional[int] = self._seek_top_index()
+        return None if index is None else self.acquired_lot_list[index]
+
+    # Selects the top non-exhausted lot, marks it as paired with a taxable event and returns it with its remaining amount.
+    def check_out_top_acquired_lot(self) -> Optional[AcquiredLotAndAmount]:
+        index: Optional[int] = self._seek_top_index()
+        return None if index is None else self._check_out_at(index)
+
+
+# QUEUE index: the cursor points to the first lot that may still have crypto left and it only moves forward, skipping exhausted lots. Since lots
+# before the cursor are never revisited, matching all taxable events of an asset costs O(m + n) overall, rather than O(m) per taxable event.
+class AcquiredLotQueueCandidates(AbstractIndexedAcquiredLotCandidates):
+    def __init__(
+        self,
+        accounting_method: "AbstractAccountingMethod",
+        acquired_lot_list: List[InTransaction],
+        partial_amount_list: List[Optional[RP2Decimal]],
+        acquired_lot_2_index: Dict[InTransaction, int],
+    ) -> None:
+        super().__init__(accounting_method, acquired_lot_list, partial_amount_list, acquired_lot_2_index)
+        self.__cursor: int = 0
+
+    def _seek_top_index(self) -> Optional[int]:
+        while self.__cursor <= self.up_to_index:
+            if self._is_non_exhausted_at(self.__cursor):
+                return self.__cursor
+            self.__cursor += 1
+        return None
+
+
+# STACK index: lot positions are pushed onto a stack as up_to_index moves forward and exhausted lots are popped from the top. Each lot is pushed
+# and popped at most once, so matching all taxable events of an asset costs O(m + n) overall, rather than O(m) per taxable event.
+class AcquiredLotStackCandidates(AbstractIndexedAcquiredLotCandidates):
+    def __init__(
+        self,
+        accounting_method: "AbstractAccountingMethod",
+        acquired_lot_list: List[InTransaction],
+        partial_amount_list: List[Optional[RP2Decimal]],
+        acquired_lot_2_index: Dict[InTransaction, int],
+    ) -> None:
+        super().__init__(accounting_method, acquired_lot_list, partial_amount_list, acquired_lot_2_index)
+        self.__index_stack: List[int] = []
+        self.__next_index: int = 0
+
+    def set_up_to_index(self, up_to_index: int) -> None:
+        super().set_up_to_index(up_to_index)
+        while self.__next_index <= up_to_index:
+            self.__index_stack.append(self.__next_index)
+            self.__next_index += 1
+
+    def _seek_top_index(self) -> Optional[int]:
+        while self.__index_stack:
+            index: int = self.__index_stack[-1]
+            if self._is_non_exhausted_at(index):
+                return index
+            self.__index_stack.pop()
+        return None
+
+
+# HEAP index: lots are pushed onto a priority queue as up_to_index moves forward, keyed on the accounting method's heap_key() (ties are broken
+# by chronological order). Exhausted lots are removed lazily, when they reach the top of the heap, so each lookup costs O(log m) amortized.
+class AcquiredLotHeapCandidates(AbstractIndexedAcquiredLotCandidates):
+    def __init__(
+        self,
+        accounting_method: "AbstractAccountingMethod",
+        acquired_lot_list: List[InTransaction],
+        partial_amount_list: List[Optional[RP2Decimal]],
+        acquired_lot_2_index: Dict[InTransaction, int],
+    ) -> None:
+        super().__init__(accounting_method, acquired_lot_list, partial_amount_list, acquired_lot_2_index)
+        self.__index_heap: List[Tuple[RP2Decimal, int]] = []
+        self.__next_index: int = 0
+
+    def set_up_to_index(self, up_to_index: int) -> None:
+        super().set_up_to_index(up_to_index)
+        while self.__next_index <= up_to_index:
+            heappush(self.__index_heap, (self.accounting_method.heap_key(self.acquired_lot_list[self.__next_index]), self.__next_index))
+            self.__next_index += 1
+
+    def _seek_top_index(self) -> Optional[int]:
+        while self.__index_heap:
+            index: int = self.__index_heap[0][1]
+            if self._is_non_exhausted_at(index):
+                return index
+            heappop(self.__index_heap)
+        return None
+
+
 class AccountingMethodIterator:
     def __init__(self, acquired_lot_list: List[InTransaction], up_to_index: int, order_type: AcquiredLotCandidatesOrder) -> None:
         self.__acquired_lot_list = acquired_lot_list
@@ -87,12 +250,29 @@ class AccountingMethodIterator:
 
 
 class AbstractAccountingMethod:
+    # Methods declaring QUEUE, STACK or HEAP receive an AbstractIndexedAcquiredLotCandidates in seek_non_exhausted_acquired_lot(): in that case
+    # the default implementation of seek_non_exhausted_acquired_lot() selects the top of the index. ARBITRARY methods receive a plain
+    # AcquiredLotCandidates and must override seek_non_exhausted_acquired_lot().
+    def lot_index_type(self) -> AcquiredLotIndexType:
+        return AcquiredLotIndexType.ARBITRARY
+
+    # Only used by HEAP methods, which must override it: the lot with the lowest key is selected first. With the default key all lots tie, so
+    # they are selected in chronological order.
+    def heap_key(self, acquired_lot: InTransaction) -> RP2Decimal:
+        if self.lot_index_type() == AcquiredLotIndexType.HEAP:
+            raise RP2RuntimeError(
+                f"Internal error: accounting method {self.__class__.__module__} has a HEAP lot index but doesn't override heap_key(): {acquired_lot}"
+            )
+        return ZERO
+
     def seek_non_exhausted_acquired_lot(
         self,
         lot_candidates: AcquiredLotCandidates,
-        taxable_event: Optional[AbstractTransaction],
-        taxable_event_amount: RP2Decimal,
+        taxable_event: Optional[AbstractTransaction],  # pylint: disable=unused-argument
+        taxable_event_amount: RP2Decimal,  # pylint: disable=unused-argument
     ) -> Optional[AcquiredLotAndAmount]:
+        if isinstance(lot_candidates, AbstractIndexedAcquiredLotCandidates):
+            return lot_candidates.check_out_top_acquired_lot()
         raise NotImplementedError("Abstract function")
 
     def lot_candidates_order(self) -> AcquiredLotCandidatesOrder:
@@ -13,6 +13,7 @@
 # limitations under the License.
 
 from datetime import datetime
+from sys import intern
 from typing import List, Optional
 
 from prezzemolo.utility import to_string
@@ -22,14 +23,18 @@ from rp2.rp2_decimal import RP2Decimal
 from rp2.rp2_error import RP2TypeError
 
 
+# Entries use __slots__ instead of a per-instance __dict__: inputs can have millions of them
 class AbstractEntry:
+    __slots__ = ("__configuration", "__asset")
+
     def __init__(
         self,
         configuration: Configuration,
         asset: str,
     ) -> None:
         self.__configuration = Configuration.type_check("configuration", configuration)
-        self.__asset: str = configuration.type_check_asset("asset", asset)
+        # Assets come from a short list, so all entries share one copy of each
+        self.__asset: str = intern(configuration.type_check_asset("asset", asset))
 
     @classmethod
     def type_check(cls, name: str, instance: "AbstractEntry") -> "AbstractEntry":
@@ -14,7 +14,7 @@
 
 from copy import copy
 from datetime import date, datetime
-from typing import Dict, List, Optional, Set
+from typing import Dict, Iterable, List, Optional, Set
 
 from rp2.abstract_entry import AbstractEntry
 from rp2.configuration import MAX_DATE, MIN_DATE, Configuration
@@ -22,7 +22,7 @@ from rp2.entry_types import EntrySetType
 from rp2.in_transaction import InTransaction
 from rp2.intra_transaction import IntraTransaction
 from rp2.out_transaction import OutTransaction
-from rp2.rp2_error import RP2TypeError, RP2ValueError
+from rp2.rp2_error import RP2RuntimeError, RP2TypeError, RP2ValueError
 
 
 class AbstractEntrySet:
@@ -130,7 +130,31 @@ class AbstractEntrySet:
 
         self._entry_list.append(entry)
         self._entry_set.add(entry)
-        self.__is_sorted = False
+        self._set_unsorted()
+
+    # Like add_entry, but without type, asset and duplicate checks: for entries created by RP2 itself out of validated data (e.g. gain-losses
+    # created by the tax engine in trusted validation mode).
+    def add_trusted_entry(self, entry: AbstractEntry) -> None:
+        self._entry_list.append(entry)
+        self._entry_set.add(entry)
+        self._set_unsorted()
+
+    # Bulk alternative to add_entry for an empty set: entries must be already sorted by timestamp and valid for this set (per-entry type and
+    # asset checks are skipped), so neither those checks nor the sort on first iteration are needed. Only uniqueness and order are verified.
+    def _adopt_sorted_entries(self, entries: Iterable[AbstractEntry]) -> None:
+        if self._entry_list:
+            raise RP2RuntimeError("Internal error: adopting entries into a non-empty set")
+        self._entry_list = list(entries)
+        self._entry_set = set(self._entry_list)
+        if len(self._entry_set) != len(self._entry_list):
+            raise RP2ValueError("Attempting to adopt duplicate entries")
+        parent: Optional[AbstractEntry] = None
+        for entry in self._entry_list:
+            if parent is not None and entry.timestamp < parent.timestamp:
+                raise RP2ValueError(f"Attempting to adopt entries that are not sorted by timestamp: {entry}")
+            self._entry_to_parent[entry] = parent
+            parent = entry
+        self.__is_sorted = True
 
     def is_empty(self) -> bool:
         return self.count == 0
@@ -153,6 +177,13 @@ class AbstractEntrySet:
             self._entry_to_parent[entry] = parent
             parent = entry
 
+    # Entry at the given position in sort order (used by the iterator): subclasses that don't store entries in _entry_list override this
+    def _get_entry(self, index: int) -> AbstractEntry:
+        return self._entry_list[index]
+
+    def _set_unsorted(self) -> None:
+        self.__is_sorted = False
+
     def _check_sort(self) -> None:
         if not self.__is_sorted:
             self._sort_entries()
@@ -176,7 +207,7 @@ class EntrySetIterator:
     def __next__(self) -> AbstractEntry:
         result: Optional[AbstractEntry] = None
         while self.__index < self.__entry_set_size:
-            result = self.__entry_set._entry_list[self.__index]  # pylint: disable=protected-access
+            result = self.__entry_set._get_entry(self.__index)  # pylint: disable=protected-access
             self.__index += 1
             if result.timestamp.date() > self.__entry_set.to_date:
                 raise StopIteration(self)
@@ -13,20 +13,22 @@
 # limitations under the License.
 
 from datetime import datetime
-from typing import Callable, List, Optional
+from typing import Callable, List, Optional, Union
 
 from rp2.abstract_entry import AbstractEntry
 from rp2.configuration import Configuration
 from rp2.entry_types import TransactionType
-from rp2.rp2_decimal import RP2Decimal
+from rp2.rp2_decimal import ZERO, RP2Decimal
 from rp2.rp2_error import RP2TypeError
 
 
 class AbstractTransaction(AbstractEntry):
+    __slots__ = ("__timestamp", "__transaction_type", "__spot_price", "__internal_id", "__hash", "__unique_id", "__notes")
+
     def __init__(
         self,
         configuration: Configuration,
-        timestamp: str,
+        timestamp: Union[str, datetime],
         asset: str,
         transaction_type: str,
         spot_price: RP2Decimal,
@@ -36,10 +38,12 @@ class AbstractTransaction(AbstractEntry):
     ) -> None:
         super().__init__(configuration, asset)
 
-        self.__timestamp: datetime = configuration.type_check_timestamp_from_string("timestamp", timestamp)
+        self.__timestamp: datetime = configuration.type_check_timestamp("timestamp", timestamp)
         self.__transaction_type: TransactionType = TransactionType.type_check_from_string("transaction_type", transaction_type)
         self.__spot_price: RP2Decimal = configuration.type_check_positive_decimal("spot_price", spot_price)
         self.__internal_id: int = configuration.type_check_internal_id("internal_id", internal_id) if internal_id is not None else id(self)
+        # Transactions are dictionary keys throughout the tax engine: hash once (for most ids the hash is the id itself, so it's not a new object)
+        self.__hash: int = hash(self.__internal_id)
         self.__unique_id: str = configuration.type_check_string_or_integer("unique_id", unique_id) if unique_id is not None else ""
         self.__notes = configuration.type_check_string("notes", notes) if notes else ""
 
@@ -50,6 +54,16 @@ class AbstractTransaction(AbstractEntry):
             raise RP2TypeError(f"Parameter '{name}' is not of type {cls.__name__}: {instance}")
         return instance
 
+    # Zero amounts (typically fees) share the ZERO singleton instead of each transaction storing its own zero
+    @staticmethod
+    def _get_shared_zero(value: RP2Decimal) -> RP2Decimal:
+        return ZERO if value.is_zero() else value
+
+    # Sums of an amount and a zero amount (typically a fee) share the amount instead of storing a copy of it
+    @staticmethod
+    def _get_shared_sum(amount: RP2Decimal, fee: RP2Decimal) -> RP2Decimal:
+        return amount if fee.is_zero() else amount + fee
+
     def __eq__(self, other: object) -> bool:
         if not other:
             return False
@@ -57,7 +71,7 @@ class AbstractTransaction(AbstractEntry):
             raise RP2TypeError(f"Operand has non-AbstractTransaction value {repr(other)}")
         # By definition, internal_id can uniquely identify a transaction: this works even if it's the ODS line from the spreadsheet,
         # since there are no cross-asset transactions (so a spreadsheet line points to a unique transaction for that asset).
-        result: bool = self.internal_id == other.internal_id
+        result: bool = self.__internal_id == other.numeric_internal_id
         return result
 
     def __ne__(self, other: object) -> bool:
@@ -66,7 +80,7 @@ class AbstractTransaction(AbstractEntry):
     def __hash__(self) -> int:
         # By definition, internal_id can uniquely identify a transaction: this works even if it's the ODS line from the spreadsheet,
         # since there are no cross-asset transactions (so a spreadsheet line points to a unique transaction for that asset).
-        return hash(self.internal_id)
+        return self.__hash
 
     def to_string(self, indent: int = 0, repr_format: bool = True, extra_data: Optional[List[str]] = None) -> str:
         class_specific_data: List[str] = []
@@ -82,10 +96,15 @@ class AbstractTransaction(AbstractEntry):
 
         return super().to_string(indent=indent, repr_format=repr_format, extra_data=class_specific_data)
 
+    # String form of numeric_internal_id, for display: use numeric_internal_id to identify transactions
     @property
     def internal_id(self) -> str:
         return str(self.__internal_id)
 
+    @property
+    def numeric_internal_id(self) -> int:
+        return self.__internal_id
+
     @property
     def timestamp(self) -> datetime:
         return self.__timestamp
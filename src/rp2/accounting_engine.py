@@ -12,9 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import Dict, Iterator, List, NamedTuple, Optional
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
 
 from prezzemolo.avl_tree import AVLTree
 
@@ -22,6 +22,10 @@ from rp2.abstract_accounting_method import (
     AbstractAccountingMethod,
     AcquiredLotAndAmount,
     AcquiredLotCandidates,
+    AcquiredLotHeapCandidates,
+    AcquiredLotIndexType,
+    AcquiredLotQueueCandidates,
+    AcquiredLotStackCandidates,
 )
 from rp2.abstract_transaction import AbstractTransaction
 from rp2.in_transaction import InTransaction
@@ -36,10 +40,27 @@ class TaxableEventAndAcquiredLot(NamedTuple):
     acquired_lot_amount: RP2Decimal
 
 
-@dataclass(frozen=True, eq=True)
-class _AcquiredLotAndIndex:
-    acquired_lot: InTransaction
-    index: int
+_EPOCH: datetime = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_MICROSECOND: timedelta = timedelta(microseconds=1)
+
+# Write to the partial amount list: (acquired lot index, new partial amount)
+PartialAmountWrite = Tuple[int, Optional[RP2Decimal]]
+
+
+# Partial amount list that appends every write to a journal: replaying a prefix of the journal on a list of Nones rebuilds the partial amounts
+# as they were at any earlier point of the computation (this is how tax engine checkpoints are restored).
+class _JournaledPartialAmountList(List[Optional[RP2Decimal]]):
+    def __init__(self, size: int, journal: List[PartialAmountWrite]) -> None:
+        super().__init__([None] * size)
+        index: int
+        amount: Optional[RP2Decimal]
+        for index, amount in journal:
+            super().__setitem__(index, amount)
+        self.__journal: List[PartialAmountWrite] = journal
+
+    def __setitem__(self, index: int, amount: Optional[RP2Decimal]) -> None:  # type: ignore
+        super().__setitem__(index, amount)
+        self.__journal.append((index, amount))
 
 
 class _LotExhaustedException(Exception):
@@ -66,13 +87,10 @@ class AcquiredLotsExhaustedException(_LotExhaustedException):
 class AccountingEngine:
     __taxable_event_iterator: Iterator[AbstractTransaction]
     __acquired_lot_list: List[InTransaction]
-    __acquired_lot_avl: AVLTree[str, _AcquiredLotAndIndex]
-    __acquired_lot_2_partial_amount: Dict[InTransaction, RP2Decimal]
-
-    # Disambiguation is needed for transactions that have the same timestamp, because the avl tree class expects unique keys: 12 decimal digits express
-    # 1 quadrillion, which should be enough to capture the maximum number of same-timestamp transactions in all reasonable cases.
-    KEY_DISAMBIGUATOR_LENGTH: int = 12
-    MAX_KEY_DISAMBIGUATOR = "9" * KEY_DISAMBIGUATOR_LENGTH
+    __acquired_lot_key_list: List[int]
+    __acquired_lot_2_index: Dict[InTransaction, int]
+    __partial_amount_list: List[Optional[RP2Decimal]]
+    __method_2_lot_candidates: Dict[AbstractAccountingMethod, AcquiredLotCandidates]
 
     @classmethod
     def type_check(cls, name: str, instance: "AccountingEngine") -> "AccountingEngine":
@@ -86,59 +104,84 @@ class AccountingEngine:
         self.__years_2_methods: AVLTree[int, AbstractAccountingMethod] = years_2_methods
         if not self.__years_2_methods:
             raise RP2RuntimeError("Internal error: no accounting method defined")
+        # Year -> method table, filled on first lookup of each year: it avoids walking the AVL tree for every taxable event
+        self.__year_2_method: Dict[int, AbstractAccountingMethod] = {}
 
-    # Iterators yield transactions in ascending chronological order
+    # Iterators yield transactions in ascending chronological order. If partial_amount_journal is passed, the partial amounts of acquired lots
+    # are initialized by replaying it and all subsequent writes to them are appended to it.
     def initialize(
         self,
         taxable_event_iterator: Iterator[AbstractTransaction],
         acquired_lot_iterator: Iterator[InTransaction],
+        partial_amount_journal: Optional[List[PartialAmountWrite]] = None,
     ) -> None:
         self.__taxable_event_iterator = taxable_event_iterator
         self.__acquired_lot_list = []
-        self.__acquired_lot_avl: AVLTree[str, _AcquiredLotAndIndex] = AVLTree()
-        self.__acquired_lot_2_partial_amount = {}
+        self.__acquired_lot_key_list = []
+        self.__acquired_lot_2_index = {}
+        self.__method_2_lot_candidates = {}
 
-        index: int = 0
+        # Acquired lots come in chronological order, so their keys (UTC timestamps expressed as integer microseconds since epoch) form a sorted
+        # list that can be searched with bisect.
         try:
             while True:
                 acquired_lot: InTransaction = next(acquired_lot_iterator)
+                key: int = get_timestamp_key(acquired_lot.timestamp)
+                if self.__acquired_lot_key_list and key < self.__acquired_lot_key_list[-1]:
+                    raise RP2RuntimeError(f"Internal error: acquired lots are not in chronological order: {acquired_lot}")
+                self.__acquired_lot_2_index[acquired_lot] = len(self.__acquired_lot_list)
                 self.__acquired_lot_list.append(acquired_lot)
-                self.__acquired_lot_avl.insert_node(
-                    f"{self._get_avl_node_key(acquired_lot.timestamp, acquired_lot.internal_id)}", _AcquiredLotAndIndex(acquired_lot, index)
-                )
-                index += 1
+                self.__acquired_lot_key_list.append(key)
         except StopIteration:
             # End of acquired_lots
             pass
 
-        if not self.__acquired_lot_avl.root:
-            raise RP2RuntimeError("Internal error: AVL tree has no root node")
-
-    # AVL tree node keys have this format: <timestamp>_<internal_id>. The internal_id part is needed to disambiguate transactions
-    # that have the same timestamp. Timestamp is in format "YYYYmmddHHMMSS.ffffff" and internal_id is padded right in a string of fixed
-    # length (KEY_DISAMBIGUATOR_LENGTH).
-    def _get_avl_node_key(self, timestamp: datetime, internal_id: str) -> str:
-        return f"{timestamp.astimezone(timezone.utc).strftime('%Y%m%d%H%M%S.%f')}_{internal_id:0>{self.KEY_DISAMBIGUATOR_LENGTH}}"
-
-    # This function calls _get_avl_node_key with internal_id=MAX_KEY_DISAMBIGUATOR, so that the generated key is larger than any other key
-    # with the same timestamp.
-    def _get_avl_node_key_with_max_disambiguator(self, timestamp: datetime) -> str:
-        return self._get_avl_node_key(timestamp, self.MAX_KEY_DISAMBIGUATOR)
+        if not self.__acquired_lot_list:
+            raise RP2RuntimeError("Internal error: no acquired lots")
+        # Remaining amounts of acquired lots, indexed by lot position and shared by all lot candidates (None means the lot was never used)
+        if partial_amount_journal is None:
+            self.__partial_amount_list = [None] * len(self.__acquired_lot_list)
+        else:
+            self.__partial_amount_list = _JournaledPartialAmountList(len(self.__acquired_lot_list), partial_amount_journal)
 
     @property
     def years_2_methods(self) -> AVLTree[int, AbstractAccountingMethod]:
         return self.__years_2_methods
 
     def _get_accounting_method(self, year: int) -> AbstractAccountingMethod:
+        method: Optional[AbstractAccountingMethod] = self.__year_2_method.get(year)
+        if method is not None:
+            return method
         method = self.__years_2_methods.find_max_value_less_than(year)
         if method is None:
             raise RP2RuntimeError(f"Internal error: no accounting method assigned for year {year}")
         if not isinstance(method, AbstractAccountingMethod):
             raise RP2RuntimeError(f"Internal error: accounting method assigned for year {year} is not of type AbstractAccountingMethod: {method}")
+        self.__year_2_method[year] = method
         return method
 
+    # Lot candidates are created lazily, once per accounting method, and they are reused across taxable events: their type depends on the
+    # index the accounting method declares (see AcquiredLotIndexType), which is kept up to date incrementally instead of scanning all acquired
+    # lots at every taxable event.
+    def _get_lot_candidates(self, method: AbstractAccountingMethod) -> AcquiredLotCandidates:
+        lot_candidates: Optional[AcquiredLotCandidates] = self.__method_2_lot_candidates.get(method)
+        if lot_candidates is None:
+            lot_index_type: AcquiredLotIndexType = method.lot_index_type()
+            if lot_index_type == AcquiredLotIndexType.QUEUE:
+                lot_candidates = AcquiredLotQueueCandidates(method, self.__acquired_lot_list, self.__partial_amount_list, self.__acquired_lot_2_index)
+            elif lot_index_type == AcquiredLotIndexType.STACK:
+                lot_candidates = AcquiredLotStackCandidates(method, self.__acquired_lot_list, self.__partial_amount_list, self.__acquired_lot_2_index)
+            elif lot_index_type == AcquiredLotIndexType.HEAP:
+                lot_candidates = AcquiredLotHeapCandidates(method, self.__acquired_lot_list, self.__partial_amount_list, self.__acquired_lot_2_index)
+            elif lot_index_type == AcquiredLotIndexType.ARBITRARY:
+                lot_candidates = AcquiredLotCandidates(method, self.__acquired_lot_list, self.__partial_amount_list, self.__acquired_lot_2_index)
+            else:
+                raise RP2RuntimeError(f"Internal error: accounting method {method} has unknown lot index type: {lot_index_type}")
+            self.__method_2_lot_candidates[method] = lot_candidates
+        return lot_candidates
+
     def _set_partial_amount(self, acquired_lot: InTransaction, amount: RP2Decimal) -> None:
-        self.__acquired_lot_2_partial_amount[acquired_lot] = amount
+        self.__partial_amount_list[self.__acquired_lot_2_index[acquired_lot]] = amount
 
     def get_next_taxable_event_and_amount(
         self,
@@ -182,16 +225,12 @@ class AccountingEngine:
         acquired_lot_amount: RP2Decimal,
     ) -> TaxableEventAndAcquiredLot:
         new_taxable_event_amount: RP2Decimal = taxable_event_amount - acquired_lot_amount
-        avl_result: Optional[_AcquiredLotAndIndex] = self.__acquired_lot_avl.find_max_value_less_than(
-            self._get_avl_node_key_with_max_disambiguator(taxable_event.timestamp)
-        )
-        if avl_result is not None:
-            if avl_result.acquired_lot != self.__acquired_lot_list[avl_result.index]:
-                raise RP2RuntimeError("Internal error: acquired_lot incongruence in accounting logic")
+        # Index of the newest acquired lot whose timestamp is less than or equal to the taxable event timestamp
+        up_to_index: int = bisect_right(self.__acquired_lot_key_list, get_timestamp_key(taxable_event.timestamp)) - 1
+        if up_to_index >= 0:
             method = self._get_accounting_method(taxable_event.timestamp.year)
-            lot_candidates: AcquiredLotCandidates = AcquiredLotCandidates(
-                method, self.__acquired_lot_list, self.__acquired_lot_2_partial_amount, avl_result.index
-            )
+            lot_candidates: AcquiredLotCandidates = self._get_lot_candidates(method)
+            lot_candidates.set_up_to_index(up_to_index)
             acquired_lot_and_amount: Optional[AcquiredLotAndAmount] = method.seek_non_exhausted_acquired_lot(
                 lot_candidates, taxable_event, new_taxable_event_amount
             )
@@ -204,3 +243,8 @@ class AccountingEngine:
                 )
 
         raise AcquiredLotsExhaustedException()
+
+
+# Integer microseconds since epoch: same ordering as the UTC timestamp, but much cheaper to compare than strings or datetimes.
+def get_timestamp_key(timestamp: datetime) -> int:
+    return (timestamp - _EPOCH) // _ONE_MICROSECOND
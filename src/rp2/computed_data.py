@@ -26,6 +26,7 @@ from rp2.in_transaction import InTransaction
 from rp2.input_data import InputData
 from rp2.intra_transaction import IntraTransaction
 from rp2.logger import LOGGER
+from rp2.open_lot_snapshot import OpenLot, create_open_lots
 from rp2.out_transaction import OutTransaction
 from rp2.rp2_decimal import ZERO, RP2Decimal
 from rp2.rp2_error import RP2TypeError, RP2ValueError
@@ -208,6 +209,10 @@ class ComputedData:
         TransactionSet.type_check("taxable_event_set", unfiltered_taxable_event_set, EntrySetType.MIXED, asset, True)
         GainLossSet.type_check("gain_loss_set", unfiltered_gain_loss_set)
 
+        self.__input_data: InputData = input_data
+        self.__unfiltered_gain_loss_set: GainLossSet = unfiltered_gain_loss_set
+        self.__to_date: date = to_date
+
         self.__filtered_taxable_event_set: TransactionSet = cast(TransactionSet, unfiltered_taxable_event_set.duplicate(from_date=from_date, to_date=to_date))
         self.__filtered_gain_loss_set: GainLossSet = cast(GainLossSet, unfiltered_gain_loss_set.duplicate(from_date=from_date, to_date=to_date))
 
@@ -228,7 +233,6 @@ class ComputedData:
         self.__crypto_out_running_sum: Dict[OutTransaction, RP2Decimal] = {}
         self.__crypto_out_fee_running_sum: Dict[OutTransaction, RP2Decimal] = {}
         self.__crypto_intra_fee_running_sum: Dict[IntraTransaction, RP2Decimal] = {}
-        self.__crypto_gain_loss_running_sum: Dict[GainLoss, RP2Decimal] = {}
 
         crypto_running_sum: RP2Decimal
         crypto_fee_running_sum: RP2Decimal
@@ -236,6 +240,9 @@ class ComputedData:
         crypto_running_sum = ZERO
         crypto_fee_running_sum = ZERO
         for entry in input_data.unfiltered_in_transaction_set:
+            # Running sums are only read for transactions in the time filter: stop after to_date
+            if entry.timestamp.date() > to_date:
+                break
             in_transaction: InTransaction = cast(InTransaction, entry)
             crypto_running_sum += in_transaction.crypto_in
             crypto_fee_running_sum += in_transaction.crypto_fee
@@ -245,6 +252,8 @@ class ComputedData:
         crypto_running_sum = ZERO
         crypto_fee_running_sum = ZERO
         for entry in input_data.unfiltered_out_transaction_set:
+            if entry.timestamp.date() > to_date:
+                break
             out_transaction: OutTransaction = cast(OutTransaction, entry)
             crypto_running_sum += out_transaction.crypto_out_no_fee
             crypto_fee_running_sum += out_transaction.crypto_fee
@@ -253,18 +262,14 @@ class ComputedData:
 
         crypto_fee_running_sum = ZERO
         for entry in input_data.unfiltered_intra_transaction_set:
+            if entry.timestamp.date() > to_date:
+                break
             intra_transaction: IntraTransaction = cast(IntraTransaction, entry)
             crypto_fee_running_sum += intra_transaction.crypto_fee
             self.__crypto_intra_fee_running_sum[intra_transaction] = crypto_fee_running_sum
 
-        crypto_running_sum = ZERO
-        gain_loss: GainLoss
-        for entry in unfiltered_gain_loss_set:
-            gain_loss = cast(GainLoss, entry)
-            crypto_running_sum += gain_loss.crypto_amount
-            self.__crypto_gain_loss_running_sum[gain_loss] = crypto_running_sum
-
         # Compute in lot sold percentages
+        gain_loss: GainLoss
         self.__in_lot_sold_percentage: Dict[InTransaction, RP2Decimal] = {}
         for entry in self.__filtered_gain_loss_set:
             gain_loss = cast(GainLoss, entry)
@@ -357,13 +362,17 @@ class ComputedData:
     def get_crypto_gain_loss_running_sum(self, gain_loss: GainLoss) -> RP2Decimal:
         """Crypto amount running sum for a given GainLoss instance."""
         GainLoss.type_check("gain_loss", gain_loss)
-        return self.__crypto_gain_loss_running_sum[gain_loss]
+        return self.__filtered_gain_loss_set.get_crypto_amount_running_sum(gain_loss)
 
     def get_in_lot_sold_percentage(self, in_transaction: InTransaction) -> RP2Decimal:
         """Percentage sold for a given InTransaction instance"""
         InTransaction.type_check("in_transaction", in_transaction)
         return self.__in_lot_sold_percentage[in_transaction] if in_transaction in self.__in_lot_sold_percentage else ZERO
 
+    def get_open_lots(self) -> List[OpenLot]:
+        """Acquired lots that are not fully sold at the end of to_date (regardless of from_date), assigned to accounts with positive balance."""
+        return create_open_lots(self.__input_data, self.__unfiltered_gain_loss_set, self.__filtered_balance_set, self.__to_date)
+
 
 def _yearly_gain_loss_sort_criteria(yearly_gain_loss: YearlyGainLoss) -> str:
     return (
@@ -17,15 +17,15 @@ from configparser import ConfigParser, SectionProxy
 from datetime import date, datetime
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, Set
+from typing import Any, Dict, List, Set, Union
 
-from dateutil.parser import parse
 from jsonschema import validate
 
 from rp2.abstract_country import AbstractCountry
 from rp2.configuration_schema import CONFIGURATION_SCHEMA
 from rp2.rp2_decimal import ZERO, RP2Decimal
 from rp2.rp2_error import RP2TypeError, RP2ValueError
+from rp2.timestamp_parser import parse_timestamp
 
 MIN_DATE: date = date(1970, 1, 1)
 MAX_DATE: date = date(9999, 12, 31)
@@ -177,8 +177,11 @@ class Configuration:  # pylint: disable=too-many-public-methods
                     self.__assets = self._validate_string_set(Keyword.ASSETS.value, ini_configuration[section_name], configuration_path)
                     self.__exchanges = self._validate_string_set(Keyword.EXCHANGES.value, ini_configuration[section_name], configuration_path)
                     self.__holders = self._validate_string_set(Keyword.HOLDERS.value, ini_configuration[section_name], configuration_path)
-                    if Keyword.GENERATORS.value in ini_configuration:
-                        self.__generators = self._validate_string_set(Keyword.GENERATORS.value, ini_configuration[section_name], configuration_path)
+                    if Keyword.GENERATORS.value in ini_configuration[section_name]:
+                        self.__generators = {
+                            f"{REPORT_GENERATOR_PACKAGE}.{generator}"
+                            for generator in self._validate_string_set(Keyword.GENERATORS.value, ini_configuration[section_name], configuration_path)
+                        }
                 elif normalized_section_name == Keyword.IN_HEADER.value:
                     if self.__in_header:
                         raise RP2ValueError(f"{configuration_path}: section '{normalized_section_name}' found multiple times in configuration file")
@@ -327,6 +330,18 @@ class Configuration:  # pylint: disable=too-many-public-methods
     def years_2_accounting_method_names(self) -> Dict[int, str]:
         return self.__years_2_accounting_method_names
 
+    @property
+    def in_header(self) -> Dict[str, int]:
+        return self.__in_header
+
+    @property
+    def out_header(self) -> Dict[str, int]:
+        return self.__out_header
+
+    @property
+    def intra_header(self) -> Dict[str, int]:
+        return self.__intra_header
+
     def __get_table_constructor_argument_pack(self, data: List[Any], table_type: str, header: Dict[str, int]) -> Dict[str, Any]:
         if not isinstance(data, List):
             raise RP2TypeError(f"Parameter 'data' value is not a List: {data}")
@@ -371,11 +386,21 @@ class Configuration:  # pylint: disable=too-many-public-methods
     def type_check_internal_id(cls, name: str, value: int) -> int:
         return cls.type_check_int(name, value)
 
+    # Accepts both timestamp strings and already-parsed datetimes (e.g. when creating a transaction from another transaction)
+    @classmethod
+    def type_check_timestamp(cls, name: str, value: Union[str, datetime]) -> datetime:
+        if isinstance(value, datetime):
+            cls.type_check_parameter_name(name)
+            if value.tzinfo is None:
+                raise RP2ValueError(f"Parameter '{name}' value has no timezone info: {value}")
+            return value
+        return cls.type_check_timestamp_from_string(name, value)
+
     @classmethod
     def type_check_timestamp_from_string(cls, name: str, value: str) -> datetime:
         cls.type_check_string(name, value)
         try:
-            result: datetime = parse(value)
+            result: datetime = parse_timestamp(value)
         except Exception as exc:
             raise RP2ValueError(f"Error parsing parameter '{name}': {str(exc)}") from exc
         if result.tzinfo is None:
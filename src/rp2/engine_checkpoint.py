@@ -0,0 +1,164 @@
+# Copyright 2021 eprbell
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from rp2.abstract_transaction import AbstractTransaction
+from rp2.accounting_engine import PartialAmountWrite, get_timestamp_key
+from rp2.in_transaction import InTransaction
+from rp2.rp2_decimal import RP2Decimal
+from rp2.rp2_error import RP2TypeError
+
+# Fields of a taxable event that the accounting engine reads: (timestamp key, is earn-typed, crypto balance change)
+TaxableEventFields = Tuple[int, bool, RP2Decimal]
+# Fields of an acquired lot that the accounting engine reads: (timestamp key, crypto in, spot price)
+AcquiredLotFields = Tuple[int, RP2Decimal, RP2Decimal]
+# Gain/loss expressed as positions in the taxable event and acquired lot lists: (taxable event index, acquired lot index or -1, crypto amount)
+GainLossIndexes = Tuple[int, int, RP2Decimal]
+
+
+# State of the tax engine loop at the first taxable event of a month: acquired lot partial amounts are not stored here, because they can be
+# rebuilt by replaying the first journal_length writes of the partial amount journal.
+class EngineCheckpoint(NamedTuple):
+    taxable_event_index: int
+    taxable_event_timestamp_key: int
+    acquired_lot_index: int
+    taxable_event_amount: RP2Decimal
+    acquired_lot_amount: RP2Decimal
+    total_amount: RP2Decimal
+    journal_length: int
+    gain_loss_count: int
+
+
+# Record of a tax engine run on one asset, which is stored in the parse cache and used by the next run to skip the part of the computation
+# that precedes the earliest changed transaction. Transactions are compared using only the fields the accounting engine reads.
+class EngineHistory:
+    @classmethod
+    def type_check(cls, name: str, instance: "EngineHistory") -> "EngineHistory":
+        if not isinstance(name, str):
+            raise RP2TypeError(f"Parameter name is not a string: {repr(name)}")
+        if not isinstance(instance, cls):
+            raise RP2TypeError(f"Parameter '{name}' is not of type {cls.__name__}: {instance}")
+        return instance
+
+    def __init__(self, taxable_event_list: List[AbstractTransaction], acquired_lot_list: List[InTransaction]) -> None:
+        self.__taxable_event_fields: List[TaxableEventFields] = [
+            (get_timestamp_key(transaction.timestamp), transaction.transaction_type.is_earn_type(), transaction.crypto_balance_change)
+            for transaction in taxable_event_list
+        ]
+        self.__acquired_lot_fields: List[AcquiredLotFields] = [
+            (get_timestamp_key(transaction.timestamp), transaction.crypto_in, transaction.spot_price) for transaction in acquired_lot_list
+        ]
+        self.__checkpoints: List[EngineCheckpoint] = []
+        self.__partial_amount_journal: List[PartialAmountWrite] = []
+        self.__gain_losses: List[GainLossIndexes] = []
+
+    @property
+    def checkpoints(self) -> List[EngineCheckpoint]:
+        return self.__checkpoints
+
+    @property
+    def partial_amount_journal(self) -> List[PartialAmountWrite]:
+        return self.__partial_amount_journal
+
+    @property
+    def gain_losses(self) -> List[GainLossIndexes]:
+        return self.__gain_losses
+
+    # Returns the latest checkpoint of previous_history that precedes every difference between previous_history and this history (or None if
+    # there is no such checkpoint) and copies to this history the part of previous_history that precedes it.
+    def restore(self, previous_history: "EngineHistory") -> Optional[EngineCheckpoint]:
+        EngineHistory.type_check("previous_history", previous_history)
+        # pylint: disable=protected-access
+        changed_taxable_event_index: int = _get_first_difference(self.__taxable_event_fields, previous_history.__taxable_event_fields)
+        changed_acquired_lot_index: int = _get_first_difference(self.__acquired_lot_fields, previous_history.__acquired_lot_fields)
+        # Timestamp of the earliest changed acquired lot
+        changed_timestamp_key: Optional[int] = None
+        for acquired_lot_fields in [self.__acquired_lot_fields, previous_history.__acquired_lot_fields]:
+            if changed_acquired_lot_index < len(acquired_lot_fields):
+                timestamp_key: int = acquired_lot_fields[changed_acquired_lot_index][0]
+                changed_timestamp_key = timestamp_key if changed_timestamp_key is None else min(changed_timestamp_key, timestamp_key)
+
+        # A checkpoint is valid if its taxable event is unchanged and all acquired lots the engine could have looked at so far (i.e. the ones
+        # not newer than the checkpoint's taxable event) are unchanged.
+        index: int = len(previous_history.__checkpoints) - 1
+        while index >= 0:
+            checkpoint: EngineCheckpoint = previous_history.__checkpoints[index]
+            if checkpoint.taxable_event_index < changed_taxable_event_index and (
+                changed_timestamp_key is None or checkpoint.taxable_event_timestamp_key < changed_timestamp_key
+            ):
+                # The checkpoint itself is not copied: it is recorded again when the engine resumes from it
+                self.__checkpoints = previous_history.__checkpoints[:index]
+                self.__partial_amount_journal = previous_history.__partial_amount_journal[: checkpoint.journal_length]
+                self.__gain_losses = previous_history.__gain_losses[: checkpoint.gain_loss_count]
+                return checkpoint
+            index -= 1
+        return None
+
+
+# Records checkpoints and gain/losses into an EngineHistory while the tax engine runs: a checkpoint is recorded every time the taxable event
+# month changes.
+class EngineHistoryRecorder:
+    def __init__(self, history: EngineHistory, taxable_event_list: List[AbstractTransaction], acquired_lot_list: List[InTransaction]) -> None:
+        self.__history: EngineHistory = EngineHistory.type_check("history", history)
+        self.__taxable_event_2_index: Dict[AbstractTransaction, int] = {transaction: index for index, transaction in enumerate(taxable_event_list)}
+        self.__acquired_lot_2_index: Dict[InTransaction, int] = {transaction: index for index, transaction in enumerate(acquired_lot_list)}
+        self.__month: int = -1
+
+    @property
+    def history(self) -> EngineHistory:
+        return self.__history
+
+    def record_checkpoint(
+        self,
+        taxable_event: AbstractTransaction,
+        acquired_lot: Optional[InTransaction],
+        taxable_event_amount: RP2Decimal,
+        acquired_lot_amount: RP2Decimal,
+        total_amount: RP2Decimal,
+    ) -> None:
+        month: int = taxable_event.timestamp.year * 12 + taxable_event.timestamp.month
+        if month == self.__month:
+            return
+        self.__month = month
+        self.__history.checkpoints.append(
+            EngineCheckpoint(
+                taxable_event_index=self.__taxable_event_2_index[taxable_event],
+                taxable_event_timestamp_key=get_timestamp_key(taxable_event.timestamp),
+                acquired_lot_index=self.__acquired_lot_2_index[acquired_lot] if acquired_lot is not None else -1,
+                taxable_event_amount=taxable_event_amount,
+                acquired_lot_amount=acquired_lot_amount,
+                total_amount=total_amount,
+                journal_length=len(self.__history.partial_amount_journal),
+                gain_loss_count=len(self.__history.gain_losses),
+            )
+        )
+
+    def record_gain_loss(self, taxable_event: AbstractTransaction, acquired_lot: Optional[InTransaction], crypto_amount: RP2Decimal) -> None:
+        self.__history.gain_losses.append(
+            (
+                self.__taxable_event_2_index[taxable_event],
+                self.__acquired_lot_2_index[acquired_lot] if acquired_lot is not None else -1,
+                crypto_amount,
+            )
+        )
+
+
+def _get_first_difference(fields_list: Sequence[Tuple[object, ...]], previous_fields_list: Sequence[Tuple[object, ...]]) -> int:
+    index: int
+    for index, (fields, previous_fields) in enumerate(zip(fields_list, previous_fields_list)):
+        if fields != previous_fields:
+            return index
+    return min(len(fields_list), len(previous_fields_list))
@@ -0,0 +1,51 @@
+# Copyright 2021 eprbell
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from decimal import Decimal, getcontext
+from typing import Optional
+
+from rp2.rp2_decimal import CRYPTO_DECIMALS, RP2Decimal
+
+# Scaled-integer fixed-point representation of crypto amounts: an amount is represented by the Python integer amount * 10^CRYPTO_DECIMALS.
+# Integer additions and comparisons are much cheaper than RP2Decimal ones (which allocate intermediate Decimals and quantize), and they yield
+# exactly the same results as long as amounts have at most CRYPTO_DECIMALS decimal digits and RP2Decimal arithmetic on them is exact (i.e. the
+# results fit in the RP2Decimal precision). Amounts that don't meet these conditions have no scaled representation: callers fall back to
+# RP2Decimal for them. Scaled amounts are meant for internal computations (e.g. fraction tracking in GainLossSet): values that are shown in
+# reports stay RP2Decimal, so that their representation doesn't change.
+
+SCALE: int = 10**CRYPTO_DECIMALS
+
+# Scaled amounts are limited so that the sum of two of them still fits in the RP2Decimal precision
+_MAX_SCALED_AMOUNT: int = 10 ** (getcontext().prec - 1)
+
+
+def to_scaled_int(amount: Decimal) -> Optional[int]:
+    if not amount.is_finite():
+        return None
+    # as_integer_ratio() is exact (it doesn't depend on the decimal context): the denominator divides SCALE only if the amount has at most
+    # CRYPTO_DECIMALS decimal digits.
+    numerator: int
+    denominator: int
+    numerator, denominator = amount.as_integer_ratio()
+    if SCALE % denominator != 0:
+        return None
+    result: int = numerator * (SCALE // denominator)
+    if abs(result) >= _MAX_SCALED_AMOUNT:
+        return None
+    return result
+
+
+def from_scaled_int(scaled_amount: int) -> RP2Decimal:
+    return RP2Decimal(RP2Decimal(scaled_amount).scaleb(-CRYPTO_DECIMALS))
@@ -13,7 +13,7 @@
 # limitations under the License.
 
 from datetime import datetime
-from typing import Callable, List, Optional, cast
+from typing import Callable, List, Optional
 
 from rp2.abstract_entry import AbstractEntry
 from rp2.abstract_transaction import AbstractTransaction
@@ -24,20 +24,33 @@ from rp2.rp2_error import RP2RuntimeError, RP2TypeError, RP2ValueError
 
 
 class GainLoss(AbstractEntry):
+    __slots__ = ("__taxable_event", "__crypto_amount", "__acquired_lot", "__hash")
+
     def __init__(
         self,
         configuration: Configuration,
         crypto_amount: RP2Decimal,
         taxable_event: AbstractTransaction,
         acquired_lot: Optional[InTransaction],
+        trusted: bool = False,
     ) -> None:
-        self.__taxable_event: AbstractTransaction = cast(AbstractTransaction, AbstractTransaction.type_check("taxable_event", taxable_event))
-        if not taxable_event.is_taxable():
-            raise RP2ValueError(f"Parameter 'taxable_event' of class {taxable_event.__class__.__name__} is not taxable: {taxable_event}")
+        if not trusted:
+            AbstractTransaction.type_check("taxable_event", taxable_event)
+            if not taxable_event.is_taxable():
+                raise RP2ValueError(f"Parameter 'taxable_event' of class {taxable_event.__class__.__name__} is not taxable: {taxable_event}")
+        self.__taxable_event: AbstractTransaction = taxable_event
 
         super().__init__(configuration, taxable_event.asset)
 
-        self.__crypto_amount: RP2Decimal = configuration.type_check_positive_decimal("crypto_amount", crypto_amount, non_zero=True)
+        self.__crypto_amount: RP2Decimal = crypto_amount
+        self.__acquired_lot: Optional[InTransaction] = acquired_lot
+        self.__hash: int
+        if trusted:
+            # Created by the tax engine in trusted validation mode out of transactions that were validated at parse time: skip the checks below
+            self.__hash = _get_hash(taxable_event, acquired_lot)
+            return
+
+        configuration.type_check_positive_decimal("crypto_amount", crypto_amount, non_zero=True)
 
         if not taxable_event.transaction_type.is_earn_type():
             if acquired_lot is None:
@@ -51,7 +64,6 @@ class GainLoss(AbstractEntry):
                 )
             if acquired_lot is not None:
                 raise RP2TypeError(f"acquired_lot must be None for earn-typed taxable_events, instead it's {acquired_lot}")
-        self.__acquired_lot: Optional[InTransaction] = acquired_lot
 
         if self.__crypto_amount > self.__taxable_event.crypto_balance_change or (self.__acquired_lot and self.__crypto_amount > self.__acquired_lot.crypto_in):
             raise RP2ValueError(
@@ -67,6 +79,8 @@ class GainLoss(AbstractEntry):
         if acquired_lot is not None and taxable_event.asset != acquired_lot.asset:
             raise RP2ValueError(f"taxable_event.asset ({taxable_event.asset}) != acquired_lot.asset ({acquired_lot.asset})")
 
+        self.__hash = _get_hash(taxable_event, acquired_lot)
+
     @classmethod
     def type_check(cls, name: str, instance: "AbstractEntry") -> "GainLoss":
         Configuration.type_check_parameter_name(name)
@@ -79,20 +93,18 @@ class GainLoss(AbstractEntry):
             return False
         if not isinstance(other, GainLoss):
             raise RP2TypeError(f"Operand has non-GainLoss value {repr(other)}")
-        self_acquired_lot_internal_id: Optional[str] = self.acquired_lot.internal_id if self.acquired_lot else None
-        other_acquired_lot_internal_id: Optional[str] = other.acquired_lot.internal_id if other.acquired_lot else None
-        # By definition, internal_id can uniquely identify a transaction: this works even if it's the ODS line from the spreadsheet,
-        # since there are no cross-asset transactions (so a spreadsheet line points to a unique transaction for that asset).
-        result: bool = self.taxable_event.internal_id == other.taxable_event.internal_id and self_acquired_lot_internal_id == other_acquired_lot_internal_id
-        return result
+        if self.__hash != hash(other) or self.__taxable_event.numeric_internal_id != other.taxable_event.numeric_internal_id:
+            return False
+        other_acquired_lot: Optional[InTransaction] = other.acquired_lot
+        if self.__acquired_lot is None or other_acquired_lot is None:
+            return self.__acquired_lot is other_acquired_lot
+        return self.__acquired_lot.numeric_internal_id == other_acquired_lot.numeric_internal_id
 
     def __ne__(self, other: object) -> bool:
         return not self.__eq__(other)
 
     def __hash__(self) -> int:
-        # By definition, internal_id can uniquely identify a transaction: this works even if it's the ODS line from the spreadsheet,
-        # since there are no cross-asset transactions (so a spreadsheet line points to a unique transaction for that asset).
-        return hash((self.taxable_event.internal_id, self.acquired_lot.internal_id if self.acquired_lot else None))
+        return self.__hash
 
     def to_string(self, indent: int = 0, repr_format: bool = True, extra_data: Optional[List[str]] = None) -> str:
         self.configuration.type_check_positive_int("indent", indent)
@@ -201,3 +213,10 @@ class GainLoss(AbstractEntry):
                 raise RP2RuntimeError("Internal error: acquired lot is None but taxable event is not earn-typed")
             return False
         return (self.taxable_event.timestamp - self.acquired_lot.timestamp).days >= self.configuration.country.get_long_term_capital_gain_period()
+
+
+# Gain/losses are dictionary keys in GainLossSet and ComputedData, so their hash is computed once, out of the numeric ids of their transactions.
+# By definition, internal_id can uniquely identify a transaction: this works even if it's the ODS line from the spreadsheet,
+# since there are no cross-asset transactions (so a spreadsheet line points to a unique transaction for that asset).
+def _get_hash(taxable_event: AbstractTransaction, acquired_lot: Optional[InTransaction]) -> int:
+    return hash((taxable_event.numeric_internal_id, acquired_lot.numeric_internal_id if acquired_lot else None))
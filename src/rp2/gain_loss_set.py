@@ -12,21 +12,38 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from datetime import date
-from typing import Dict, List, Optional, cast
+from array import array
+from bisect import bisect_right
+from datetime import date, datetime
+from typing import Dict, List, Optional, Set, Tuple, Union, cast
 
 from rp2.abstract_entry import AbstractEntry
 from rp2.abstract_entry_set import AbstractEntrySet
 from rp2.abstract_transaction import AbstractTransaction
 from rp2.configuration import MAX_DATE, MIN_DATE, Configuration
 from rp2.entry_types import TransactionType
+from rp2.fixed_point import from_scaled_int, to_scaled_int
 from rp2.gain_loss import GainLoss
 from rp2.in_transaction import InTransaction
 from rp2.logger import LOGGER
 from rp2.rp2_decimal import ZERO, RP2Decimal
 from rp2.rp2_error import RP2RuntimeError, RP2TypeError, RP2ValueError
 
+# Type code of integer columns (transaction indexes, rows, fractions and dates)
+_INDEX_TYPE_CODE: str = "i"
 
+# Acquired lot index and fraction of gain/losses that have no acquired lot (earn-typed taxable events)
+_NO_ACQUIRED_LOT: int = -1
+
+# Crypto amount used for numbering: scaled integer if amounts are scaled (see GainLossSet._unscale_amounts()), RP2Decimal otherwise
+_Amount = Union[int, RP2Decimal]
+
+
+# Gain/losses are stored in columns, i.e. parallel arrays with one row per gain/loss: taxable event index, acquired lot index (both indexes
+# refer to the transaction table of the set) and crypto amount. Fraction numbers, numbers of fractions and crypto amount running sums are
+# computed as rows are added (see _number_row()): the tax engine adds rows in timestamp order, so no second pass over the set is needed (rows
+# added out of order are sorted and renumbered on first access). GainLoss objects are created only when entries are iterated over (or
+# requested via get_parent()), so the set doesn't keep an object per gain/loss, nor the list, set and dictionary entries to track it.
 class GainLossSet(AbstractEntrySet):
     @classmethod
     def type_check(cls, name: str, instance: "GainLossSet") -> "GainLossSet":
@@ -43,184 +60,384 @@ class GainLossSet(AbstractEntrySet):
         to_date: date = MAX_DATE,
     ) -> None:
         super().__init__(configuration, "MIXED", asset, from_date, to_date)
-        self.__taxable_events_to_fraction: Dict[GainLoss, int] = {}
-        self.__acquired_lots_to_fraction: Dict[GainLoss, int] = {}
-        self.__taxable_events_to_number_of_fractions: Dict[AbstractTransaction, int] = {}
-        self.__acquired_lots_to_number_of_fractions: Dict[InTransaction, int] = {}
+        # Transaction table
+        self.__transactions: List[AbstractTransaction] = []
+        self.__transaction_2_index: Dict[AbstractTransaction, int] = {}
+        # Crypto balance change of each transaction: scaled integer if amounts are scaled (see _number_row()), RP2Decimal otherwise
+        self.__transaction_amounts: List[_Amount] = []
+        # First row of each transaction as taxable event (-1 if it's not a taxable event)
+        self.__taxable_event_first_rows: "array[int]" = array(_INDEX_TYPE_CODE)
+        # Number of fractions of each transaction as taxable event and as acquired lot (0 if it's not one)
+        self.__taxable_event_number_of_fractions: "array[int]" = array(_INDEX_TYPE_CODE)
+        self.__acquired_lot_number_of_fractions: "array[int]" = array(_INDEX_TYPE_CODE)
+
+        # Row columns
+        self.__taxable_event_indexes: "array[int]" = array(_INDEX_TYPE_CODE)
+        self.__acquired_lot_indexes: "array[int]" = array(_INDEX_TYPE_CODE)
+        self.__crypto_amounts: List[RP2Decimal] = []
+        self.__taxable_event_fractions: "array[int]" = array(_INDEX_TYPE_CODE)
+        self.__acquired_lot_fractions: "array[int]" = array(_INDEX_TYPE_CODE)
+        self.__crypto_amount_running_sums: List[RP2Decimal] = []
+        # Latest taxable event date (as ordinal) of the rows up to each row: it's non-decreasing, so the rows up to to_date are found by
+        # binary search, even if timestamps have different time zones
+        self.__max_date_ordinals: "array[int]" = array(_INDEX_TYPE_CODE)
+        # Taxable event and acquired lot indexes of the rows added with add_entry(), to detect duplicates
+        self.__row_keys: Set[Tuple[int, int]] = set()
+
+        # Numbering state of the rows added so far (see _number_row())
+        self.__are_rows_sorted: bool = True
+        self.__are_amounts_scaled: bool = True
+        self.__current_taxable_event_amount: _Amount = 0
+        self.__current_taxable_event_fraction: int = 0
+        self.__current_acquired_lot_amounts: Dict[int, _Amount] = {}
+        self.__current_acquired_lot_fractions: Dict[int, int] = {}
+        self.__exhausted_taxable_events: Set[int] = set()
+        self.__exhausted_acquired_lots: Set[int] = set()
         self.__transaction_type_2_count: Dict[TransactionType, int] = {transaction_type: 0 for transaction_type in TransactionType}
 
+        # Time filter, applied at sort time: number of rows up to to_date and values that differ from the ones above because of rows after
+        # to_date (number of fractions, keyed by transaction index, and transaction type counts)
+        self.__row_count: int = 0
+        self.__taxable_event_number_of_fractions_overrides: Dict[int, int] = {}
+        self.__acquired_lot_number_of_fractions_overrides: Dict[int, int] = {}
+        self.__filtered_transaction_type_2_count: Dict[TransactionType, int] = self.__transaction_type_2_count
+
+        # Last entry created by the iterator and its row: generators query fractions of the entry they are iterating on, so its row is
+        # found without searching
+        self.__last_entry: Optional[GainLoss] = None
+        self.__last_row: int = -1
+
+    @property
+    def count(self) -> int:
+        return len(self.__crypto_amounts)
+
     def add_entry(self, entry: AbstractEntry) -> None:
-        GainLoss.type_check("entry", entry)
-        super().add_entry(entry)
+        gain_loss: GainLoss = GainLoss.type_check("entry", entry)
+        if gain_loss.asset != self.asset:
+            raise RP2ValueError(f"Attempting to add a {gain_loss.asset} entry to a {self.asset} set")
+        taxable_event_index: int = self._get_transaction_index(gain_loss.taxable_event)
+        acquired_lot_index: int = self._get_transaction_index(gain_loss.acquired_lot) if gain_loss.acquired_lot else _NO_ACQUIRED_LOT
+        row_key: Tuple[int, int] = (taxable_event_index, acquired_lot_index)
+        if row_key in self.__row_keys:
+            raise RP2ValueError(f"Entry already added: {entry}")
+        self.__row_keys.add(row_key)
+        self._add_row(taxable_event_index, acquired_lot_index, gain_loss.crypto_amount)
+
+    def add_trusted_entry(self, entry: AbstractEntry) -> None:
+        gain_loss: GainLoss = cast(GainLoss, entry)
+        self.add_trusted_gain_loss(gain_loss.taxable_event, gain_loss.acquired_lot, gain_loss.crypto_amount)
+
+    # Like add_trusted_entry, but without creating a GainLoss: used by the tax engine in trusted validation mode.
+    def add_trusted_gain_loss(self, taxable_event: AbstractTransaction, acquired_lot: Optional[InTransaction], crypto_amount: RP2Decimal) -> None:
+        self._add_row(
+            self._get_transaction_index(taxable_event),
+            self._get_transaction_index(acquired_lot) if acquired_lot else _NO_ACQUIRED_LOT,
+            crypto_amount,
+        )
 
     def get_transaction_type_count(self, transaction_type: TransactionType) -> int:
         TransactionType.type_check("transaction_type", transaction_type)
         self._check_sort()
-        return self.__transaction_type_2_count[transaction_type]
+        return self.__filtered_transaction_type_2_count[transaction_type]
 
     def get_taxable_event_fraction(self, entry: GainLoss) -> int:
-        self._validate_entry(entry)
-        self._check_sort()
-        return self.__taxable_events_to_fraction[entry]
+        GainLoss.type_check("entry", entry)
+        row: int = self._get_sort_time_row(entry)
+        return self.__taxable_event_fractions[row]
 
     def get_acquired_lot_fraction(self, entry: GainLoss) -> int:
-        self._validate_entry(entry)
-        self._check_sort()
-        return self.__acquired_lots_to_fraction[entry]
+        GainLoss.type_check("entry", entry)
+        row: int = self._get_sort_time_row(entry)
+        result: int = self.__acquired_lot_fractions[row]
+        if result == _NO_ACQUIRED_LOT:
+            raise RP2ValueError(f"Entry has no acquired lot:\n{entry}")
+        return result
 
     def get_taxable_event_number_of_fractions(self, transaction: AbstractTransaction) -> int:
         AbstractTransaction.type_check("transaction", transaction)
-        if transaction not in self.__taxable_events_to_number_of_fractions:
-            raise RP2ValueError(f"Unknown transaction:\n{transaction}")
         self._check_sort()
-        return self.__taxable_events_to_number_of_fractions[transaction]
+        return self._get_number_of_fractions(transaction, self.__taxable_event_number_of_fractions, self.__taxable_event_number_of_fractions_overrides)
 
     def get_acquired_lot_number_of_fractions(self, transaction: InTransaction) -> int:
         InTransaction.type_check("transaction", transaction)
-        if transaction not in self.__acquired_lots_to_number_of_fractions:
-            raise RP2ValueError(f"Unknown transaction:\n{transaction}")
         self._check_sort()
-        return self.__acquired_lots_to_number_of_fractions[transaction]
+        return self._get_number_of_fractions(transaction, self.__acquired_lot_number_of_fractions, self.__acquired_lot_number_of_fractions_overrides)
+
+    # Sum of crypto amounts of all gain/losses up to the given one (included), regardless of from_date
+    def get_crypto_amount_running_sum(self, entry: GainLoss) -> RP2Decimal:
+        GainLoss.type_check("entry", entry)
+        row: int = self._get_sort_time_row(entry)
+        return self.__crypto_amount_running_sums[row]
+
+    def get_parent(self, entry: AbstractEntry) -> Optional[AbstractEntry]:
+        GainLoss.type_check("entry", entry)
+        row: int = self._get_row(cast(GainLoss, entry))
+        return self._create_gain_loss(row - 1) if row > 0 else None
 
     def _validate_entry(self, entry: AbstractEntry) -> None:
         GainLoss.type_check("entry", entry)
-        super()._validate_entry(entry)
+        self._get_row(cast(GainLoss, entry))
 
-    def _sort_entries(self) -> None:  # pylint: disable=too-many-branches
-        LOGGER.debug("Sort Gain-Loss Set:")
-        super()._sort_entries()
-        entry: AbstractEntry
-        gain_loss: Optional[GainLoss] = None
-        # Taxable events are always monotonic over time (sorted by ascending date), so we just need scalars to keep
-        # track of amount and fraction (see also acquired-lot comment below). On the other hand acquired lots are not always
-        # monotonic over time (they can be in any order, depending on the accounting method), so we need dictionaries
-        # to keep track of amount and fraction for each lot.
-        current_taxable_event_amount: RP2Decimal = ZERO
-        current_taxable_event_fraction: int = 0
-        current_acquired_lot_amount: Dict[InTransaction, RP2Decimal] = {}
-        current_acquired_lot_fraction: Dict[InTransaction, int] = {}
-
-        last_gain_loss_with_acquired_lot: Optional[GainLoss] = None
-
-        # Reset fields that are recomputed at sort time
-        self.__taxable_events_to_fraction = {}
-        self.__taxable_events_to_number_of_fractions = {}
-        self.__acquired_lots_to_fraction = {}
-        self.__acquired_lots_to_number_of_fractions = {}
-        self.__transaction_type_2_count = {transaction_type: 0 for transaction_type in TransactionType}
+    def _get_number_of_fractions(self, transaction: AbstractTransaction, number_of_fractions: "array[int]", overrides: Dict[int, int]) -> int:
+        index: Optional[int] = self.__transaction_2_index.get(transaction)
+        result: int = 0
+        if index is not None:
+            result = overrides.get(index, number_of_fractions[index])
+        if result == 0:
+            raise RP2ValueError(f"Unknown transaction:\n{transaction}")
+        return result
 
-        for entry in self._entry_list:
-            gain_loss = cast(GainLoss, entry)
+    def _get_transaction_index(self, transaction: AbstractTransaction) -> int:
+        result: Optional[int] = self.__transaction_2_index.get(transaction)
+        if result is None:
+            result = len(self.__transactions)
+            self.__transactions.append(transaction)
+            self.__transaction_2_index[transaction] = result
+            self.__taxable_event_first_rows.append(-1)
+            self.__taxable_event_number_of_fractions.append(0)
+            self.__acquired_lot_number_of_fractions.append(0)
+            scaled_amount: Optional[int] = to_scaled_int(transaction.crypto_balance_change) if self.__are_amounts_scaled else None
+            self.__transaction_amounts.append(scaled_amount if scaled_amount is not None else transaction.crypto_balance_change)
+            if self.__are_amounts_scaled and scaled_amount is None:
+                self._unscale_amounts()
+        return result
 
-            # We're not using the iterator to avoid infinite recursion (we're looping over
-            # _entry_list directly), so we need to check time filters manually: stop after
-            # to_date so that number of fractions is not affected by lots outside the time filter
-            if gain_loss.timestamp.date() > self.to_date:
-                break
+    def _add_row(self, taxable_event_index: int, acquired_lot_index: int, crypto_amount: RP2Decimal) -> None:
+        row: int = self.count
+        if row > 0 and self.__transactions[taxable_event_index].timestamp < self.__transactions[self.__taxable_event_indexes[row - 1]].timestamp:
+            self.__are_rows_sorted = False
+        self.__taxable_event_indexes.append(taxable_event_index)
+        self.__acquired_lot_indexes.append(acquired_lot_index)
+        self.__crypto_amounts.append(crypto_amount)
+        self.__last_entry = None
+        if self.__are_rows_sorted:
+            self._number_row(row)
+        self._set_unsorted()
 
-            count: int = self.__transaction_type_2_count[gain_loss.taxable_event.transaction_type]
-            self.__transaction_type_2_count[gain_loss.taxable_event.transaction_type] = count + 1
+    # Amounts are tracked as scaled integers as long as all of them have an exact scaled representation (see fixed_point.py), then as
+    # RP2Decimal: results are the same, but integer arithmetic is much faster. Amounts are: crypto amount of each row and crypto balance
+    # change of each transaction (taxable event or acquired lot).
+    def _unscale_amounts(self) -> None:
+        self.__are_amounts_scaled = False
+        self.__transaction_amounts = [transaction.crypto_balance_change for transaction in self.__transactions]
+        self.__current_taxable_event_amount = self._get_decimal_amount(self.__current_taxable_event_amount)
+        self.__current_acquired_lot_amounts = {index: self._get_decimal_amount(amount) for index, amount in self.__current_acquired_lot_amounts.items()}
 
-            if gain_loss.acquired_lot:
-                last_gain_loss_with_acquired_lot = gain_loss
-
-            current_taxable_event_amount += gain_loss.crypto_amount
-            self.__taxable_events_to_fraction[gain_loss] = current_taxable_event_fraction
-            if current_taxable_event_amount == gain_loss.taxable_event.crypto_balance_change:
-                # Expected amount reached: reset both fraction and amount
-                if gain_loss.taxable_event in self.__taxable_events_to_number_of_fractions:
-                    raise RP2ValueError(f"Taxable event crypto amount already exhausted for {gain_loss.taxable_event}")
-                self.__taxable_events_to_number_of_fractions[gain_loss.taxable_event] = current_taxable_event_fraction + 1
-                LOGGER.debug(
-                    "%s (%d - %d): current amount == taxable event (%.16f)",
-                    gain_loss.internal_id,
-                    current_acquired_lot_fraction[gain_loss.acquired_lot] if gain_loss.acquired_lot in current_acquired_lot_fraction else 0,
-                    current_taxable_event_fraction,
-                    current_taxable_event_amount,
-                )
-                current_taxable_event_fraction = 0
-                current_taxable_event_amount = ZERO
-            elif current_taxable_event_amount < gain_loss.taxable_event.crypto_balance_change:
-                LOGGER.debug(
-                    "%s (%d - %d): current amount < taxable event (%.16f < %.16f)",
-                    gain_loss.internal_id,
-                    current_acquired_lot_fraction[gain_loss.acquired_lot] if gain_loss.acquired_lot in current_acquired_lot_fraction else 0,
-                    current_taxable_event_fraction,
-                    current_taxable_event_amount,
-                    gain_loss.taxable_event.crypto_balance_change,
-                )
-                current_taxable_event_fraction += 1
+    def _get_zero_amount(self) -> _Amount:
+        return 0 if self.__are_amounts_scaled else ZERO
+
+    @staticmethod
+    def _get_decimal_amount(amount: _Amount) -> RP2Decimal:
+        return from_scaled_int(amount) if isinstance(amount, int) else amount
+
+    # Compute fractions of a row, continuing the numbering of the previous rows (rows are numbered in timestamp order). Taxable events are
+    # always monotonic over time (sorted by ascending date), so we just need scalars to keep track of amount and fraction (see also
+    # acquired-lot comment below). On the other hand acquired lots are not always monotonic over time (they can be in any order, depending on
+    # the accounting method), so we need dictionaries to keep track of amount and fraction for each lot (keyed by transaction index).
+    def _number_row(self, row: int) -> None:
+        taxable_event_index: int = self.__taxable_event_indexes[row]
+        acquired_lot_index: int = self.__acquired_lot_indexes[row]
+        taxable_event: AbstractTransaction = self.__transactions[taxable_event_index]
+        crypto_amount: _Amount = self.__crypto_amounts[row]
+        if self.__are_amounts_scaled:
+            scaled_crypto_amount: Optional[int] = to_scaled_int(self.__crypto_amounts[row])
+            if scaled_crypto_amount is None:
+                self._unscale_amounts()
             else:
-                raise RP2ValueError(
-                    f"Current taxable event amount ({current_taxable_event_amount})"
-                    f" exceeded crypto balance change of taxable event ({gain_loss.taxable_event.crypto_balance_change})"
-                    f". {gain_loss}"
-                )
+                crypto_amount = scaled_crypto_amount
 
-            if gain_loss.acquired_lot:
-                current_acquired_lot_amount[gain_loss.acquired_lot] = (
-                    current_acquired_lot_amount.setdefault(gain_loss.acquired_lot, ZERO) + gain_loss.crypto_amount
-                )
-                self.__acquired_lots_to_fraction[gain_loss] = current_acquired_lot_fraction.setdefault(gain_loss.acquired_lot, 0)
-                if current_acquired_lot_amount[gain_loss.acquired_lot] == gain_loss.acquired_lot.crypto_balance_change:
-                    # Expected amount reached: delete both fraction and amount from "current" dictionaries
-                    if gain_loss.acquired_lot in self.__acquired_lots_to_number_of_fractions:
-                        raise RP2ValueError(f"Acquired lot crypto amount already exhausted for {gain_loss.acquired_lot}")
-                    self.__acquired_lots_to_number_of_fractions[gain_loss.acquired_lot] = current_acquired_lot_fraction[gain_loss.acquired_lot] + 1
-                    LOGGER.debug(
-                        "%s (%d - %d): current amount == acquired lot amount (%.16f)",
-                        gain_loss.internal_id,
-                        current_acquired_lot_fraction[gain_loss.acquired_lot],
-                        current_taxable_event_fraction,
-                        current_acquired_lot_amount[gain_loss.acquired_lot],
-                    )
-                    del current_acquired_lot_amount[gain_loss.acquired_lot]
-                    del current_acquired_lot_fraction[gain_loss.acquired_lot]
-                elif current_acquired_lot_amount[gain_loss.acquired_lot] < gain_loss.acquired_lot.crypto_balance_change:
-                    LOGGER.debug(
-                        "%s (%d - %d): current amount < acquired lot amount (%.16f < %.16f)",
-                        gain_loss.internal_id,
-                        current_acquired_lot_fraction[gain_loss.acquired_lot],
-                        current_taxable_event_fraction,
-                        current_acquired_lot_amount[gain_loss.acquired_lot],
-                        gain_loss.acquired_lot.crypto_balance_change,
-                    )
-                    current_acquired_lot_fraction[gain_loss.acquired_lot] = current_acquired_lot_fraction[gain_loss.acquired_lot] + 1
-                else:
-                    raise RP2ValueError(
-                        f"Current acquired lot amount ({current_acquired_lot_amount[gain_loss.acquired_lot]}) "
-                        f"exceeded crypto balance change of acquired lot ({gain_loss.acquired_lot.crypto_balance_change})"
-                        f". {gain_loss}"
-                    )
-
-        # Final housekeeping
-
-        # Taxable event: update fractions for last non-exhausted transaction (if any)
-        if last_gain_loss_with_acquired_lot:
-            if current_taxable_event_amount > ZERO:
-                if last_gain_loss_with_acquired_lot.taxable_event in self.__taxable_events_to_number_of_fractions:
-                    raise RP2ValueError(f"Taxable event crypto amount already exhausted for {last_gain_loss_with_acquired_lot.taxable_event}")
-                self.__taxable_events_to_number_of_fractions[last_gain_loss_with_acquired_lot.taxable_event] = current_taxable_event_fraction
-                LOGGER.debug(
-                    "%s (%d - %d): taxable event housekeeping",
-                    last_gain_loss_with_acquired_lot.internal_id,
-                    current_acquired_lot_fraction[last_gain_loss_with_acquired_lot.acquired_lot]
-                    if last_gain_loss_with_acquired_lot.acquired_lot in current_acquired_lot_fraction
-                    else 0,
-                    current_taxable_event_fraction,
-                )
+        self.__transaction_type_2_count[taxable_event.transaction_type] += 1
+        self.__crypto_amount_running_sums.append((self.__crypto_amount_running_sums[row - 1] if row > 0 else ZERO) + self.__crypto_amounts[row])
+        date_ordinal: int = taxable_event.timestamp.date().toordinal()
+        self.__max_date_ordinals.append(max(self.__max_date_ordinals[row - 1], date_ordinal) if row > 0 else date_ordinal)
+        if self.__taxable_event_first_rows[taxable_event_index] < 0:
+            self.__taxable_event_first_rows[taxable_event_index] = row
 
-        # Acquired lot: update fractions for non-exhausted transactions (if any)
-        for acquired_lot, fraction in current_acquired_lot_fraction.items():
-            if acquired_lot:
-                if acquired_lot in self.__acquired_lots_to_number_of_fractions:
-                    raise RP2ValueError(f"Acquired lot crypto amount already exhausted for {acquired_lot}")
-                self.__acquired_lots_to_number_of_fractions[acquired_lot] = fraction
-                LOGGER.debug(
-                    "%s (%d): acquired_lot housekeeping",
-                    acquired_lot.internal_id,
-                    current_acquired_lot_fraction[acquired_lot],
-                )
+        self._number_taxable_event_fraction(row, taxable_event_index, acquired_lot_index, crypto_amount)
+        if acquired_lot_index == _NO_ACQUIRED_LOT:
+            self.__acquired_lot_fractions.append(_NO_ACQUIRED_LOT)
+        else:
+            self._number_acquired_lot_fraction(row, acquired_lot_index, crypto_amount)
+
+    def _number_taxable_event_fraction(self, row: int, taxable_event_index: int, acquired_lot_index: int, crypto_amount: _Amount) -> None:
+        taxable_event: AbstractTransaction = self.__transactions[taxable_event_index]
+        self.__current_taxable_event_amount += crypto_amount
+        self.__taxable_event_fractions.append(self.__current_taxable_event_fraction)
+        self.__taxable_event_number_of_fractions[taxable_event_index] = self.__current_taxable_event_fraction + 1
+        if self.__current_taxable_event_amount == self.__transaction_amounts[taxable_event_index]:
+            # Expected amount reached: reset both fraction and amount
+            if taxable_event_index in self.__exhausted_taxable_events:
+                raise RP2ValueError(f"Taxable event crypto amount already exhausted for {taxable_event}")
+            self.__exhausted_taxable_events.add(taxable_event_index)
+            LOGGER.debug(
+                "%s (%d - %d): current amount == taxable event (%.16f)",
+                self._get_internal_id(row),
+                self.__current_acquired_lot_fractions.get(acquired_lot_index, 0),
+                self.__current_taxable_event_fraction,
+                self._get_decimal_amount(self.__current_taxable_event_amount),
+            )
+            self.__current_taxable_event_fraction = 0
+            self.__current_taxable_event_amount = self._get_zero_amount()
+        elif self.__current_taxable_event_amount < self.__transaction_amounts[taxable_event_index]:
+            LOGGER.debug(
+                "%s (%d - %d): current amount < taxable event (%.16f < %.16f)",
+                self._get_internal_id(row),
+                self.__current_acquired_lot_fractions.get(acquired_lot_index, 0),
+                self.__current_taxable_event_fraction,
+                self._get_decimal_amount(self.__current_taxable_event_amount),
+                taxable_event.crypto_balance_change,
+            )
+            self.__current_taxable_event_fraction += 1
+        else:
+            raise RP2ValueError(
+                f"Current taxable event amount ({self._get_decimal_amount(self.__current_taxable_event_amount)})"
+                f" exceeded crypto balance change of taxable event ({taxable_event.crypto_balance_change})"
+                f". {self._create_gain_loss(row)}"
+            )
+
+    def _number_acquired_lot_fraction(self, row: int, acquired_lot_index: int, crypto_amount: _Amount) -> None:
+        acquired_lot: InTransaction = cast(InTransaction, self.__transactions[acquired_lot_index])
+        acquired_lot_amount: _Amount = self.__current_acquired_lot_amounts.get(acquired_lot_index, self._get_zero_amount()) + crypto_amount
+        acquired_lot_fraction: int = self.__current_acquired_lot_fractions.get(acquired_lot_index, 0)
+        self.__acquired_lot_fractions.append(acquired_lot_fraction)
+        self.__acquired_lot_number_of_fractions[acquired_lot_index] = acquired_lot_fraction + 1
+        if acquired_lot_amount == self.__transaction_amounts[acquired_lot_index]:
+            # Expected amount reached: delete both fraction and amount from "current" dictionaries
+            if acquired_lot_index in self.__exhausted_acquired_lots:
+                raise RP2ValueError(f"Acquired lot crypto amount already exhausted for {acquired_lot}")
+            self.__exhausted_acquired_lots.add(acquired_lot_index)
+            LOGGER.debug(
+                "%s (%d - %d): current amount == acquired lot amount (%.16f)",
+                self._get_internal_id(row),
+                acquired_lot_fraction,
+                self.__current_taxable_event_fraction,
+                self._get_decimal_amount(acquired_lot_amount),
+            )
+            self.__current_acquired_lot_amounts.pop(acquired_lot_index, None)
+            self.__current_acquired_lot_fractions.pop(acquired_lot_index, None)
+        elif acquired_lot_amount < self.__transaction_amounts[acquired_lot_index]:
+            LOGGER.debug(
+                "%s (%d - %d): current amount < acquired lot amount (%.16f < %.16f)",
+                self._get_internal_id(row),
+                acquired_lot_fraction,
+                self.__current_taxable_event_fraction,
+                self._get_decimal_amount(acquired_lot_amount),
+                acquired_lot.crypto_balance_change,
+            )
+            self.__current_acquired_lot_amounts[acquired_lot_index] = acquired_lot_amount
+            self.__current_acquired_lot_fractions[acquired_lot_index] = acquired_lot_fraction + 1
+        else:
+            raise RP2ValueError(
+                f"Current acquired lot amount ({self._get_decimal_amount(acquired_lot_amount)}) "
+                f"exceeded crypto balance change of acquired lot ({acquired_lot.crypto_balance_change})"
+                f". {self._create_gain_loss(row)}"
+            )
+
+    def _create_gain_loss(self, row: int) -> GainLoss:
+        acquired_lot_index: int = self.__acquired_lot_indexes[row]
+        return GainLoss(
+            self.configuration,
+            self.__crypto_amounts[row],
+            self.__transactions[self.__taxable_event_indexes[row]],
+            cast(InTransaction, self.__transactions[acquired_lot_index]) if acquired_lot_index != _NO_ACQUIRED_LOT else None,
+            trusted=True,
+        )
+
+    def _get_entry(self, index: int) -> AbstractEntry:
+        self.__last_entry = self._create_gain_loss(index)
+        self.__last_row = index
+        return self.__last_entry
+
+    # Gain/losses of a taxable event are in contiguous rows: the row of a gain/loss is found by scanning the rows of its taxable event
+    def _get_row(self, entry: GainLoss) -> int:
+        if entry is self.__last_entry:
+            return self.__last_row
+        taxable_event_index: Optional[int] = self.__transaction_2_index.get(entry.taxable_event)
+        acquired_lot_index: Optional[int] = self.__transaction_2_index.get(entry.acquired_lot) if entry.acquired_lot else _NO_ACQUIRED_LOT
+        if taxable_event_index is not None and acquired_lot_index is not None:
+            self._check_sort()
+            row: int = self.__taxable_event_first_rows[taxable_event_index]
+            while 0 <= row < self.count and self.__taxable_event_indexes[row] == taxable_event_index:
+                if self.__acquired_lot_indexes[row] == acquired_lot_index:
+                    return row
+                row += 1
+        raise RP2ValueError(f"Unknown entry:\n{entry}")
+
+    # Row of the given entry, if it's not after to_date (fractions and running sums are only read for entries in the time filter)
+    def _get_sort_time_row(self, entry: GainLoss) -> int:
+        row: int = self._get_row(entry)
+        self._check_sort()
+        if row >= self.__row_count:
+            raise RP2ValueError(f"Entry is after to_date of the set ({self.to_date}):\n{entry}")
+        return row
+
+    # Rows are numbered as they are added: sorting only renumbers rows that were added out of timestamp order, and applies the time filter
+    def _sort_entries(self) -> None:
+        LOGGER.debug("Sort Gain-Loss Set:")
+        self.__last_entry = None
+        self.__last_row = -1
+        if not self.__are_rows_sorted:
+            self._sort_rows()
+        self._apply_time_filter()
+
+    # Sort rows by timestamp of the taxable event (stable, like the sort of other entry sets) and number them again. Columns and numbering
+    # state are replaced with new objects, because they can be shared with duplicates of this set (see duplicate()).
+    def _sort_rows(self) -> None:
+        transactions: List[AbstractTransaction] = self.__transactions
+        taxable_event_indexes: "array[int]" = self.__taxable_event_indexes
+        timestamps: List[datetime] = [transactions[taxable_event_index].timestamp for taxable_event_index in taxable_event_indexes]
+        order: List[int] = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+        self.__taxable_event_indexes = array(_INDEX_TYPE_CODE, (taxable_event_indexes[row] for row in order))
+        self.__acquired_lot_indexes = array(_INDEX_TYPE_CODE, (self.__acquired_lot_indexes[row] for row in order))
+        self.__crypto_amounts = [self.__crypto_amounts[row] for row in order]
+
+        self.__taxable_event_first_rows = array(_INDEX_TYPE_CODE, [-1]) * len(transactions)
+        self.__taxable_event_number_of_fractions = array(_INDEX_TYPE_CODE, [0]) * len(transactions)
+        self.__acquired_lot_number_of_fractions = array(_INDEX_TYPE_CODE, [0]) * len(transactions)
+        self.__taxable_event_fractions = array(_INDEX_TYPE_CODE)
+        self.__acquired_lot_fractions = array(_INDEX_TYPE_CODE)
+        self.__crypto_amount_running_sums = []
+        self.__max_date_ordinals = array(_INDEX_TYPE_CODE)
+        self.__current_taxable_event_amount = self._get_zero_amount()
+        self.__current_taxable_event_fraction = 0
+        self.__current_acquired_lot_amounts = {}
+        self.__current_acquired_lot_fractions = {}
+        self.__exhausted_taxable_events = set()
+        self.__exhausted_acquired_lots = set()
+        self.__transaction_type_2_count = {transaction_type: 0 for transaction_type in TransactionType}
+
+        self.__are_rows_sorted = True
+        for row in range(self.count):
+            self._number_row(row)
+
+    # Stop at to_date so that number of fractions is not affected by lots outside the time filter. Only rows after to_date are visited (none
+    # for unfiltered sets): a taxable event that has one of them is not in the time filter, and the number of fractions of an acquired lot
+    # up to to_date is the fraction of its first row after to_date.
+    def _apply_time_filter(self) -> None:
+        row_count: int = bisect_right(self.__max_date_ordinals, self.to_date.toordinal())
+        taxable_event_number_of_fractions_overrides: Dict[int, int] = {}
+        acquired_lot_number_of_fractions_overrides: Dict[int, int] = {}
+        transaction_type_2_count: Dict[TransactionType, int] = self.__transaction_type_2_count
+        if row_count < self.count:
+            transaction_type_2_count = dict(transaction_type_2_count)
+            for row in range(row_count, self.count):
+                taxable_event_index: int = self.__taxable_event_indexes[row]
+                acquired_lot_index: int = self.__acquired_lot_indexes[row]
+                taxable_event_number_of_fractions_overrides[taxable_event_index] = 0
+                transaction_type_2_count[self.__transactions[taxable_event_index].transaction_type] -= 1
+                if acquired_lot_index != _NO_ACQUIRED_LOT and acquired_lot_index not in acquired_lot_number_of_fractions_overrides:
+                    acquired_lot_number_of_fractions_overrides[acquired_lot_index] = self.__acquired_lot_fractions[row]
+
+        self.__row_count = row_count
+        self.__taxable_event_number_of_fractions_overrides = taxable_event_number_of_fractions_overrides
+        self.__acquired_lot_number_of_fractions_overrides = acquired_lot_number_of_fractions_overrides
+        self.__filtered_transaction_type_2_count = transaction_type_2_count
+
+    # Same as GainLoss.internal_id, without creating the GainLoss
+    def _get_internal_id(self, row: int) -> str:
+        acquired_lot_index: int = self.__acquired_lot_indexes[row]
+        acquired_lot_internal_id: Optional[str] = self.__transactions[acquired_lot_index].internal_id if acquired_lot_index != _NO_ACQUIRED_LOT else None
+        return f"{self.__transactions[self.__taxable_event_indexes[row]].internal_id}->{acquired_lot_internal_id}"
 
     def __str__(self) -> str:
         output: List[str] = []
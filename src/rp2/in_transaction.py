@@ -12,7 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Callable, List, Optional
+from datetime import datetime
+from sys import intern
+from typing import Callable, List, Optional, Union
 
 from rp2.abstract_entry import AbstractEntry
 from rp2.abstract_transaction import AbstractTransaction
@@ -24,6 +26,8 @@ from rp2.rp2_error import RP2TypeError, RP2ValueError
 
 
 class InTransaction(AbstractTransaction):
+    __slots__ = ("__exchange", "__holder", "__crypto_in", "__crypto_fee", "__fiat_fee", "__fiat_in_no_fee", "__fiat_in_with_fee")
+
     @classmethod
     def type_check(cls, name: str, instance: AbstractEntry) -> "InTransaction":
         Configuration.type_check_parameter_name(name)
@@ -34,7 +38,7 @@ class InTransaction(AbstractTransaction):
     def __init__(
         self,
         configuration: Configuration,
-        timestamp: str,
+        timestamp: Union[str, datetime],
         asset: str,
         exchange: str,
         holder: str,
@@ -51,11 +55,11 @@ class InTransaction(AbstractTransaction):
     ) -> None:
         super().__init__(configuration, timestamp, asset, transaction_type, spot_price, internal_id, unique_id, notes)
 
-        self.__exchange: str = configuration.type_check_exchange("exchange", exchange)
-        self.__holder: str = configuration.type_check_holder("holder", holder)
+        self.__exchange: str = intern(configuration.type_check_exchange("exchange", exchange))
+        self.__holder: str = intern(configuration.type_check_holder("holder", holder))
         self.__crypto_in: RP2Decimal = configuration.type_check_positive_decimal("crypto_in", crypto_in, non_zero=True)
-        self.__crypto_fee: RP2Decimal = configuration.type_check_positive_decimal("crypto_fee", crypto_fee) if crypto_fee else ZERO
-        self.__fiat_fee: RP2Decimal = configuration.type_check_positive_decimal("fiat_fee", fiat_fee) if fiat_fee else ZERO
+        self.__crypto_fee: RP2Decimal = self._get_shared_zero(configuration.type_check_positive_decimal("crypto_fee", crypto_fee)) if crypto_fee else ZERO
+        self.__fiat_fee: RP2Decimal = self._get_shared_zero(configuration.type_check_positive_decimal("fiat_fee", fiat_fee)) if fiat_fee else ZERO
 
         if spot_price == ZERO:
             raise RP2ValueError(f"{self.asset} {type(self).__name__} ({self.timestamp}, id {self.internal_id}): parameter 'spot_price' cannot be 0")
@@ -63,7 +67,7 @@ class InTransaction(AbstractTransaction):
         # If fee is paid in crypto then convert it to fiat (it's needed for tax computation), if fee is paid in fiat, then crypto_fee = 0
         # (because no crypto is involved)
         if crypto_fee is not None and fiat_fee is None:
-            self.__fiat_fee = self.__crypto_fee * self.spot_price
+            self.__fiat_fee = self._get_shared_zero(self.__crypto_fee * self.spot_price)
         elif crypto_fee is not None and fiat_fee is not None:
             raise RP2ValueError(
                 f"{self.asset} {type(self).__name__} ({self.timestamp}, id {self.internal_id}): both 'crypto_fee' and 'fiat_fee' are defined: only one allowed"
@@ -78,7 +82,7 @@ class InTransaction(AbstractTransaction):
         else:
             self.__fiat_in_no_fee = configuration.type_check_positive_decimal("fiat_in_no_fee", fiat_in_no_fee, non_zero=True)
         if fiat_in_with_fee is None:
-            self.__fiat_in_with_fee = self.__fiat_in_no_fee + self.__fiat_fee
+            self.__fiat_in_with_fee = self._get_shared_sum(self.__fiat_in_no_fee, self.__fiat_fee)
         else:
             self.__fiat_in_with_fee = configuration.type_check_positive_decimal("fiat_in_with_fee", fiat_in_with_fee, non_zero=True)
 
@@ -12,7 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Callable, List, Optional
+from datetime import datetime
+from sys import intern
+from typing import Callable, List, Optional, Union
 
 from rp2.abstract_transaction import AbstractTransaction
 from rp2.configuration import Configuration
@@ -22,10 +24,12 @@ from rp2.rp2_error import RP2TypeError, RP2ValueError
 
 
 class IntraTransaction(AbstractTransaction):
+    __slots__ = ("__crypto_sent", "__crypto_received", "__crypto_fee", "__from_exchange", "__from_holder", "__to_exchange", "__to_holder", "__fiat_fee")
+
     def __init__(
         self,
         configuration: Configuration,
-        timestamp: str,
+        timestamp: Union[str, datetime],
         asset: str,
         from_exchange: str,
         from_holder: str,
@@ -41,7 +45,7 @@ class IntraTransaction(AbstractTransaction):
         Configuration.type_check("configuration", configuration)
         self.__crypto_sent: RP2Decimal = configuration.type_check_positive_decimal("crypto_sent", crypto_sent, non_zero=True)
         self.__crypto_received: RP2Decimal = configuration.type_check_positive_decimal("crypto_received", crypto_received)
-        self.__crypto_fee: RP2Decimal = self.__crypto_sent - self.__crypto_received
+        self.__crypto_fee: RP2Decimal = self._get_shared_zero(self.__crypto_sent - self.__crypto_received)
         if spot_price is None or (isinstance(spot_price, RP2Decimal) and spot_price == ZERO):
             # Sometimes, when fee is 0 in IntraTransactions, exchanges don't provide the spot_price:
             # - if the fee is 0, this is OK because spot price isn't needed (in this case spot price is assigned 0).
@@ -54,10 +58,10 @@ class IntraTransaction(AbstractTransaction):
                 )
         super().__init__(configuration, timestamp, asset, "MOVE", spot_price, internal_id, unique_id, notes)
 
-        self.__from_exchange: str = configuration.type_check_exchange("from_exchange", from_exchange)
-        self.__from_holder: str = configuration.type_check_holder("from_holder", from_holder)
-        self.__to_exchange: str = configuration.type_check_exchange("to_exchange", to_exchange)
-        self.__to_holder: str = configuration.type_check_holder("to_holder", to_holder)
+        self.__from_exchange: str = intern(configuration.type_check_exchange("from_exchange", from_exchange))
+        self.__from_holder: str = intern(configuration.type_check_holder("from_holder", from_holder))
+        self.__to_exchange: str = intern(configuration.type_check_exchange("to_exchange", to_exchange))
+        self.__to_holder: str = intern(configuration.type_check_holder("to_holder", to_holder))
         self.__fiat_fee: RP2Decimal
 
         if self.__from_exchange == self.__to_exchange and self.__from_holder == self.__to_holder:
@@ -71,7 +75,7 @@ class IntraTransaction(AbstractTransaction):
         if self.__crypto_sent < self.__crypto_received:
             raise RP2ValueError(f"{self.asset} {type(self).__name__} ({self.timestamp}, id {self.internal_id}): crypto sent < crypto received")
 
-        self.__fiat_fee = self.__crypto_fee * self.spot_price
+        self.__fiat_fee = self._get_shared_zero(self.__crypto_fee * self.spot_price)
 
     def to_string(self, indent: int = 0, repr_format: bool = True, extra_data: Optional[List[str]] = None) -> str:
         self.configuration.type_check_positive_int("indent", indent)
@@ -13,9 +13,10 @@
 # limitations under the License.
 
 import inspect
+from decimal import InvalidOperation
 from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
 import ezodf
 
@@ -26,50 +27,89 @@ from rp2.in_transaction import InTransaction
 from rp2.input_data import InputData
 from rp2.intra_transaction import IntraTransaction
 from rp2.logger import LOGGER
+from rp2.ods_stream_reader import ODSStreamReader
+from rp2.open_lot_snapshot import OpenLot, OpenLotSnapshot, create_in_transaction
 from rp2.out_transaction import OutTransaction
+from rp2.parse_cache import ParseCache
 from rp2.rp2_decimal import ZERO, RP2Decimal
-from rp2.rp2_error import RP2Error, RP2RuntimeError, RP2ValueError
+from rp2.rp2_error import RP2Error, RP2RuntimeError, RP2TypeError, RP2ValueError
+from rp2.text_input_reader import TEXT_INPUT_EXTENSIONS, TextInputReader
 from rp2.transaction_set import TransactionSet
 
 _TABLE_END: str = "TABLE END"
 
 
-def open_ods(configuration: Configuration, input_file_path: str) -> Any:
+# If streaming is True the input file is read with ODSStreamReader instead of ezodf: this is much faster and uses much less memory on large
+# spreadsheets. CSV and JSONL input files (detected by extension) are read with TextInputReader, regardless of streaming.
+def open_ods(configuration: Configuration, input_file_path: str, streaming: bool = False) -> Any:
     Configuration.type_check("configuration", configuration)
     configuration.type_check_string("input_file_path", input_file_path)
+    configuration.type_check_bool("streaming", streaming)
 
     if not Path(input_file_path).exists():
         raise RP2ValueError(f"Error: {input_file_path} does not exist")
 
+    if Path(input_file_path).suffix.lower() in TEXT_INPUT_EXTENSIONS:
+        return TextInputReader(input_file_path)
+    if streaming:
+        return ODSStreamReader(input_file_path)
     return ezodf.opendoc(input_file_path)
 
 
-def parse_ods(configuration: Configuration, asset: str, input_file_handle: Any) -> InputData:  # pylint: disable=too-many-branches
+# If parse_cache is not None, the transactions of the asset are loaded from it when the asset's rows are unchanged since they were last parsed
+# (and they are stored into it otherwise). If open_lot_snapshot is not None, its open lots of the asset are added to the in-transactions: in
+# this case the input file must contain only transactions that occurred after the snapshot date. Note that the parse cache must be created
+# with the same snapshot (see ParseCache).
+def parse_ods(
+    configuration: Configuration,
+    asset: str,
+    input_file_handle: Any,
+    parse_cache: Optional[ParseCache] = None,
+    open_lot_snapshot: Optional[OpenLotSnapshot] = None,
+) -> InputData:
     Configuration.type_check("configuration", configuration)
     configuration.type_check_asset("asset", asset)
+    if parse_cache is not None:
+        ParseCache.type_check("parse_cache", parse_cache)
+    if open_lot_snapshot is not None and not isinstance(open_lot_snapshot, OpenLotSnapshot):
+        raise RP2TypeError(f"Parameter 'open_lot_snapshot' is not of type OpenLotSnapshot: {open_lot_snapshot}")
+
+    rows: Iterator[Tuple[int, List[Any]]]
+    if isinstance(input_file_handle, TextInputReader):
+        # Text input files contain the transactions of all assets
+        rows = _get_asset_rows(configuration, asset, input_file_handle.rows(_get_column_set(configuration)))
+    elif isinstance(input_file_handle, ODSStreamReader):
+        rows = input_file_handle.rows(asset, _get_column_set(configuration))
+    else:
+        if asset not in input_file_handle.sheets.names():
+            raise RP2ValueError(f"Error: sheet {asset} does not exist in {Path(input_file_handle.docname).resolve()}")
+        rows = _get_ezodf_rows(input_file_handle.sheets[asset])
+
+    if parse_cache is None:
+        return _parse_rows(configuration, asset, rows, open_lot_snapshot)
+
+    row_list: List[Tuple[int, List[Any]]] = list(rows)
+    sheet_key: str = parse_cache.get_sheet_key(asset, row_list)
+    result: Optional[InputData] = parse_cache.load_sheet(asset, sheet_key)
+    if result is None:
+        result = _parse_rows(configuration, asset, iter(row_list), open_lot_snapshot)
+        parse_cache.store(asset, sheet_key, result)
+    return result
 
-    if asset not in input_file_handle.sheets.names():
-        raise RP2ValueError(f"Error: sheet {asset} does not exist in {Path(input_file_handle.docname).resolve()}")
-    input_sheet: Any = input_file_handle.sheets[asset]
-
-    unfiltered_transaction_sets: Dict[EntrySetType, TransactionSet] = {}
 
-    unfiltered_transaction_sets[EntrySetType.IN] = TransactionSet(configuration, "IN", asset, MIN_DATE, MAX_DATE)
-    unfiltered_transaction_sets[EntrySetType.OUT] = TransactionSet(configuration, "OUT", asset, MIN_DATE, MAX_DATE)
-    unfiltered_transaction_sets[EntrySetType.INTRA] = TransactionSet(configuration, "INTRA", asset, MIN_DATE, MAX_DATE)
+# Columns that are read by the parser: the first one (which contains table begin/end keywords) and the ones referenced by table headers.
+def _get_column_set(configuration: Configuration) -> Set[int]:
+    result: Set[int] = {0}
+    result.update(configuration.in_header.values())
+    result.update(configuration.out_header.values())
+    result.update(configuration.intra_header.values())
+    return result
 
-    artificial_transaction_list: List[AbstractTransaction] = []
 
-    current_table_type: Optional[EntrySetType] = None
-    current_table_row_count: int = 0
-    i: int = 0
-    row: Any = None
-    # Used for artificial transactions only: e.g. the fee-only transaction that is created artificially to model crypto fee of in-transactions.
-    # Artificial internal ids are negative.
-    artificial_internal_id = 0
+def _get_ezodf_rows(input_sheet: Any) -> Iterator[Tuple[int, List[Any]]]:
+    i: int
+    row: Any
     for i, row in enumerate(input_sheet.rows()):
-        artificial_internal_id -= 1
-        cell0_value: str = row[0].value
         # The numeric elements of the row_values list are used to initialize RP2Decimal instances. In theory we could collect string representations
         # from numeric strings using the plaintext() method of Cell, but this doesn't work well because of an ezodf limitation: such strings are
         # affected by the format of their cell (so they may be less precise than their real value, depending on cell format), so as a workaround
@@ -78,7 +118,65 @@ def parse_ods(configuration: Configuration, asset: str, input_file_handle: Any)
         # input data had numbers with more than CRYPTO_DECIMALS (defined in rp2_decimal.py) decimal digits, which is quite uncommon: in this case
         # RP2 would still work, but it would have a little precision loss on these high-precision numbers. Also read the comments in
         # _process_constructor_argument_pack().
-        row_values: List[Any] = [cell.value for cell in row]
+        yield (i, [cell.value for cell in row])
+
+
+# Filters rows of input files containing transactions of multiple assets: transaction lines of assets other than the given one are skipped, all
+# other rows (table keywords, headers, rows with errors, etc.) are kept. Row indexes are left unchanged.
+def _get_asset_rows(configuration: Configuration, asset: str, rows: Iterator[Tuple[int, List[Any]]]) -> Iterator[Tuple[int, List[Any]]]:
+    table_type_2_asset_column: Dict[EntrySetType, int] = {
+        EntrySetType.IN: configuration.get_in_table_column_position("asset"),
+        EntrySetType.OUT: configuration.get_out_table_column_position("asset"),
+        EntrySetType.INTRA: configuration.get_intra_table_column_position("asset"),
+    }
+    current_table_type: Optional[EntrySetType] = None
+    current_table_row_count: int = 0
+    i: int
+    row_values: List[Any]
+    for i, row_values in rows:
+        cell0_value: str = row_values[0]
+        if _is_table_begin(cell0_value):
+            current_table_row_count = 0
+            current_table_type = _get_entry_set_type(cell0_value)
+        elif _is_table_end(cell0_value):
+            current_table_type = None
+        elif (
+            current_table_type is not None
+            and current_table_row_count > 1
+            and not _is_empty(cell0_value)
+            and row_values[table_type_2_asset_column[current_table_type]] != asset
+        ):
+            # Transaction line of another asset
+            current_table_row_count += 1
+            continue
+        current_table_row_count += 1
+        yield (i, row_values)
+
+
+# Rows are (row index, row values) tuples in ascending row index order. Row indexes are not necessarily contiguous: the input reader can skip
+# rows that have no effect on parsing (e.g. copies of an empty row).
+def _parse_rows(  # pylint: disable=too-many-branches
+    configuration: Configuration, asset: str, rows: Iterator[Tuple[int, List[Any]]], open_lot_snapshot: Optional[OpenLotSnapshot] = None
+) -> InputData:
+    unfiltered_transaction_sets: Dict[EntrySetType, TransactionSet] = {}
+
+    unfiltered_transaction_sets[EntrySetType.IN] = TransactionSet(configuration, "IN", asset, MIN_DATE, MAX_DATE)
+    unfiltered_transaction_sets[EntrySetType.OUT] = TransactionSet(configuration, "OUT", asset, MIN_DATE, MAX_DATE)
+    unfiltered_transaction_sets[EntrySetType.INTRA] = TransactionSet(configuration, "INTRA", asset, MIN_DATE, MAX_DATE)
+
+    artificial_transaction_list: List[AbstractTransaction] = []
+
+    current_table_type: Optional[EntrySetType] = None
+    current_table_row_count: int = 0
+    row_count: int = 0
+    i: int
+    row_values: List[Any]
+    for i, row_values in rows:
+        row_count = i + 1
+        # Used for artificial transactions only: e.g. the fee-only transaction that is created artificially to model crypto fee of in-transactions.
+        # Artificial internal ids are negative.
+        artificial_internal_id: int = -(i + 1)
+        cell0_value: str = row_values[0]
         LOGGER.debug("parsing row: %s", row_values)
 
         if current_table_type is not None:
@@ -131,6 +229,8 @@ def parse_ods(configuration: Configuration, asset: str, input_file_handle: Any)
 
     if current_table_type is not None:
         raise RP2ValueError(f"TABLE END not found for {current_table_type} table")
+    if open_lot_snapshot is not None:
+        _add_open_lots(configuration, asset, open_lot_snapshot, row_count + 1, unfiltered_transaction_sets)
     if unfiltered_transaction_sets[EntrySetType.IN].is_empty():
         raise RP2ValueError(f"{asset}: IN table not found or empty")
 
@@ -154,6 +254,32 @@ def parse_ods(configuration: Configuration, asset: str, input_file_handle: Any)
     )
 
 
+# Open lots get internal ids following the last row of the input, so they don't clash with transactions parsed from it
+def _add_open_lots(
+    configuration: Configuration,
+    asset: str,
+    open_lot_snapshot: OpenLotSnapshot,
+    first_internal_id: int,
+    unfiltered_transaction_sets: Dict[EntrySetType, TransactionSet],
+) -> None:
+    transaction_set: TransactionSet
+    for transaction_set in unfiltered_transaction_sets.values():
+        for entry in transaction_set:
+            if entry.timestamp.date() <= open_lot_snapshot.snapshot_date:
+                raise RP2ValueError(
+                    f"{asset}: transaction {entry.internal_id} ({entry.timestamp}) is not after the open-lot snapshot date "
+                    f"({open_lot_snapshot.snapshot_date}): when starting from a snapshot, the input must only contain later transactions"
+                )
+            # Transaction sets are sorted: only the first transaction needs checking
+            break
+    index: int
+    open_lot: OpenLot
+    for index, open_lot in enumerate(open_lot_snapshot.asset_2_open_lots.get(asset, [])):
+        unfiltered_transaction_sets[EntrySetType.IN].add_entry(
+            create_in_transaction(configuration, open_lot, open_lot_snapshot.snapshot_date, first_internal_id + index)
+        )
+
+
 def _create_and_process_transaction(
     configuration: Configuration,
     row_values: List[Any],
@@ -180,7 +306,7 @@ def _create_and_process_transaction(
         unfiltered_transaction_sets[EntrySetType.IN].add_entry(
             InTransaction(
                 configuration=configuration,
-                timestamp=f"{transaction.timestamp}",
+                timestamp=transaction.timestamp,
                 asset=transaction.asset,
                 exchange=transaction.exchange,
                 holder=transaction.holder,
@@ -199,7 +325,7 @@ def _create_and_process_transaction(
         artificial_transaction_list.append(
             OutTransaction(
                 configuration=configuration,
-                timestamp=f"{transaction.timestamp}",
+                timestamp=transaction.timestamp,
                 asset=transaction.asset,
                 exchange=transaction.exchange,
                 holder=transaction.holder,
@@ -256,12 +382,25 @@ def _process_constructor_argument_pack(
                         f"Encountered an unresolved DaLI transaction (read DaLI's documentation / FAQ to learn how to resolve this issue): {argument_pack}"
                     )
 
-                # It would be ideal to pass a string directly to the RP2Decimal constructor for maximum precision, but due to ezodf limitations we
-                # cannot get the string representation directly from the spreadsheet (see the comment on cell format inside parse_ods() for more
-                # detail), so at parse time we have to get the float value from the cell. Here we convert the float to string, which allows us to
-                # initialize a maximum-precision RP2Decimal (11 decimal digits is enough precision for millisats).
-                argument_pack[numeric_parameter] = RP2Decimal(f"{value:.11f}") if value is not None else None
-            except (ValueError, RP2Error) as exc:
+                if value is None:
+                    argument_pack[numeric_parameter] = None
+                    continue
+                decimal_value: RP2Decimal
+                if isinstance(value, str):
+                    # Text input files (CSV, JSONL) and string cells: the string is passed directly to the RP2Decimal constructor for maximum
+                    # precision.
+                    decimal_value = RP2Decimal(value)
+                else:
+                    # It would be ideal to pass a string directly to the RP2Decimal constructor for maximum precision, but due to ezodf limitations
+                    # we cannot get the string representation directly from the spreadsheet (see the comment on cell format inside _get_ezodf_rows() for
+                    # more detail), so at parse time we have to get the float value from the cell. Here we convert the float to string, which
+                    # allows us to initialize a maximum-precision RP2Decimal (11 decimal digits is enough precision for millisats).
+                    decimal_value = RP2Decimal(f"{value:.11f}")
+                # NaN and Infinity are valid decimal strings (and JSON constants), but not valid amounts
+                if not decimal_value.is_finite():
+                    raise ValueError(f"Non-finite value: {value}")
+                argument_pack[numeric_parameter] = decimal_value
+            except (ValueError, InvalidOperation, RP2Error) as exc:
                 raise RP2ValueError(f"Argument '{numeric_parameter}' has non-numeric value: {value}") from exc
 
     return argument_pack
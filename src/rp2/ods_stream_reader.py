@@ -0,0 +1,193 @@
+# Copyright 2021 eprbell
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union, cast
+from xml.etree.ElementTree import Element, iterparse  # nosec
+from zipfile import BadZipFile, ZipFile
+
+from rp2.rp2_error import RP2ValueError
+
+_CONTENT_FILE: str = "content.xml"
+
+_OFFICE_NAMESPACE: str = "urn:oasis:names:tc:opendocument:xmlns:office:1.0"
+_TABLE_NAMESPACE: str = "urn:oasis:names:tc:opendocument:xmlns:table:1.0"
+_TEXT_NAMESPACE: str = "urn:oasis:names:tc:opendocument:xmlns:text:1.0"
+
+_TABLE_TAG: str = f"{{{_TABLE_NAMESPACE}}}table"
+_TABLE_ROW_TAG: str = f"{{{_TABLE_NAMESPACE}}}table-row"
+_TABLE_CELL_TAGS: Set[str] = {f"{{{_TABLE_NAMESPACE}}}table-cell", f"{{{_TABLE_NAMESPACE}}}covered-table-cell"}
+_TABLE_NAME_ATTRIBUTE: str = f"{{{_TABLE_NAMESPACE}}}name"
+_ROWS_REPEATED_ATTRIBUTE: str = f"{{{_TABLE_NAMESPACE}}}number-rows-repeated"
+_COLUMNS_REPEATED_ATTRIBUTE: str = f"{{{_TABLE_NAMESPACE}}}number-columns-repeated"
+
+_VALUE_TYPE_ATTRIBUTE: str = f"{{{_OFFICE_NAMESPACE}}}value-type"
+_NUMERIC_VALUE_TYPES: Set[str] = {"float", "percentage", "currency"}
+_VALUE_TYPE_2_VALUE_ATTRIBUTE: Dict[str, str] = {
+    "float": f"{{{_OFFICE_NAMESPACE}}}value",
+    "percentage": f"{{{_OFFICE_NAMESPACE}}}value",
+    "currency": f"{{{_OFFICE_NAMESPACE}}}value",
+    "date": f"{{{_OFFICE_NAMESPACE}}}date-value",
+    "time": f"{{{_OFFICE_NAMESPACE}}}time-value",
+    "boolean": f"{{{_OFFICE_NAMESPACE}}}boolean-value",
+}
+
+_PARAGRAPH_TAGS: Set[str] = {f"{{{_TEXT_NAMESPACE}}}p", f"{{{_TEXT_NAMESPACE}}}h"}
+_SPAN_TAGS: Set[str] = {f"{{{_TEXT_NAMESPACE}}}span", f"{{{_TEXT_NAMESPACE}}}a"} | _PARAGRAPH_TAGS
+_LIST_TAGS: Set[str] = {f"{{{_TEXT_NAMESPACE}}}list-header", f"{{{_TEXT_NAMESPACE}}}list-item"}
+_SPACES_TAG: str = f"{{{_TEXT_NAMESPACE}}}s"
+_SPACES_COUNT_ATTRIBUTE: str = f"{{{_TEXT_NAMESPACE}}}c"
+# Text elements that are replaced by a constant string (tab, line break and soft page break)
+_TAG_2_PLAINTEXT: Dict[str, str] = {
+    f"{{{_TEXT_NAMESPACE}}}tab": "\t",
+    f"{{{_TEXT_NAMESPACE}}}line-break": "\n",
+    f"{{{_TEXT_NAMESPACE}}}soft-page-break": "",
+}
+
+# Value of a cell: same types as ezodf's Cell.value
+CellValue = Optional[Union[bool, float, str]]
+
+
+# Streaming alternative to ezodf for reading input spreadsheets: ezodf loads the DOM of the entire content.xml and expands all repeated
+# rows and columns, which is slow and memory-hungry on large spreadsheets. This reader parses content.xml incrementally instead: it skips
+# sheets other than the requested one, only decodes the requested columns and discards each row as soon as it has been yielded. Cell values
+# follow the same conversion rules as ezodf's Cell.value (floats for numeric cells, plain text for string cells, etc.), so the parser sees the
+# same values with either reader.
+class ODSStreamReader:
+    def __init__(self, input_file_path: str) -> None:
+        self.__input_file_path: str = input_file_path
+        try:
+            with ZipFile(self.__input_file_path) as input_zip_file:
+                if _CONTENT_FILE not in input_zip_file.namelist():
+                    raise RP2ValueError(f"Error: {input_file_path} is not a valid ODS file: {_CONTENT_FILE} not found")
+        except BadZipFile as exc:
+            raise RP2ValueError(f"Error: {input_file_path} is not a valid ODS file") from exc
+
+    @property
+    def input_file_path(self) -> str:
+        return self.__input_file_path
+
+    # Yields (row index, row values) tuples for the given sheet. Row values contain min(max(column_set) + 1, table width) elements, where table
+    # width is the cell count of the widest row in the sheet (ezodf pads all rows to table width): columns not in column_set are None.
+    # Consecutive copies of a row whose first cell is empty are yielded only once (ezodf would yield them all, but they are all identical and
+    # the parser only checks the first one): the row index of the next row accounts for the skipped copies.
+    def rows(self, sheet_name: str, column_set: Set[int]) -> Iterator[Tuple[int, List[CellValue]]]:  # pylint: disable=too-many-branches
+        column_count: int = max(column_set) + 1
+        is_sheet_found: bool = False
+        is_in_sheet: bool = False
+        element_stack: List[Element] = []
+        row_index: int = 0
+        column_index: int = 0
+        row_values: List[CellValue] = []
+        table_width: int = 0
+        # Rows read while the table is still narrower than column_count: they can only be yielded once the final row length is known (i.e.
+        # either a row at least column_count wide is found or the table ends). This only happens with very narrow tables.
+        pending_rows: List[Tuple[int, List[CellValue]]] = []
+
+        with ZipFile(self.__input_file_path) as input_zip_file, input_zip_file.open(_CONTENT_FILE) as content_file:
+            event: str
+            element: Element
+            # iterparse() yields elements typed as Any (their type depends on the event)
+            for event, element in cast(Iterator[Tuple[str, Element]], iterparse(content_file, events=("start", "end"))):  # nosec
+                if event == "start":
+                    element_stack.append(element)
+                    if element.tag == _TABLE_TAG and element.get(_TABLE_NAME_ATTRIBUTE) == sheet_name:
+                        is_sheet_found = True
+                        is_in_sheet = True
+                    elif is_in_sheet and element.tag == _TABLE_ROW_TAG:
+                        column_index = 0
+                        row_values = [None] * column_count
+                    continue
+
+                element_stack.pop()
+                if element.tag == _TABLE_TAG:
+                    if is_in_sheet:
+                        # The requested sheet has been read entirely: no need to parse the rest of the file
+                        for pending_row_index, pending_row_values in pending_rows:
+                            yield (pending_row_index, pending_row_values[:table_width])
+                        return
+                    self._discard(element, element_stack)
+                elif is_in_sheet and element.tag in _TABLE_CELL_TAGS:
+                    column_index = self._read_cell(element, column_index, column_set, row_values)
+                elif element.tag == _TABLE_ROW_TAG:
+                    if is_in_sheet:
+                        table_width = max(table_width, column_index)
+                        repeat_count: int = int(element.get(_ROWS_REPEATED_ATTRIBUTE, "1"))
+                        if row_values[0] is None or row_values[0] == "":
+                            pending_rows.append((row_index, row_values))
+                        else:
+                            for index in range(repeat_count):
+                                pending_rows.append((row_index + index, row_values if index == 0 else list(row_values)))
+                        row_index += repeat_count
+                        if table_width >= column_count:
+                            yield from pending_rows
+                            pending_rows = []
+                    self._discard(element, element_stack)
+
+        if not is_sheet_found:
+            raise RP2ValueError(f"Error: sheet {sheet_name} does not exist in {Path(self.__input_file_path).resolve()}")
+
+    # Stores the value of a (possibly repeated) cell into the requested columns of row_values and returns the index of the next column
+    @staticmethod
+    def _read_cell(element: Element, column_index: int, column_set: Set[int], row_values: List[CellValue]) -> int:
+        repeat_count: int = int(element.get(_COLUMNS_REPEATED_ATTRIBUTE, "1"))
+        requested_indexes: List[int] = [index for index in range(column_index, min(column_index + repeat_count, len(row_values))) if index in column_set]
+        if requested_indexes:
+            value: CellValue = _get_cell_value(element)
+            index: int
+            for index in requested_indexes:
+                row_values[index] = value
+        return column_index + repeat_count
+
+    # Frees memory used by already-processed elements
+    @staticmethod
+    def _discard(element: Element, element_stack: List[Element]) -> None:
+        element.clear()
+        if element_stack:
+            element_stack[-1].remove(element)
+
+
+# Same as ezodf's Cell.value
+def _get_cell_value(cell: Element) -> CellValue:
+    value_type: Optional[str] = cell.get(_VALUE_TYPE_ATTRIBUTE)
+    if value_type is None:
+        return None
+    if value_type == "string":
+        return "\n".join([_get_plaintext(child) for child in cell if child.tag in _PARAGRAPH_TAGS])
+    value: Optional[str] = cell.get(_VALUE_TYPE_2_VALUE_ATTRIBUTE[value_type]) if value_type in _VALUE_TYPE_2_VALUE_ATTRIBUTE else None
+    if value is None:
+        return None
+    if value_type in _NUMERIC_VALUE_TYPES:
+        return float(value)
+    if value_type == "boolean":
+        return value == "true"
+    return value
+
+
+# Same as ezodf's plaintext() on text elements
+def _get_plaintext(element: Element) -> str:
+    if element.tag in _SPAN_TAGS:
+        text: List[Optional[str]] = [element.text]
+        for child in element:
+            text.append(_get_plaintext(child))
+            text.append(child.tail)
+        return "".join(filter(None, text))
+    if element.tag in _LIST_TAGS:
+        return "\n".join([_get_plaintext(child) for child in element])
+    if element.tag in _TAG_2_PLAINTEXT:
+        return _TAG_2_PLAINTEXT[element.tag]
+    if element.tag == _SPACES_TAG:
+        count: Optional[str] = element.get(_SPACES_COUNT_ATTRIBUTE)
+        return " " * (int(count) if count is not None else 1)
+    return element.text if element.text else ""
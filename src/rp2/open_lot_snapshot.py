@@ -0,0 +1,216 @@
+# Copyright 2021 eprbell
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import csv
+from datetime import date, datetime
+from decimal import InvalidOperation
+from typing import Dict, Iterable, List, NamedTuple, Optional, cast
+
+from rp2.balance import BalanceSet
+from rp2.configuration import MIN_DATE, Configuration
+from rp2.entry_types import TransactionType
+from rp2.gain_loss import GainLoss
+from rp2.gain_loss_set import GainLossSet
+from rp2.in_transaction import InTransaction
+from rp2.input_data import InputData
+from rp2.rp2_decimal import ZERO, RP2Decimal
+from rp2.rp2_error import RP2TypeError, RP2ValueError
+
+
+# Acquired lot (or part of one) that still holds crypto at the snapshot date: crypto_amount is the remaining crypto and fiat_cost_basis / fiat_fee
+# are the corresponding fractions of the lot's cost basis and fee.
+class OpenLot(NamedTuple):
+    asset: str
+    timestamp: datetime
+    exchange: str
+    holder: str
+    transaction_type: str
+    spot_price: RP2Decimal
+    crypto_amount: RP2Decimal
+    fiat_cost_basis: RP2Decimal
+    fiat_fee: RP2Decimal
+    unique_id: str
+
+
+class OpenLotSnapshot(NamedTuple):
+    snapshot_date: date
+    asset_2_open_lots: Dict[str, List[OpenLot]]
+
+
+_COLUMNS: List[str] = [
+    "asset",
+    "snapshot_date",
+    "timestamp",
+    "exchange",
+    "holder",
+    "transaction_type",
+    "spot_price",
+    "crypto_amount",
+    "fiat_cost_basis",
+    "fiat_fee",
+    "unique_id",
+]
+_DECIMAL_FIELDS: List[str] = ["spot_price", "crypto_amount", "fiat_cost_basis", "fiat_fee"]
+
+
+# Returns the lots that are not fully sold at the end of snapshot_date, in chronological order. RP2 doesn't track which account holds which
+# lot, so open lots are assigned to the accounts with positive balance at the end of snapshot_date (splitting lots where needed): this way a
+# run that starts from the snapshot has the same account balances as the current one.
+def create_open_lots(input_data: InputData, unfiltered_gain_loss_set: GainLossSet, balance_set: BalanceSet, snapshot_date: date) -> List[OpenLot]:
+    InputData.type_check("input_data", input_data)
+    GainLossSet.type_check("unfiltered_gain_loss_set", unfiltered_gain_loss_set)
+    BalanceSet.type_check("balance_set", balance_set)
+    if not isinstance(snapshot_date, date):
+        raise RP2TypeError("Parameter 'snapshot_date' is not of type date")
+
+    lot_2_sold_amount: Dict[InTransaction, RP2Decimal] = {}
+    for entry in unfiltered_gain_loss_set:
+        gain_loss: GainLoss = cast(GainLoss, entry)
+        if gain_loss.acquired_lot is None or gain_loss.taxable_event.timestamp.date() > snapshot_date:
+            continue
+        lot_2_sold_amount[gain_loss.acquired_lot] = lot_2_sold_amount.get(gain_loss.acquired_lot, ZERO) + gain_loss.crypto_amount
+
+    accounts: List[List[str]] = []
+    account_balances: List[RP2Decimal] = []
+    for balance in balance_set:
+        if balance.final_balance > ZERO:
+            accounts.append([balance.exchange, balance.holder])
+            account_balances.append(balance.final_balance)
+
+    result: List[OpenLot] = []
+    account_index: int = 0
+    for entry in input_data.unfiltered_in_transaction_set:
+        lot: InTransaction = cast(InTransaction, entry)
+        if lot.timestamp.date() > snapshot_date:
+            break
+        # Earn-typed lots were taxed as income when they were acquired: they are carried forward as plain purchases, so they are not taxed again
+        transaction_type: TransactionType = TransactionType.BUY if lot.transaction_type.is_earn_type() else lot.transaction_type
+        remaining_amount: RP2Decimal = lot.crypto_in - lot_2_sold_amount.get(lot, ZERO)
+        while remaining_amount > ZERO:
+            exchange: str = lot.exchange
+            holder: str = lot.holder
+            amount: RP2Decimal = remaining_amount
+            if account_index < len(accounts):
+                exchange, holder = accounts[account_index]
+                if account_balances[account_index] <= remaining_amount:
+                    amount = account_balances[account_index]
+                    account_index += 1
+                else:
+                    account_balances[account_index] -= remaining_amount
+            result.append(
+                OpenLot(
+                    asset=lot.asset,
+                    timestamp=lot.timestamp,
+                    exchange=exchange,
+                    holder=holder,
+                    transaction_type=transaction_type.value,
+                    spot_price=lot.spot_price,
+                    crypto_amount=amount,
+                    fiat_cost_basis=(lot.fiat_in_with_fee * amount) / lot.crypto_in,
+                    fiat_fee=(lot.fiat_fee * amount) / lot.crypto_in,
+                    unique_id=lot.unique_id,
+                )
+            )
+            remaining_amount -= amount
+
+    return result
+
+
+# CSV file with a header row and one row per open lot (of any asset). Decimals are written in positional notation with full precision.
+def write_open_lot_snapshot(output_file_path: str, snapshot_date: date, open_lots: Iterable[OpenLot]) -> None:
+    Configuration.type_check_string("output_file_path", output_file_path)
+    with open(output_file_path, "w", encoding="utf-8", newline="") as output_file:
+        writer = csv.writer(output_file)
+        writer.writerow(_COLUMNS)
+        open_lot: OpenLot
+        for open_lot in open_lots:
+            row: List[str] = [
+                open_lot.asset,
+                snapshot_date.isoformat(),
+                open_lot.timestamp.isoformat(),
+                open_lot.exchange,
+                open_lot.holder,
+                open_lot.transaction_type,
+                f"{open_lot.spot_price:f}",
+                f"{open_lot.crypto_amount:f}",
+                f"{open_lot.fiat_cost_basis:f}",
+                f"{open_lot.fiat_fee:f}",
+                open_lot.unique_id,
+            ]
+            writer.writerow(row)
+
+
+def read_open_lot_snapshot(configuration: Configuration, input_file_path: str) -> OpenLotSnapshot:
+    Configuration.type_check("configuration", configuration)
+    configuration.type_check_string("input_file_path", input_file_path)
+
+    snapshot_date: Optional[date] = None
+    asset_2_open_lots: Dict[str, List[OpenLot]] = {}
+    with open(input_file_path, encoding="utf-8-sig", newline="") as input_file:
+        reader = csv.reader(input_file)
+        header: Optional[List[str]] = next(reader, None)
+        if header != _COLUMNS:
+            raise RP2ValueError(f"{input_file_path}: invalid open-lot snapshot header (expected {', '.join(_COLUMNS)}): {header}")
+        line_number: int
+        row: List[str]
+        for line_number, row in enumerate(reader, 2):
+            if len(row) != len(_COLUMNS):
+                raise RP2ValueError(f"{input_file_path}({line_number}): expected {len(_COLUMNS)} values, found {len(row)}")
+            values: Dict[str, str] = dict(zip(_COLUMNS, row))
+            try:
+                row_snapshot_date: date = date.fromisoformat(values["snapshot_date"])
+                decimal_values: Dict[str, RP2Decimal] = {field: RP2Decimal(values[field]) for field in _DECIMAL_FIELDS}
+            except (ValueError, InvalidOperation) as exc:
+                raise RP2ValueError(f"{input_file_path}({line_number}): invalid value: {exc}") from exc
+            if snapshot_date is None:
+                snapshot_date = row_snapshot_date
+            elif row_snapshot_date != snapshot_date:
+                raise RP2ValueError(f"{input_file_path}({line_number}): snapshot date {row_snapshot_date} differs from previous rows ({snapshot_date})")
+            asset: str = configuration.type_check_asset("asset", values["asset"])
+            asset_2_open_lots.setdefault(asset, []).append(
+                OpenLot(
+                    asset=asset,
+                    timestamp=configuration.type_check_timestamp("timestamp", values["timestamp"]),
+                    exchange=configuration.type_check_exchange("exchange", values["exchange"]),
+                    holder=configuration.type_check_holder("holder", values["holder"]),
+                    transaction_type=values["transaction_type"],
+                    spot_price=decimal_values["spot_price"],
+                    crypto_amount=decimal_values["crypto_amount"],
+                    fiat_cost_basis=decimal_values["fiat_cost_basis"],
+                    fiat_fee=decimal_values["fiat_fee"],
+                    unique_id=values["unique_id"],
+                )
+            )
+
+    return OpenLotSnapshot(snapshot_date if snapshot_date is not None else MIN_DATE, asset_2_open_lots)
+
+
+def create_in_transaction(configuration: Configuration, open_lot: OpenLot, snapshot_date: date, internal_id: int) -> InTransaction:
+    return InTransaction(
+        configuration=configuration,
+        timestamp=open_lot.timestamp,
+        asset=open_lot.asset,
+        exchange=open_lot.exchange,
+        holder=open_lot.holder,
+        transaction_type=open_lot.transaction_type,
+        spot_price=open_lot.spot_price,
+        crypto_in=open_lot.crypto_amount,
+        fiat_in_no_fee=open_lot.fiat_cost_basis - open_lot.fiat_fee,
+        fiat_in_with_fee=open_lot.fiat_cost_basis,
+        fiat_fee=open_lot.fiat_fee,
+        internal_id=internal_id,
+        unique_id=open_lot.unique_id if open_lot.unique_id else None,
+        notes=f"Open lot carried forward from the open-lot snapshot of {snapshot_date}",
+    )
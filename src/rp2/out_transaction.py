@@ -12,7 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Callable, List, Optional
+from datetime import datetime
+from sys import intern
+from typing import Callable, List, Optional, Union
 
 from rp2.abstract_transaction import AbstractTransaction
 from rp2.configuration import Configuration
@@ -24,10 +26,21 @@ from rp2.rp2_error import RP2TypeError, RP2ValueError
 
 # pylint: disable=too-many-branches
 class OutTransaction(AbstractTransaction):
+    __slots__ = (
+        "__exchange",
+        "__holder",
+        "__crypto_out_no_fee",
+        "__crypto_fee",
+        "__crypto_out_with_fee",
+        "__fiat_out_no_fee",
+        "__fiat_fee",
+        "__fiat_out_with_fee",
+    )
+
     def __init__(
         self,
         configuration: Configuration,
-        timestamp: str,
+        timestamp: Union[str, datetime],
         asset: str,
         exchange: str,
         holder: str,
@@ -44,15 +57,15 @@ class OutTransaction(AbstractTransaction):
     ) -> None:
         super().__init__(configuration, timestamp, asset, transaction_type, spot_price, internal_id, unique_id, notes)
 
-        self.__exchange: str = configuration.type_check_exchange("exchange", exchange)
-        self.__holder: str = configuration.type_check_holder("holder", holder)
+        self.__exchange: str = intern(configuration.type_check_exchange("exchange", exchange))
+        self.__holder: str = intern(configuration.type_check_holder("holder", holder))
         self.__crypto_out_no_fee: RP2Decimal
         self.__crypto_fee: RP2Decimal
         self.__fiat_out_with_fee: RP2Decimal
         self.__fiat_out_no_fee: RP2Decimal
 
         if self.transaction_type == TransactionType.FEE:
-            self.__crypto_out_no_fee = configuration.type_check_positive_decimal("crypto_out_no_fee", crypto_out_no_fee)
+            self.__crypto_out_no_fee = self._get_shared_zero(configuration.type_check_positive_decimal("crypto_out_no_fee", crypto_out_no_fee))
             if self.__crypto_out_no_fee != ZERO:
                 raise RP2ValueError(
                     f"{self.asset} {type(self).__name__} ({self.timestamp}, id {self.internal_id}): fee-typed transaction has non-zero 'crypto_out_no_fee'"
@@ -62,26 +75,26 @@ class OutTransaction(AbstractTransaction):
             if spot_price == ZERO:
                 raise RP2ValueError(f"{self.asset} {type(self).__name__} ({self.timestamp}, id {self.internal_id}): parameter 'spot_price' cannot be 0")
             self.__crypto_out_no_fee = configuration.type_check_positive_decimal("crypto_out_no_fee", crypto_out_no_fee, non_zero=True)
-            self.__crypto_fee = configuration.type_check_positive_decimal("crypto_fee", crypto_fee)
+            self.__crypto_fee = self._get_shared_zero(configuration.type_check_positive_decimal("crypto_fee", crypto_fee))
 
         # Crypto out with fee is optional. It can be derived from crypto out (no fee) and crypto fee, however some exchanges
         # provide it anyway. If it is provided use it as given by the exchange, if not compute it.
         if crypto_out_with_fee is None:
-            self.__crypto_out_with_fee = self.__crypto_out_no_fee + self.crypto_fee
+            self.__crypto_out_with_fee = self._get_shared_sum(self.__crypto_out_no_fee, self.__crypto_fee)
         else:
             self.__crypto_out_with_fee = configuration.type_check_positive_decimal("crypto_out_with_fee", crypto_out_with_fee, non_zero=True)
 
         # Fiat out without fee and fiat fee are optional. They can be derived from crypto out (no fee), spot price and crypto fee,
         # however some exchanges provide them anyway. If they are provided use them as given by the exchange, if not compute them.
         if fiat_out_no_fee is None:
-            self.__fiat_out_no_fee = self.__crypto_out_no_fee * self.spot_price
+            self.__fiat_out_no_fee = self._get_shared_zero(self.__crypto_out_no_fee * self.spot_price)
         else:
             self.__fiat_out_no_fee = configuration.type_check_positive_decimal("fiat_out_no_fee", fiat_out_no_fee, non_zero=True)
         if fiat_fee is None:
-            self.__fiat_fee = self.__crypto_fee * self.spot_price
+            self.__fiat_fee = self._get_shared_zero(self.__crypto_fee * self.spot_price)
         else:
-            self.__fiat_fee = configuration.type_check_positive_decimal("fiat_fee", fiat_fee)
-        self.__fiat_out_with_fee = self.__fiat_out_no_fee + self.__fiat_fee
+            self.__fiat_fee = self._get_shared_zero(configuration.type_check_positive_decimal("fiat_fee", fiat_fee))
+        self.__fiat_out_with_fee = self._get_shared_sum(self.__fiat_out_no_fee, self.__fiat_fee)
 
         if self.transaction_type not in (TransactionType.DONATE, TransactionType.FEE, TransactionType.GIFT, TransactionType.SELL):
             raise RP2ValueError(
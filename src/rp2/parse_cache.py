@@ -0,0 +1,239 @@
+# Copyright 2021 eprbell
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import pickle  # nosec
+import zlib
+from hashlib import sha256
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import List, Optional, Sequence, Tuple, cast
+
+from rp2.configuration import Configuration
+from rp2.engine_checkpoint import EngineHistory
+from rp2.input_data import InputData
+from rp2.logger import LOGGER
+from rp2.rp2_error import RP2TypeError
+from rp2.transaction_set import TransactionSet
+
+# Bump this when the format of cache entries changes
+_CACHE_FORMAT_VERSION: str = "2"
+
+_ENTRY_SUFFIX: str = ".entry"
+_LINK_SUFFIX: str = ".link"
+_HISTORY_SUFFIX: str = ".history"
+_READ_BUFFER_SIZE: int = 1024 * 1024
+
+
+# On-disk cache of parsed input data. Entries contain the unfiltered transaction sets of one asset (pickled and compressed) and are keyed by
+# RP2 version, country, config file content, asset and content of the asset's rows in the input file: so when only one sheet of the input file
+# changes, only that sheet is parsed again. Link files map the hash of the whole input file to entries: when the input file is unchanged, an
+# asset is loaded via its link and the input file is not read at all. When the total size of the cache directory exceeds max_size bytes, the
+# least recently used files are evicted. The cache also stores the tax engine history of each asset (see EngineHistory), keyed by config file
+# content, asset and accounting methods, so that the tax engine can resume from the latest checkpoint preceding changes in the input.
+class ParseCache:
+    @classmethod
+    def type_check(cls, name: str, instance: "ParseCache") -> "ParseCache":
+        Configuration.type_check_parameter_name(name)
+        if not isinstance(instance, cls):
+            raise RP2TypeError(f"Parameter '{name}' is not of type {cls.__name__}: {instance}")
+        return instance
+
+    # If the input is parsed together with an open-lot snapshot (see parse_ods()), its path must be passed as open_lot_snapshot_path: the
+    # snapshot content is part of all keys.
+    def __init__(
+        self,
+        configuration: Configuration,
+        cache_directory: str,
+        input_file_path: str,
+        rp2_version: str,
+        max_size: int,
+        open_lot_snapshot_path: Optional[str] = None,
+    ) -> None:
+        self.__configuration: Configuration = Configuration.type_check("configuration", configuration)
+        self.__cache_directory: Path = Path(configuration.type_check_string("cache_directory", cache_directory))
+        configuration.type_check_string("input_file_path", input_file_path)
+        configuration.type_check_string("rp2_version", rp2_version)
+        self.__max_size: int = configuration.type_check_positive_int("max_size", max_size, non_zero=True)
+
+        self.__cache_directory.mkdir(parents=True, exist_ok=True)
+        hasher = sha256()
+        hasher.update(f"{_CACHE_FORMAT_VERSION}\0{rp2_version}\0{configuration.country.country_iso_code}\0".encode("utf-8"))
+        hasher.update(Path(configuration.configuration_path).read_bytes())
+        if open_lot_snapshot_path is not None:
+            hasher.update(b"\0")
+            hasher.update(Path(configuration.type_check_string("open_lot_snapshot_path", open_lot_snapshot_path)).read_bytes())
+        self.__configuration_key: str = hasher.hexdigest()
+        self.__input_file_key: str = _hash_file(input_file_path)
+
+    @property
+    def cache_directory(self) -> str:
+        return str(self.__cache_directory)
+
+    @property
+    def max_size(self) -> int:
+        return self.__max_size
+
+    # Returns the input data of the given asset if the input file hasn't changed since it was cached, None otherwise
+    def load(self, asset: str) -> Optional[InputData]:
+        self.__configuration.type_check_asset("asset", asset)
+        link_path: Path = self.__cache_directory / f"{self._get_key(self.__input_file_key, asset)}{_LINK_SUFFIX}"
+        try:
+            sheet_key: str = link_path.read_text(encoding="utf-8")
+        except OSError:
+            return None
+        result: Optional[InputData] = self._load_entry(asset, sheet_key)
+        if result is not None:
+            _touch(link_path)
+            LOGGER.debug("Parse cache hit for %s (input file unchanged)", asset)
+        return result
+
+    # Sheet keys identify the rows of an asset in the input file (rows are (row index, row values) tuples, as yielded by input file readers)
+    def get_sheet_key(self, asset: str, rows: Sequence[Tuple[int, Sequence[object]]]) -> str:
+        hasher = sha256()
+        hasher.update(f"{self.__configuration_key}\0{asset}\0".encode("utf-8"))
+        for row in rows:
+            hasher.update(repr(row).encode("utf-8"))
+        return hasher.hexdigest()
+
+    # Returns the input data of the given asset if its rows haven't changed since they were cached, None otherwise
+    def load_sheet(self, asset: str, sheet_key: str) -> Optional[InputData]:
+        self.__configuration.type_check_asset("asset", asset)
+        result: Optional[InputData] = self._load_entry(asset, sheet_key)
+        if result is not None:
+            self._write_atomically(self.__cache_directory / f"{self._get_key(self.__input_file_key, asset)}{_LINK_SUFFIX}", sheet_key.encode("utf-8"))
+            LOGGER.debug("Parse cache hit for %s (asset rows unchanged)", asset)
+        return result
+
+    def store(self, asset: str, sheet_key: str, input_data: InputData) -> None:
+        self.__configuration.type_check_asset("asset", asset)
+        InputData.type_check("input_data", input_data)
+        transaction_sets: Tuple[TransactionSet, TransactionSet, TransactionSet] = (
+            input_data.unfiltered_in_transaction_set,
+            input_data.unfiltered_out_transaction_set,
+            input_data.unfiltered_intra_transaction_set,
+        )
+        self._write_atomically(self.__cache_directory / f"{sheet_key}{_ENTRY_SUFFIX}", zlib.compress(pickle.dumps(transaction_sets, pickle.HIGHEST_PROTOCOL)))
+        self._write_atomically(self.__cache_directory / f"{self._get_key(self.__input_file_key, asset)}{_LINK_SUFFIX}", sheet_key.encode("utf-8"))
+        self._evict()
+
+    # Returns the tax engine history of the previous run on the given asset with the given accounting methods, None if there is none
+    def load_engine_history(self, asset: str, accounting_methods_key: str) -> Optional[EngineHistory]:
+        self.__configuration.type_check_asset("asset", asset)
+        self.__configuration.type_check_string("accounting_methods_key", accounting_methods_key)
+        history_path: Path = self.__cache_directory / f"{self._get_key(accounting_methods_key, asset)}{_HISTORY_SUFFIX}"
+        try:
+            data: bytes = history_path.read_bytes()
+        except OSError:
+            return None
+        try:
+            # The cache directory is written only by RP2 itself, on behalf of the same user
+            result: EngineHistory = EngineHistory.type_check("history", cast(EngineHistory, pickle.loads(zlib.decompress(data))))  # nosec
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.warning("Discarding invalid engine history %s", history_path)
+            _unlink(history_path)
+            return None
+        _touch(history_path)
+        return result
+
+    def store_engine_history(self, asset: str, accounting_methods_key: str, history: EngineHistory) -> None:
+        self.__configuration.type_check_asset("asset", asset)
+        self.__configuration.type_check_string("accounting_methods_key", accounting_methods_key)
+        EngineHistory.type_check("history", history)
+        history_path: Path = self.__cache_directory / f"{self._get_key(accounting_methods_key, asset)}{_HISTORY_SUFFIX}"
+        self._write_atomically(history_path, zlib.compress(pickle.dumps(history, pickle.HIGHEST_PROTOCOL)))
+        self._evict()
+
+    def _get_key(self, key: str, asset: str) -> str:
+        return sha256(f"{self.__configuration_key}\0{key}\0{asset}".encode("utf-8")).hexdigest()
+
+    def _load_entry(self, asset: str, sheet_key: str) -> Optional[InputData]:
+        entry_path: Path = self.__cache_directory / f"{sheet_key}{_ENTRY_SUFFIX}"
+        try:
+            data: bytes = entry_path.read_bytes()
+        except OSError:
+            return None
+        try:
+            # The cache directory is written only by RP2 itself, on behalf of the same user
+            # InputData type-checks the transaction sets
+            transaction_sets: Tuple[TransactionSet, TransactionSet, TransactionSet] = cast(
+                Tuple[TransactionSet, TransactionSet, TransactionSet], pickle.loads(zlib.decompress(data))  # nosec
+            )
+            in_transaction_set, out_transaction_set, intra_transaction_set = transaction_sets
+            result: InputData = InputData(
+                asset,
+                in_transaction_set,
+                out_transaction_set,
+                intra_transaction_set,
+                self.__configuration.from_date,
+                self.__configuration.to_date,
+            )
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.warning("Discarding invalid parse cache entry %s", entry_path)
+            _unlink(entry_path)
+            return None
+        _touch(entry_path)
+        return result
+
+    # Write to a temporary file and rename it, so that concurrent readers (e.g. other --jobs workers) never see partially-written files
+    def _write_atomically(self, path: Path, data: bytes) -> None:
+        with NamedTemporaryFile(dir=self.__cache_directory, prefix=".", suffix=".tmp", delete=False) as temporary_file:
+            temporary_file.write(data)
+        os.replace(temporary_file.name, path)
+
+    # Remove least recently used files until the cache directory fits in max_size
+    def _evict(self) -> None:
+        files: List[Tuple[float, int, Path]] = []
+        total_size: int = 0
+        path: Path
+        for path in self.__cache_directory.iterdir():
+            if path.suffix not in {_ENTRY_SUFFIX, _LINK_SUFFIX, _HISTORY_SUFFIX}:
+                continue
+            try:
+                stat_result: os.stat_result = path.stat()
+            except OSError:
+                continue
+            files.append((stat_result.st_mtime, stat_result.st_size, path))
+            total_size += stat_result.st_size
+        if total_size <= self.__max_size:
+            return
+        files.sort()
+        size: int
+        for _, size, path in files:
+            if total_size <= self.__max_size:
+                break
+            _unlink(path)
+            total_size -= size
+
+
+def _hash_file(file_path: str) -> str:
+    hasher = sha256()
+    with open(file_path, "rb") as input_file:
+        for data in iter(lambda: input_file.read(_READ_BUFFER_SIZE), b""):
+            hasher.update(data)
+    return hasher.hexdigest()
+
+
+def _touch(path: Path) -> None:
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _unlink(path: Path) -> None:
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
@@ -12,51 +12,25 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Optional
-
 from rp2.abstract_accounting_method import (
     AbstractAccountingMethod,
-    AcquiredLotAndAmount,
-    AcquiredLotCandidates,
     AcquiredLotCandidatesOrder,
+    AcquiredLotIndexType,
 )
-from rp2.abstract_transaction import AbstractTransaction
 from rp2.in_transaction import InTransaction
 from rp2.rp2_decimal import ZERO, RP2Decimal
 
 
 # HIFO plugin. See https://www.investopedia.com/terms/h/hifo.asp
+# Acquired lots are kept in the HEAP index keyed on negated spot price (ties broken by chronological order), so that selecting the highest-in
+# lot costs O(log m) instead of a linear scan of all candidates. The selected lot is the same as with a scan: the oldest lot with the
+# highest spot price.
 class AccountingMethod(AbstractAccountingMethod):
-    def seek_non_exhausted_acquired_lot(
-        self,
-        lot_candidates: AcquiredLotCandidates,
-        taxable_event: Optional[AbstractTransaction],
-        taxable_event_amount: RP2Decimal,
-    ) -> Optional[AcquiredLotAndAmount]:
-        selected_acquired_lot_amount: RP2Decimal = ZERO
-        selected_acquired_lot: Optional[InTransaction] = None
-        acquired_lot: InTransaction
-        # This loop causes O(m*n) complexity, where m is the number of acquired lots and n in the number of taxable events. The taxable
-        # event loop is in the caller. Non-trivial optimizations are possible using different data structures but they need to be researched.
-        for acquired_lot in lot_candidates:
-            acquired_lot_amount: RP2Decimal = ZERO
-
-            if not lot_candidates.has_partial_amount(acquired_lot):
-                acquired_lot_amount = acquired_lot.crypto_in
-            elif lot_candidates.get_partial_amount(acquired_lot) > ZERO:
-                acquired_lot_amount = lot_candidates.get_partial_amount(acquired_lot)
-            else:
-                # The acquired lot has zero partial amount
-                continue
-
-            if selected_acquired_lot is None or selected_acquired_lot.spot_price < acquired_lot.spot_price:
-                selected_acquired_lot_amount = acquired_lot_amount
-                selected_acquired_lot = acquired_lot
+    def lot_index_type(self) -> AcquiredLotIndexType:
+        return AcquiredLotIndexType.HEAP
 
-        if selected_acquired_lot_amount > ZERO and selected_acquired_lot:
-            lot_candidates.clear_partial_amount(selected_acquired_lot)
-            return AcquiredLotAndAmount(acquired_lot=selected_acquired_lot, amount=selected_acquired_lot_amount)
-        return None
+    def heap_key(self, acquired_lot: InTransaction) -> RP2Decimal:
+        return ZERO - acquired_lot.spot_price
 
     def lot_candidates_order(self) -> AcquiredLotCandidatesOrder:
         return AcquiredLotCandidatesOrder.OLDER_TO_NEWER
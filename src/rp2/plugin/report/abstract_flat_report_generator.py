@@ -0,0 +1,341 @@
+# Copyright 2021 eprbell
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from datetime import date
+from enum import Enum
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional, cast
+
+from rp2.abstract_country import AbstractCountry
+from rp2.abstract_entry import AbstractEntry
+from rp2.abstract_report_generator import AbstractReportGenerator
+from rp2.abstract_transaction import AbstractTransaction
+from rp2.balance import Balance
+from rp2.computed_data import ComputedData, YearlyGainLoss
+from rp2.configuration import MIN_DATE, Configuration
+from rp2.gain_loss import GainLoss
+from rp2.in_transaction import InTransaction
+from rp2.intra_transaction import IntraTransaction
+from rp2.logger import LOGGER
+from rp2.out_transaction import OutTransaction
+from rp2.rp2_error import RP2TypeError
+
+
+class ColumnType(Enum):
+    BOOLEAN = "boolean"
+    DECIMAL = "decimal"
+    INTEGER = "integer"
+    STRING = "string"
+    TIMESTAMP = "timestamp"
+
+
+class Column(NamedTuple):
+    name: str
+    column_type: ColumnType
+
+
+# Writes the rows of one flat table to a file. Subclasses serialize rows as they are received (possibly buffering a bounded number of them).
+class AbstractTableWriter:
+    def __init__(self, output_file_path: Path, columns: List[Column]) -> None:
+        self.__output_file_path: Path = output_file_path
+        self.__columns: List[Column] = columns
+
+    @property
+    def output_file_path(self) -> Path:
+        return self.__output_file_path
+
+    @property
+    def columns(self) -> List[Column]:
+        return self.__columns
+
+    # Values are in column order: RP2Decimal for DECIMAL columns, timezone-aware datetime for TIMESTAMP ones. None means no value.
+    def write_row(self, values: List[Any]) -> None:
+        raise NotImplementedError("Abstract method: it must be implemented in the writer class")
+
+    def close(self) -> None:
+        raise NotImplementedError("Abstract method: it must be implemented in the writer class")
+
+
+_TRANSACTION_COLUMNS: List[Column] = [
+    Column("asset", ColumnType.STRING),
+    Column("internal_id", ColumnType.STRING),
+    Column("unique_id", ColumnType.STRING),
+    Column("timestamp", ColumnType.TIMESTAMP),
+    Column("transaction_type", ColumnType.STRING),
+    Column("spot_price", ColumnType.DECIMAL),
+]
+
+
+def _get_transaction_values(transaction: AbstractTransaction) -> List[Any]:
+    return [
+        transaction.asset,
+        transaction.internal_id,
+        transaction.unique_id,
+        transaction.timestamp,
+        transaction.transaction_type.value,
+        transaction.spot_price,
+    ]
+
+
+def _get_in_transaction_rows(computed_data: ComputedData) -> Iterator[List[Any]]:
+    entry: AbstractEntry
+    for entry in computed_data.in_transaction_set:
+        transaction: InTransaction = cast(InTransaction, entry)
+        yield _get_transaction_values(transaction) + [
+            transaction.exchange,
+            transaction.holder,
+            transaction.crypto_in,
+            transaction.crypto_fee,
+            transaction.fiat_in_no_fee,
+            transaction.fiat_in_with_fee,
+            transaction.fiat_fee,
+            transaction.is_taxable(),
+            transaction.notes,
+        ]
+
+
+def _get_out_transaction_rows(computed_data: ComputedData) -> Iterator[List[Any]]:
+    entry: AbstractEntry
+    for entry in computed_data.out_transaction_set:
+        transaction: OutTransaction = cast(OutTransaction, entry)
+        yield _get_transaction_values(transaction) + [
+            transaction.exchange,
+            transaction.holder,
+            transaction.crypto_out_no_fee,
+            transaction.crypto_fee,
+            transaction.crypto_out_with_fee,
+            transaction.fiat_out_no_fee,
+            transaction.fiat_fee,
+            transaction.fiat_out_with_fee,
+            transaction.is_taxable(),
+            transaction.notes,
+        ]
+
+
+def _get_intra_transaction_rows(computed_data: ComputedData) -> Iterator[List[Any]]:
+    entry: AbstractEntry
+    for entry in computed_data.intra_transaction_set:
+        transaction: IntraTransaction = cast(IntraTransaction, entry)
+        yield _get_transaction_values(transaction) + [
+            transaction.from_exchange,
+            transaction.from_holder,
+            transaction.to_exchange,
+            transaction.to_holder,
+            transaction.crypto_sent,
+            transaction.crypto_received,
+            transaction.crypto_fee,
+            transaction.fiat_fee,
+            transaction.is_taxable(),
+            transaction.notes,
+        ]
+
+
+def _get_gain_loss_rows(computed_data: ComputedData) -> Iterator[List[Any]]:
+    entry: AbstractEntry
+    for entry in computed_data.gain_loss_set:
+        gain_loss: GainLoss = cast(GainLoss, entry)
+        yield [
+            gain_loss.asset,
+            gain_loss.internal_id,
+            gain_loss.timestamp,
+            gain_loss.crypto_amount,
+            gain_loss.taxable_event.internal_id,
+            gain_loss.taxable_event.transaction_type.value,
+            gain_loss.taxable_event_fiat_amount_with_fee_fraction,
+            gain_loss.taxable_event_fraction_percentage,
+            gain_loss.acquired_lot.internal_id if gain_loss.acquired_lot else None,
+            gain_loss.acquired_lot.timestamp if gain_loss.acquired_lot else None,
+            gain_loss.acquired_lot_fiat_amount_with_fee_fraction,
+            gain_loss.acquired_lot_fraction_percentage,
+            gain_loss.fiat_cost_basis,
+            gain_loss.fiat_gain,
+            gain_loss.is_long_term_capital_gains(),
+        ]
+
+
+def _get_yearly_gain_loss_rows(computed_data: ComputedData) -> Iterator[List[Any]]:
+    yearly_gain_loss: YearlyGainLoss
+    for yearly_gain_loss in computed_data.yearly_gain_loss_list:
+        yield [
+            yearly_gain_loss.asset,
+            yearly_gain_loss.year,
+            yearly_gain_loss.transaction_type.value,
+            yearly_gain_loss.is_long_term_capital_gains,
+            yearly_gain_loss.crypto_amount,
+            yearly_gain_loss.fiat_amount,
+            yearly_gain_loss.fiat_cost_basis,
+            yearly_gain_loss.fiat_gain_loss,
+        ]
+
+
+def _get_balance_rows(computed_data: ComputedData) -> Iterator[List[Any]]:
+    balance: Balance
+    for balance in computed_data.balance_set:
+        yield [
+            balance.asset,
+            balance.exchange,
+            balance.holder,
+            balance.acquired_balance,
+            balance.sent_balance,
+            balance.received_balance,
+            balance.final_balance,
+        ]
+
+
+class _Table(NamedTuple):
+    columns: List[Column]
+    # Returns the rows of an asset: they are produced lazily, while the sets of ComputedData are iterated
+    get_rows: Callable[[ComputedData], Iterator[List[Any]]]
+
+
+_TABLES: Dict[str, _Table] = {
+    "in_transactions": _Table(
+        _TRANSACTION_COLUMNS
+        + [
+            Column("exchange", ColumnType.STRING),
+            Column("holder", ColumnType.STRING),
+            Column("crypto_in", ColumnType.DECIMAL),
+            Column("crypto_fee", ColumnType.DECIMAL),
+            Column("fiat_in_no_fee", ColumnType.DECIMAL),
+            Column("fiat_in_with_fee", ColumnType.DECIMAL),
+            Column("fiat_fee", ColumnType.DECIMAL),
+            Column("is_taxable", ColumnType.BOOLEAN),
+            Column("notes", ColumnType.STRING),
+        ],
+        _get_in_transaction_rows,
+    ),
+    "out_transactions": _Table(
+        _TRANSACTION_COLUMNS
+        + [
+            Column("exchange", ColumnType.STRING),
+            Column("holder", ColumnType.STRING),
+            Column("crypto_out_no_fee", ColumnType.DECIMAL),
+            Column("crypto_fee", ColumnType.DECIMAL),
+            Column("crypto_out_with_fee", ColumnType.DECIMAL),
+            Column("fiat_out_no_fee", ColumnType.DECIMAL),
+            Column("fiat_fee", ColumnType.DECIMAL),
+            Column("fiat_out_with_fee", ColumnType.DECIMAL),
+            Column("is_taxable", ColumnType.BOOLEAN),
+            Column("notes", ColumnType.STRING),
+        ],
+        _get_out_transaction_rows,
+    ),
+    "intra_transactions": _Table(
+        _TRANSACTION_COLUMNS
+        + [
+            Column("from_exchange", ColumnType.STRING),
+            Column("from_holder", ColumnType.STRING),
+            Column("to_exchange", ColumnType.STRING),
+            Column("to_holder", ColumnType.STRING),
+            Column("crypto_sent", ColumnType.DECIMAL),
+            Column("crypto_received", ColumnType.DECIMAL),
+            Column("crypto_fee", ColumnType.DECIMAL),
+            Column("fiat_fee", ColumnType.DECIMAL),
+            Column("is_taxable", ColumnType.BOOLEAN),
+            Column("notes", ColumnType.STRING),
+        ],
+        _get_intra_transaction_rows,
+    ),
+    "gain_loss": _Table(
+        [
+            Column("asset", ColumnType.STRING),
+            Column("internal_id", ColumnType.STRING),
+            Column("timestamp", ColumnType.TIMESTAMP),
+            Column("crypto_amount", ColumnType.DECIMAL),
+            Column("taxable_event_internal_id", ColumnType.STRING),
+            Column("taxable_event_type", ColumnType.STRING),
+            Column("taxable_event_fiat_amount_with_fee_fraction", ColumnType.DECIMAL),
+            Column("taxable_event_fraction_percentage", ColumnType.DECIMAL),
+            Column("acquired_lot_internal_id", ColumnType.STRING),
+            Column("acquired_lot_timestamp", ColumnType.TIMESTAMP),
+            Column("acquired_lot_fiat_amount_with_fee_fraction", ColumnType.DECIMAL),
+            Column("acquired_lot_fraction_percentage", ColumnType.DECIMAL),
+            Column("fiat_cost_basis", ColumnType.DECIMAL),
+            Column("fiat_gain", ColumnType.DECIMAL),
+            Column("is_long_term_capital_gains", ColumnType.BOOLEAN),
+        ],
+        _get_gain_loss_rows,
+    ),
+    "yearly_gain_loss": _Table(
+        [
+            Column("asset", ColumnType.STRING),
+            Column("year", ColumnType.INTEGER),
+            Column("transaction_type", ColumnType.STRING),
+            Column("is_long_term_capital_gains", ColumnType.BOOLEAN),
+            Column("crypto_amount", ColumnType.DECIMAL),
+            Column("fiat_amount", ColumnType.DECIMAL),
+            Column("fiat_cost_basis", ColumnType.DECIMAL),
+            Column("fiat_gain_loss", ColumnType.DECIMAL),
+        ],
+        _get_yearly_gain_loss_rows,
+    ),
+    "balances": _Table(
+        [
+            Column("asset", ColumnType.STRING),
+            Column("exchange", ColumnType.STRING),
+            Column("holder", ColumnType.STRING),
+            Column("acquired_balance", ColumnType.DECIMAL),
+            Column("sent_balance", ColumnType.DECIMAL),
+            Column("received_balance", ColumnType.DECIMAL),
+            Column("final_balance", ColumnType.DECIMAL),
+        ],
+        _get_balance_rows,
+    ),
+}
+
+
+# Generates machine-readable flat tables (one file per table, containing the rows of all assets) instead of a spreadsheet: rows are written as
+# the sets of ComputedData are iterated, so no document is built in memory. Subclasses only choose the file format.
+class AbstractFlatReportGenerator(AbstractReportGenerator):
+    # File extension, including the dot
+    def _get_file_extension(self) -> str:
+        raise NotImplementedError("Abstract method: it must be implemented in the plugin class")
+
+    def _create_table_writer(self, output_file_path: Path, columns: List[Column]) -> AbstractTableWriter:
+        raise NotImplementedError("Abstract method: it must be implemented in the plugin class")
+
+    def generate(
+        self,
+        country: AbstractCountry,
+        years_2_accounting_method_names: Dict[int, str],
+        asset_to_computed_data: Dict[str, ComputedData],
+        output_dir_path: str,
+        output_file_prefix: str,
+        from_date: date,
+        to_date: date,
+        generation_language: str,
+    ) -> None:
+        if not isinstance(asset_to_computed_data, Dict):
+            raise RP2TypeError(f"Parameter 'asset_to_computed_data' has non-Dict value {asset_to_computed_data}")
+        Configuration.type_check_string("output_dir_path", output_dir_path)
+        Configuration.type_check_string("output_file_prefix", output_file_prefix)
+
+        accounting_method: str = years_2_accounting_method_names[MIN_DATE.year] if len(years_2_accounting_method_names) == 1 else "mixed"
+        table_name: str
+        table: _Table
+        for table_name, table in _TABLES.items():
+            output_file_path: Path = Path(output_dir_path) / Path(f"{output_file_prefix}{accounting_method}_{table_name}{self._get_file_extension()}")
+            writer: Optional[AbstractTableWriter] = None
+            try:
+                writer = self._create_table_writer(output_file_path, table.columns)
+                computed_data: ComputedData
+                for computed_data in asset_to_computed_data.values():
+                    ComputedData.type_check("computed_data", computed_data)
+                    row: List[Any]
+                    for row in table.get_rows(computed_data):
+                        writer.write_row(row)
+            finally:
+                if writer is not None:
+                    writer.close()
+            LOGGER.info("Plugin '%s' output: %s", self.__module__, output_file_path.resolve())
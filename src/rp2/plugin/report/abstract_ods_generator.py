@@ -27,6 +27,7 @@ from rp2.configuration import MAX_DATE, MIN_DATE, Configuration
 from rp2.in_transaction import InTransaction
 from rp2.localization import _
 from rp2.out_transaction import OutTransaction
+from rp2.plugin.report.ods_stream_writer import ODSStreamSheet
 from rp2.rp2_decimal import RP2Decimal
 from rp2.rp2_error import RP2RuntimeError, RP2TypeError
 
@@ -154,6 +155,9 @@ class AbstractODSGenerator(AbstractReportGenerator):
         Configuration.type_check_positive_int("column_index", column_index)
         Configuration.type_check_string("style_name", style_name)
 
+        if isinstance(sheet, ODSStreamSheet):
+            sheet.set_style(row_index, column_index, style_name)
+            return
         sheet[row_index, column_index].style_name = style_name
 
     @classmethod
@@ -179,6 +183,9 @@ class AbstractODSGenerator(AbstractReportGenerator):
         if isinstance(value, RP2Decimal):
             # The ezodf API doesn't accept RP2Decimal, so we are forced to cast to float before writing to the spreadsheet
             value = float(value)
+        if isinstance(sheet, ODSStreamSheet):
+            sheet.write_cell(row_index, column_index, value, is_formula, style_name if apply_style else None)
+            return
         if is_formula:
             sheet[row_index, column_index].formula = value
         else:
@@ -186,6 +193,20 @@ class AbstractODSGenerator(AbstractReportGenerator):
         if apply_style:
             cls._apply_style_to_cell(sheet=sheet, row_index=row_index, column_index=column_index, style_name=style_name)
 
+    # Row-oriented alternative to _fill_cell() for stream sheets: styles are full style names (e.g. "transparent_fiat"). None values leave the
+    # corresponding cell value untouched and None styles leave the cell style untouched.
+    @staticmethod
+    def _write_row(sheet: ODSStreamSheet, row_index: int, values: List[Any], styles: List[Optional[str]]) -> None:
+        if not isinstance(sheet, ODSStreamSheet):
+            raise RP2TypeError(f"Parameter 'sheet' is not of type ODSStreamSheet: {sheet}")
+        Configuration.type_check_positive_int("row_index", row_index)
+        if not isinstance(values, List):
+            raise RP2TypeError("Parameter 'values' is not a List")
+        if not isinstance(styles, List):
+            raise RP2TypeError("Parameter 'styles' is not a List")
+
+        sheet.write_row(row_index, [float(value) if isinstance(value, RP2Decimal) else value for value in values], styles)
+
     def _fill_header(
         self, title: str, header_row_1: List[str], header_row_2: List[str], sheet: Any, row_index: int, column_index: int, apply_style: bool = True
     ) -> int:
@@ -0,0 +1,62 @@
+# Copyright 2022 mdavid217
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import csv
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any, List
+
+from rp2.plugin.report.abstract_flat_report_generator import (
+    AbstractFlatReportGenerator,
+    AbstractTableWriter,
+    Column,
+)
+from rp2.rp2_decimal import RP2Decimal
+
+
+# CSV file with a header row. Decimals are written in positional notation with full precision, timestamps in ISO 8601 format, booleans as
+# true/false and missing values as empty cells.
+class _CSVTableWriter(AbstractTableWriter):
+    def __init__(self, output_file_path: Path, columns: List[Column]) -> None:
+        super().__init__(output_file_path, columns)
+        self.__output_file: IO[str] = open(output_file_path, "w", encoding="utf-8", newline="")  # pylint: disable=consider-using-with
+        self.__writer: Any = csv.writer(self.__output_file)
+        self.__writer.writerow([column.name for column in columns])
+
+    def write_row(self, values: List[Any]) -> None:
+        self.__writer.writerow([_format_value(value) for value in values])
+
+    def close(self) -> None:
+        self.__output_file.close()
+
+
+def _format_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, RP2Decimal):
+        return f"{value:f}"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class Generator(AbstractFlatReportGenerator):
+    def _get_file_extension(self) -> str:
+        return ".csv"
+
+    def _create_table_writer(self, output_file_path: Path, columns: List[Column]) -> AbstractTableWriter:
+        return _CSVTableWriter(output_file_path, columns)
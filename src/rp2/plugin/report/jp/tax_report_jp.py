@@ -31,6 +31,7 @@ from rp2.localization import _
 from rp2.logger import create_logger
 from rp2.out_transaction import OutTransaction
 from rp2.plugin.report.abstract_ods_generator import AbstractODSGenerator
+from rp2.plugin.report.ods_stream_writer import ODSStreamSheet, ODSStreamWriter
 from rp2.rp2_decimal import ZERO, RP2Decimal
 from rp2.rp2_error import RP2RuntimeError, RP2TypeError
 from rp2.transaction_set import TransactionSet
@@ -58,6 +59,27 @@ class _SheetNames(Enum):
 
 
 _TEMPLATE_SHEETS_TO_KEEP: Set[str] = {f"__{item.value}" for item in _SheetNames}
+# Styles of the transaction rows of asset sheets and of the asset rows of summary sheets
+_TRANSACTION_ROW_STYLES: List[Optional[str]] = [
+    "transactions_month",
+    "transactions_day",
+    "transactions_middle",
+    "transactions_middle",
+    "transactions_crypto",
+    "transactions_yen",
+    "transactions_crypto",
+    "transactions_yen",
+    "transactions_right_end",
+]
+_SUMMARY_ROW_STYLES: List[Optional[str]] = [
+    "transactions_left_end",
+    "transactions_middle",
+    "transactions_middle",
+    "transactions_middle",
+    "transactions_crypto",
+    "transactions_yen",
+    "transactions_right_end",
+]
 _INCOME_TRANSACTION_TYPES: Dict[TransactionType, None] = {
     TransactionType.AIRDROP: None,
     TransactionType.HARDFORK: None,
@@ -83,7 +105,8 @@ class Generator(AbstractODSGenerator):
     def __init__(self) -> None:
         super().__init__()
         self.__year_row_offset: Dict[int, int] = {}
-        self.__number_of_summaries: int = 0
+        self.__year_2_summary_sheet: Dict[int, ODSStreamSheet] = {}
+        self.__year_2_summary_row_count: Dict[int, int] = {}
 
     def generate(
         self,
@@ -118,43 +141,37 @@ class Generator(AbstractODSGenerator):
             to_date=to_date,
         )
 
+        writer: ODSStreamWriter = ODSStreamWriter(output_file)
         asset: str
         computed_data: ComputedData
+        year: int
+        asset_2_years_2_transactions: Dict[str, Dict[int, List[AbstractTransaction]]] = {}
 
         for asset, computed_data in asset_to_computed_data.items():
             if not isinstance(asset, str):
                 raise RP2TypeError(f"Parameter 'asset' has non-string value {asset}")
             ComputedData.type_check("computed_data", computed_data)
-            self.__generate_asset(computed_data, output_file)
+            asset_2_years_2_transactions[asset] = self.__get_years_2_transactions(computed_data)
+            # Each asset has a row in the summary of every year it has transactions in: rows are counted up front, so that they can be inserted
+            # into summary sheets all at once
+            for year in asset_2_years_2_transactions[asset]:
+                self.__year_2_summary_row_count[year] = self.__year_2_summary_row_count.get(year, 0) + 1
+
+        years_2_transactions: Dict[int, List[AbstractTransaction]]
+        for asset, years_2_transactions in asset_2_years_2_transactions.items():
+            self.__generate_asset(asset, years_2_transactions, writer)
+
+        # Totals at the bottom of summaries are filled last, because they follow all asset rows
+        summary_sheet: ODSStreamSheet
+        for year, summary_sheet in self.__year_2_summary_sheet.items():
+            self.__fill_summary_totals(summary_sheet, self.__year_row_offset[year])
 
         del output_file.sheets[self.ASSET_TEMPLATE_SHEET]
         del output_file.sheets[self.SUMMARY_TEMPLATE_SHEET]
 
-        output_file.save()
+        writer.save()
         LOGGER.info("Plugin '%s' output: %s", __name__, Path(output_file.docname).resolve())
 
-    def __insert_secondary_transaction_row(self, sheet_name: Any, row: int) -> None:
-        sheet_name.insert_rows(index=row, count=1)
-        sheet_name[f"A{row + 1}"].style_name = "transactions_month"
-        sheet_name[f"B{row + 1}"].style_name = "transactions_day"
-        sheet_name[f"C{row + 1}"].style_name = "transactions_middle"
-        sheet_name[f"D{row + 1}"].style_name = "transactions_middle"
-        sheet_name[f"E{row + 1}"].style_name = "transactions_crypto"
-        sheet_name[f"F{row + 1}"].style_name = "transactions_yen"
-        sheet_name[f"G{row + 1}"].style_name = "transactions_crypto"
-        sheet_name[f"H{row + 1}"].style_name = "transactions_yen"
-        sheet_name[f"I{row + 1}"].style_name = "transactions_right_end"
-
-    def __insert_summary_row(self, sheet_name: Any, row: int) -> None:
-        sheet_name.insert_rows(index=row, count=1)
-        sheet_name[f"A{row + 1}"].style_name = "transactions_left_end"
-        sheet_name[f"B{row + 1}"].style_name = "transactions_middle"
-        sheet_name[f"C{row + 1}"].style_name = "transactions_middle"
-        sheet_name[f"D{row + 1}"].style_name = "transactions_middle"
-        sheet_name[f"E{row + 1}"].style_name = "transactions_crypto"
-        sheet_name[f"F{row + 1}"].style_name = "transactions_yen"
-        sheet_name[f"G{row + 1}"].style_name = "transactions_right_end"
-
     @staticmethod
     def get_tax_sheet_name(asset: str, year: int) -> str:
         return _("{}_{}").format(asset, year)
@@ -163,43 +180,46 @@ class Generator(AbstractODSGenerator):
     def get_summary_sheet_name(year: int) -> str:
         return _("{}_Summary").format(year)
 
-    def __generate_asset(self, computed_data: ComputedData, output_file: Any) -> None:
-        asset: str = computed_data.asset
-
+    @staticmethod
+    def __get_years_2_transactions(computed_data: ComputedData) -> Dict[int, List[AbstractTransaction]]:
         in_transaction_set: TransactionSet = computed_data.in_transaction_set
         out_transaction_set: TransactionSet = computed_data.out_transaction_set
         intra_transaction_set: TransactionSet = computed_data.intra_transaction_set
         entry: AbstractEntry
-        year: int
-        years_2_transaction_sets: Dict[int, List[AbstractTransaction]] = {}
-        previous_year_row_offset: int = 0
+        years_2_transactions: Dict[int, List[AbstractTransaction]] = {}
 
         # Sort all in and out transactions by year, the fee from intra transactions must be reported
         for entry in chain(in_transaction_set, out_transaction_set, intra_transaction_set):  # type: ignore
             transaction: AbstractTransaction = cast(AbstractTransaction, entry)
-            years_2_transaction_sets.setdefault(transaction.timestamp.year, []).append(entry)
+            years_2_transactions.setdefault(transaction.timestamp.year, []).append(transaction)
 
-        for year, transaction_set in years_2_transaction_sets.items():
+        return years_2_transactions
+
+    def __generate_asset(self, asset: str, years_2_transactions: Dict[int, List[AbstractTransaction]], writer: ODSStreamWriter) -> None:
+        year: int
+        transaction_list: List[AbstractTransaction]
+        previous_year_row_offset: int = 0
+
+        for year, transaction_list in years_2_transactions.items():
             # Sort the transactions by timestamp and generate sheet by year
             previous_year_row_offset = self.__generate_asset_year(
                 asset=asset,
                 year=year,
-                transaction_list=sorted(transaction_set, key=lambda x: x.timestamp),
-                output_file=output_file,
+                transaction_list=sorted(transaction_list, key=lambda x: x.timestamp),
+                writer=writer,
                 previous_year_row_offset=previous_year_row_offset,
             )
 
-            summary_sheet: Any = output_file.sheets[self.get_summary_sheet_name(year)]
-
-            ### Totals at the bottom
-            # Amount Donated
-            self._fill_cell(summary_sheet, self.__year_row_offset[year] + 2, 1, f"=SUM(B8:B{self.__year_row_offset[year] + 2})", apply_style=False)
-            # Gift Received
-            self._fill_cell(summary_sheet, self.__year_row_offset[year] + 2, 2, f"=SUM(C8:C{self.__year_row_offset[year] + 2})", apply_style=False)
-            # Total Amount in yen
-            self._fill_cell(summary_sheet, self.__year_row_offset[year] + 2, 5, f"=SUM(F8:F{self.__year_row_offset[year] + 2})", apply_style=False)
-            # Net Income Amt
-            self._fill_cell(summary_sheet, self.__year_row_offset[year] + 2, 6, f"=SUM(G8:G{self.__year_row_offset[year] + 2})", apply_style=False)
+    def __fill_summary_totals(self, summary_sheet: ODSStreamSheet, row_offset: int) -> None:
+        ### Totals at the bottom
+        # Amount Donated
+        self._fill_cell(summary_sheet, row_offset + 2, 1, f"=SUM(B8:B{row_offset + 2})", apply_style=False)
+        # Gift Received
+        self._fill_cell(summary_sheet, row_offset + 2, 2, f"=SUM(C8:C{row_offset + 2})", apply_style=False)
+        # Total Amount in yen
+        self._fill_cell(summary_sheet, row_offset + 2, 5, f"=SUM(F8:F{row_offset + 2})", apply_style=False)
+        # Net Income Amt
+        self._fill_cell(summary_sheet, row_offset + 2, 6, f"=SUM(G8:G{row_offset + 2})", apply_style=False)
 
     def __process_in_transaction(self, transaction: InTransaction) -> _TransactionRow:
         purchase_amount_in_yen: RP2Decimal = transaction.crypto_in * transaction.spot_price
@@ -282,9 +302,13 @@ class Generator(AbstractODSGenerator):
             donated_amount_in_yen=donated_amount_in_yen,
         )
 
-    def __generate_asset_year(self, asset: str, year: int, transaction_list: List[AbstractTransaction], output_file: Any, previous_year_row_offset: int) -> int:
-        asset_year_sheet: Any = output_file.sheets[self.ASSET_TEMPLATE_SHEET].copy(newname=self.get_tax_sheet_name(asset, year))
-        output_file.sheets += asset_year_sheet
+    def __generate_asset_year(
+        self, asset: str, year: int, transaction_list: List[AbstractTransaction], writer: ODSStreamWriter, previous_year_row_offset: int
+    ) -> int:
+        output_file: Any = writer.output_file
+        template_sheet: Any = output_file.sheets[self.ASSET_TEMPLATE_SHEET].copy(newname=self.get_tax_sheet_name(asset, year))
+        output_file.sheets += template_sheet
+        asset_year_sheet: ODSStreamSheet = writer.get_stream_sheet(template_sheet)
 
         # Label the asset at the top of the page
         self._fill_cell(asset_year_sheet, 1, 7, asset, apply_style=False)
@@ -293,6 +317,8 @@ class Generator(AbstractODSGenerator):
         total_gifts: RP2Decimal = ZERO
         formatted_donation_amount: Optional[str] = None
         transaction_row: _TransactionRow
+        # Rows are collected first, so that they can be inserted into the sheet all at once
+        rows: List[List[Any]] = []
 
         for entry in transaction_list:
             if isinstance(entry, InTransaction):
@@ -314,27 +340,31 @@ class Generator(AbstractODSGenerator):
             if transaction_row.purchase_crypto_amount is None and transaction_row.sales_crypto_amount is None:
                 continue
 
-            self.__insert_secondary_transaction_row(asset_year_sheet, row_index)
-            self._fill_cell(asset_year_sheet, row_index, 0, transaction_row.transaction_month, apply_style=False)
-            self._fill_cell(asset_year_sheet, row_index, 1, transaction_row.transaction_day, apply_style=False)
-            self._fill_cell(asset_year_sheet, row_index, 2, transaction_row.transaction_client, apply_style=False)
-            self._fill_cell(asset_year_sheet, row_index, 3, transaction_row.transaction_type, apply_style=False)
-            if transaction_row.purchase_crypto_amount is not None:
-                self._fill_cell(asset_year_sheet, row_index, 4, transaction_row.purchase_crypto_amount, apply_style=False)
-                self._fill_cell(asset_year_sheet, row_index, 5, transaction_row.purchase_amount_in_yen, apply_style=False)
-            if transaction_row.sales_crypto_amount is not None:
-                self._fill_cell(asset_year_sheet, row_index, 6, transaction_row.sales_crypto_amount, apply_style=False)
-                self._fill_cell(
-                    asset_year_sheet,
-                    row_index,
-                    7,
-                    transaction_row.sales_amount_in_yen if formatted_donation_amount is None else formatted_donation_amount,
-                    apply_style=False,
-                )
-            self._fill_cell(asset_year_sheet, row_index, 8, transaction_row.fee_in_yen, apply_style=False)
+            # None values leave the cell empty
+            rows.append(
+                [
+                    transaction_row.transaction_month,
+                    transaction_row.transaction_day,
+                    transaction_row.transaction_client,
+                    transaction_row.transaction_type,
+                    transaction_row.purchase_crypto_amount,
+                    transaction_row.purchase_amount_in_yen if transaction_row.purchase_crypto_amount is not None else None,
+                    transaction_row.sales_crypto_amount,
+                    (
+                        (transaction_row.sales_amount_in_yen if formatted_donation_amount is None else formatted_donation_amount)
+                        if transaction_row.sales_crypto_amount is not None
+                        else None
+                    ),
+                    transaction_row.fee_in_yen,
+                ]
+            )
+            formatted_donation_amount = None
 
+        asset_year_sheet.insert_rows(index=row_index, count=len(rows))
+        row: List[Any]
+        for row in rows:
+            self._write_row(asset_year_sheet, row_index, row, _TRANSACTION_ROW_STYLES)
             row_index += 1
-            formatted_donation_amount = None
 
         # Adding the summary formulas at the bottom
         self._fill_cell(asset_year_sheet, row_index + 2, 4, f"=IF(SUM(E22:E{row_index+2})=0;0;SUM(E22:E{row_index+2}))", apply_style=False)
@@ -411,32 +441,38 @@ class Generator(AbstractODSGenerator):
         self._fill_cell(asset_year_sheet, row_index + 20, 8, f"=ROUNDUP(SUM(F{row_index+18}:H{row_index+18});0)", apply_style=False)
 
         ### Add to Summary
-        year_summary_sheet: Any
-        # If this is the first time we have checked the year offset, set it to 7 and create a new summary sheet
-        if self.__year_row_offset.setdefault(year, 7) == 7:
-            year_summary_sheet = output_file.sheets[self.SUMMARY_TEMPLATE_SHEET].copy(newname=self.get_summary_sheet_name(year))
+        year_summary_sheet: Optional[ODSStreamSheet] = self.__year_2_summary_sheet.get(year)
+        # If this is the first asset with transactions in this year, create a new summary sheet with rows for all such assets
+        if year_summary_sheet is None:
+            summary_template_sheet: Any = output_file.sheets[self.SUMMARY_TEMPLATE_SHEET].copy(newname=self.get_summary_sheet_name(year))
             # Place summaries at the beginning so they are easy to find
-            output_file.sheets.insert(2 + self.__number_of_summaries, year_summary_sheet)
-            self.__number_of_summaries += 1
-        else:
-            year_summary_sheet = output_file.sheets[self.get_summary_sheet_name(year)]
-
-        self.__insert_summary_row(year_summary_sheet, self.__year_row_offset[year])
-
-        # Name of Asset
-        self._fill_cell(year_summary_sheet, self.__year_row_offset[year], 0, asset, apply_style=False)
-        # Total Donations
-        self._fill_cell(year_summary_sheet, self.__year_row_offset[year], 1, total_donations, apply_style=False)
-        # Total Gifts
-        self._fill_cell(year_summary_sheet, self.__year_row_offset[year], 2, total_gifts, apply_style=False)
-        # Formula for Avg. Unit Price
-        self._fill_cell(year_summary_sheet, self.__year_row_offset[year], 3, f"='{self.get_tax_sheet_name(asset, year)}'.G{row_index+10}", apply_style=False)
-        # Formula for End Balance Crypto
-        self._fill_cell(year_summary_sheet, self.__year_row_offset[year], 4, f"='{self.get_tax_sheet_name(asset, year)}'.I{row_index+9}", apply_style=False)
-        # Formula for End Balance Yen
-        self._fill_cell(year_summary_sheet, self.__year_row_offset[year], 5, f"='{self.get_tax_sheet_name(asset, year)}'.I{row_index+10}", apply_style=False)
-        # Formula for Net Income Amt
-        self._fill_cell(year_summary_sheet, self.__year_row_offset[year], 6, f"='{self.get_tax_sheet_name(asset, year)}'.I{row_index+18}", apply_style=False)
+            output_file.sheets.insert(2 + len(self.__year_2_summary_sheet), summary_template_sheet)
+            year_summary_sheet = writer.get_stream_sheet(summary_template_sheet)
+            self.__year_2_summary_sheet[year] = year_summary_sheet
+            self.__year_row_offset[year] = 7
+            year_summary_sheet.insert_rows(index=7, count=self.__year_2_summary_row_count[year])
+
+        self._write_row(
+            year_summary_sheet,
+            self.__year_row_offset[year],
+            [
+                # Name of Asset
+                asset,
+                # Total Donations
+                total_donations,
+                # Total Gifts
+                total_gifts,
+                # Formula for Avg. Unit Price
+                f"='{self.get_tax_sheet_name(asset, year)}'.G{row_index+10}",
+                # Formula for End Balance Crypto
+                f"='{self.get_tax_sheet_name(asset, year)}'.I{row_index+9}",
+                # Formula for End Balance Yen
+                f"='{self.get_tax_sheet_name(asset, year)}'.I{row_index+10}",
+                # Formula for Net Income Amt
+                f"='{self.get_tax_sheet_name(asset, year)}'.I{row_index+18}",
+            ],
+            _SUMMARY_ROW_STYLES,
+        )
 
         self.__year_row_offset[year] += 1
 
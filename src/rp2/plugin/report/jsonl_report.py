@@ -0,0 +1,58 @@
+# Copyright 2022 mdavid217
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any, List
+
+from rp2.plugin.report.abstract_flat_report_generator import (
+    AbstractFlatReportGenerator,
+    AbstractTableWriter,
+    Column,
+)
+from rp2.rp2_decimal import RP2Decimal
+
+
+# JSONL file: one JSON object per row, keyed by column name. Decimals are written as JSON numbers in positional notation with full precision
+# (they are not converted to float), timestamps as ISO 8601 strings and missing values as null.
+class _JSONLTableWriter(AbstractTableWriter):
+    def __init__(self, output_file_path: Path, columns: List[Column]) -> None:
+        super().__init__(output_file_path, columns)
+        self.__output_file: IO[str] = open(output_file_path, "w", encoding="utf-8")  # pylint: disable=consider-using-with
+        # Keys are serialized once: each line only joins them with the serialized values
+        self.__keys: List[str] = [f"{json.dumps(column.name)}: " for column in columns]
+
+    def write_row(self, values: List[Any]) -> None:
+        self.__output_file.write(f"{{{', '.join(key + _format_value(value) for key, value in zip(self.__keys, values))}}}\n")
+
+    def close(self) -> None:
+        self.__output_file.close()
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, RP2Decimal):
+        return f"{value:f}"
+    if isinstance(value, datetime):
+        return json.dumps(value.isoformat())
+    return json.dumps(value, ensure_ascii=False)
+
+
+class Generator(AbstractFlatReportGenerator):
+    def _get_file_extension(self) -> str:
+        return ".jsonl"
+
+    def _create_table_writer(self, output_file_path: Path, columns: List[Column]) -> AbstractTableWriter:
+        return _JSONLTableWriter(output_file_path, columns)
@@ -0,0 +1,383 @@
+# Copyright 2021 eprbell
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import re
+from pathlib import Path
+from tempfile import NamedTemporaryFile, TemporaryDirectory
+from typing import IO, Any, Dict, List, Optional, Pattern, Set
+from xml.sax.saxutils import escape  # nosec
+from zipfile import ZIP_DEFLATED, ZipFile
+
+import ezodf
+from ezodf.xmlns import wrap
+from lxml import etree  # nosec
+
+from rp2.rp2_error import RP2RuntimeError, RP2TypeError, RP2ValueError
+
+_CONTENT_FILE: str = "content.xml"
+
+_TABLE_NAMESPACE: str = "urn:oasis:names:tc:opendocument:xmlns:table:1.0"
+_TABLE_ROW_TAG: str = f"{{{_TABLE_NAMESPACE}}}table-row"
+_TABLE_CELL_TAG: str = f"{{{_TABLE_NAMESPACE}}}table-cell"
+_TABLE_CELL_TAGS: Set[str] = {_TABLE_CELL_TAG, f"{{{_TABLE_NAMESPACE}}}covered-table-cell"}
+_TABLE_COLUMN_TAGS: Set[str] = {
+    f"{{{_TABLE_NAMESPACE}}}table-column",
+    f"{{{_TABLE_NAMESPACE}}}table-columns",
+    f"{{{_TABLE_NAMESPACE}}}table-header-columns",
+    f"{{{_TABLE_NAMESPACE}}}table-column-group",
+}
+
+# Rows more than this many rows before the last written one are serialized and can no longer be modified
+_PENDING_ROW_WINDOW: int = 64
+# Serialized rows are kept in memory up to this many characters, then appended to the sheet's temporary file
+_BUFFER_SIZE: int = 1024 * 1024
+_COPY_CHUNK_SIZE: int = 1024 * 1024
+
+_MARKER_PREFIX: str = "rp2-stream-sheet-"
+_MARKER: Pattern[str] = re.compile(f"<!--({_MARKER_PREFIX}[0-9]+)-->")
+_NAMESPACE_DECLARATION: Pattern[str] = re.compile(r' xmlns(?::[\w.-]+)?="[^"]*"')
+_WHITESPACE: Pattern[str] = re.compile(r"( {2,})|(\t)|(\n)")
+
+_NO_VALUE: Any = object()
+
+
+class _PendingCell:
+    def __init__(self) -> None:
+        self.value: Any = _NO_VALUE
+        self.formula: Optional[str] = None
+        self.style_name: Optional[str] = None
+
+
+# Sheet whose rows are written sequentially and serialized as soon as they are complete, instead of being kept in the ezodf DOM: memory usage
+# doesn't depend on the number of rows. Rows that are already in the table when the sheet is created (e.g. the header of a template sheet) are
+# kept as background: cells written on them are applied on top of the template cells, so template styles are preserved. Rows can be written
+# in any order, as long as they are not more than _PENDING_ROW_WINDOW rows before the last written row.
+class ODSStreamSheet:
+    def __init__(self, table: Any, column_count: int, file_path: Path) -> None:
+        self.__table: Any = table
+        self.__column_count: int = max(column_count, table.ncols())
+        self.__file_path: Path = file_path
+        self.__background_rows: List[List[Any]] = []
+        row_index: int = 0
+        row: Any
+        for row in [child for child in table.xmlnode if child.tag == _TABLE_ROW_TAG]:
+            table.xmlnode.remove(row)
+            self.__background_rows.append([row_index, row])
+            row_index += 1
+        self.__pending_rows: Dict[int, Dict[int, _PendingCell]] = {}
+        self.__next_row_index: int = 0
+        self.__buffer: List[str] = []
+        self.__buffer_size: int = 0
+        self.__is_file_written: bool = False
+
+    @property
+    def name(self) -> str:
+        return str(self.__table.name)
+
+    @name.setter
+    def name(self, value: str) -> None:
+        self.__table.name = value
+
+    @property
+    def table(self) -> Any:
+        return self.__table
+
+    def write_cell(self, row_index: int, column_index: int, value: Any, is_formula: bool = False, style_name: Optional[str] = None) -> None:
+        if value is None:
+            raise RP2ValueError(f"Invalid value for cell ({row_index}, {column_index}) of sheet '{self.name}': None")
+        cell: _PendingCell = self._get_pending_cell(row_index, column_index)
+        if is_formula:
+            cell.formula = value
+        else:
+            cell.value = value
+        if style_name is not None:
+            cell.style_name = style_name
+
+    def set_style(self, row_index: int, column_index: int, style_name: str) -> None:
+        self._get_pending_cell(row_index, column_index).style_name = style_name
+
+    # Values that are None leave the corresponding cell value untouched. Values starting with '=' are formulas. Styles that are None leave
+    # the corresponding cell style untouched.
+    def write_row(self, row_index: int, values: List[Any], style_names: List[Optional[str]]) -> None:
+        if len(values) != len(style_names):
+            raise RP2TypeError(f"Parameters 'values' and 'style_names' have different lengths: {len(values)} != {len(style_names)}")
+        column_index: int
+        value: Any
+        style_name: Optional[str]
+        for column_index, (value, style_name) in enumerate(zip(values, style_names)):
+            if value is not None:
+                self.write_cell(row_index, column_index, value, isinstance(value, str) and value[:1] == "=", style_name)
+            elif style_name is not None:
+                self.set_style(row_index, column_index, style_name)
+
+    # Same semantics as ezodf's insert_rows(): following rows (including background ones) are shifted down
+    def insert_rows(self, index: int, count: int = 1) -> None:
+        if index < self.__next_row_index:
+            raise RP2RuntimeError(f"Internal error: cannot insert rows at {index} in sheet '{self.name}': row {index} has already been written")
+        background_row: List[Any]
+        for background_row in self.__background_rows:
+            if background_row[0] >= index:
+                background_row[0] += count
+        self.__pending_rows = {(row_index + count if row_index >= index else row_index): cells for row_index, cells in self.__pending_rows.items()}
+
+    # Serializes all remaining rows
+    def flush(self) -> None:
+        end_row_index: int = self.__next_row_index
+        if self.__pending_rows:
+            end_row_index = max(end_row_index, max(self.__pending_rows) + 1)
+        if self.__background_rows:
+            end_row_index = max(end_row_index, self.__background_rows[-1][0] + 1)
+        self._emit_rows(end_row_index)
+
+    # Copies the serialized rows to the given binary file
+    def copy_to(self, output_file: IO[bytes]) -> None:
+        if self.__is_file_written:
+            with open(self.__file_path, "rb") as input_file:
+                for data in iter(lambda: input_file.read(_COPY_CHUNK_SIZE), b""):
+                    output_file.write(data)
+        output_file.write("".join(self.__buffer).encode("utf-8"))
+
+    def _get_pending_cell(self, row_index: int, column_index: int) -> _PendingCell:
+        if row_index < self.__next_row_index:
+            raise RP2RuntimeError(f"Internal error: row {row_index} of sheet '{self.name}' has already been written")
+        if row_index - _PENDING_ROW_WINDOW > self.__next_row_index:
+            self._emit_rows(row_index - _PENDING_ROW_WINDOW)
+        cells: Optional[Dict[int, _PendingCell]] = self.__pending_rows.get(row_index)
+        if cells is None:
+            cells = {}
+            self.__pending_rows[row_index] = cells
+        cell: Optional[_PendingCell] = cells.get(column_index)
+        if cell is None:
+            cell = _PendingCell()
+            cells[column_index] = cell
+        return cell
+
+    # Serializes rows up to end_row_index (excluded)
+    def _emit_rows(self, end_row_index: int) -> None:
+        while self.__next_row_index < end_row_index:
+            row_index: int = self.__next_row_index
+            cells: Optional[Dict[int, _PendingCell]] = self.__pending_rows.pop(row_index, None)
+            background_row: Optional[Any] = None
+            if self.__background_rows and self.__background_rows[0][0] == row_index:
+                background_row = self.__background_rows.pop(0)[1]
+            if background_row is not None:
+                self._write(_get_background_row_xml(background_row, cells if cells else {}))
+            elif cells:
+                self._write(_get_row_xml(cells, self.__column_count))
+            else:
+                # Empty rows are written all at once
+                next_row_index: int = end_row_index
+                if self.__pending_rows:
+                    next_row_index = min(next_row_index, *self.__pending_rows)
+                if self.__background_rows:
+                    next_row_index = min(next_row_index, self.__background_rows[0][0])
+                self._write(_get_empty_rows_xml(next_row_index - row_index, self.__column_count))
+                self.__next_row_index = next_row_index
+                continue
+            self.__next_row_index += 1
+
+    def _write(self, xml: str) -> None:
+        self.__buffer.append(xml)
+        self.__buffer_size += len(xml)
+        if self.__buffer_size >= _BUFFER_SIZE:
+            with open(self.__file_path, "a", encoding="utf-8") as output_file:
+                output_file.write("".join(self.__buffer))
+            self.__is_file_written = True
+            self.__buffer = []
+            self.__buffer_size = 0
+
+
+# Saves an ezodf document containing stream sheets. The document is saved by ezodf without the rows of stream sheets (so its DOM stays small),
+# then content.xml is rewritten, splicing the serialized rows of each stream sheet into its table. Styles, settings, etc. are those of the
+# template the document was created from.
+class ODSStreamWriter:
+    def __init__(self, output_file: Any) -> None:
+        self.__output_file: Any = output_file
+        self.__temporary_directory: "TemporaryDirectory[str]" = TemporaryDirectory(prefix="rp2_")  # pylint: disable=consider-using-with
+        # Keyed by the XML node of the table
+        self.__sheets: Dict[Any, ODSStreamSheet] = {}
+
+    @property
+    def output_file(self) -> Any:
+        return self.__output_file
+
+    # Turns an existing sheet of the document into a stream sheet (or returns the stream sheet it was already turned into)
+    def get_stream_sheet(self, sheet: Any, column_count: int = 0) -> ODSStreamSheet:
+        if isinstance(sheet, ODSStreamSheet):
+            return sheet
+        result: Optional[ODSStreamSheet] = self.__sheets.get(sheet.xmlnode)
+        if result is None:
+            result = ODSStreamSheet(sheet, column_count, Path(self.__temporary_directory.name) / f"{len(self.__sheets)}.xml")
+            self.__sheets[sheet.xmlnode] = result
+        return result
+
+    # Appends a new, empty stream sheet to the document
+    def add_stream_sheet(self, name: str, column_count: int) -> ODSStreamSheet:
+        table: Any = ezodf.Table(name, size=(1, column_count))
+        # The placeholder row created by ezodf is dropped, so that the sheet has no background rows
+        row: Any
+        for row in [child for child in table.xmlnode if child.tag == _TABLE_ROW_TAG]:
+            table.xmlnode.remove(row)
+        self.__output_file.sheets += table
+        return self.get_stream_sheet(table, column_count)
+
+    def save(self) -> None:
+        try:
+            markers: Dict[str, ODSStreamSheet] = {}
+            comments: List[Any] = []
+            table_node: Any
+            sheet: ODSStreamSheet
+            for table_node, sheet in self.__sheets.items():
+                if table_node.getparent() is None:
+                    # The sheet was removed from the document
+                    continue
+                sheet.flush()
+                marker: str = f"{_MARKER_PREFIX}{len(markers)}"
+                markers[marker] = sheet
+                comment: Any = etree.Comment(marker)
+                comments.append(comment)
+                column_nodes: List[Any] = [child for child in table_node if child.tag in _TABLE_COLUMN_TAGS]
+                if column_nodes:
+                    column_nodes[-1].addnext(comment)
+                else:
+                    table_node.insert(0, comment)
+            self.__output_file.save()
+            for comment in comments:
+                comment.getparent().remove(comment)
+            if markers:
+                self._splice_rows(markers)
+        finally:
+            self.__temporary_directory.cleanup()
+
+    def _splice_rows(self, markers: Dict[str, ODSStreamSheet]) -> None:
+        output_file_path: Path = Path(self.__output_file.docname)
+        with NamedTemporaryFile(dir=output_file_path.parent, prefix=".", suffix=".tmp", delete=False) as temporary_file:
+            temporary_file_path: str = temporary_file.name
+        try:
+            with ZipFile(output_file_path) as input_zip_file, ZipFile(temporary_file_path, "w") as output_zip_file:
+                for info in input_zip_file.infolist():
+                    if info.filename != _CONTENT_FILE:
+                        output_zip_file.writestr(info, input_zip_file.read(info))
+                        continue
+                    # Without stream sheet rows content.xml is small enough to be read at once
+                    pieces: List[str] = _MARKER.split(input_zip_file.read(info).decode("utf-8"))
+                    info.compress_type = ZIP_DEFLATED
+                    with output_zip_file.open(info, "w") as content_file:
+                        index: int
+                        piece: str
+                        for index, piece in enumerate(pieces):
+                            # Odd pieces are the markers captured by the regular expression
+                            if index % 2 == 1:
+                                markers[piece].copy_to(content_file)
+                            else:
+                                content_file.write(piece.encode("utf-8"))
+            os.replace(temporary_file_path, output_file_path)
+        except BaseException:
+            Path(temporary_file_path).unlink()
+            raise
+
+
+# Same XML that ezodf generates for the row
+def _get_row_xml(cells: Dict[int, _PendingCell], column_count: int) -> str:
+    result: List[str] = ["<table:table-row>"]
+    column_index: int = 0
+    index: int
+    for index in sorted(cells):
+        if index > column_index:
+            result.append(_get_empty_cells_xml(index - column_index))
+        result.append(_get_cell_xml(cells[index]))
+        column_index = index + 1
+    if column_count > column_index:
+        result.append(_get_empty_cells_xml(column_count - column_index))
+    result.append("</table:table-row>")
+    return "".join(result)
+
+
+def _get_empty_rows_xml(row_count: int, column_count: int) -> str:
+    repeat: str = f' table:number-rows-repeated="{row_count}"' if row_count > 1 else ""
+    return f"<table:table-row{repeat}>{_get_empty_cells_xml(column_count)}</table:table-row>"
+
+
+def _get_empty_cells_xml(cell_count: int) -> str:
+    if cell_count == 1:
+        return "<table:table-cell/>"
+    return f'<table:table-cell table:number-columns-repeated="{cell_count}"/>'
+
+
+# Same XML that ezodf generates for a cell with the given value, formula and style (see ezodf's Cell.set_value())
+def _get_cell_xml(cell: _PendingCell) -> str:
+    attributes: List[str] = []
+    content: str = ""
+    if cell.formula is not None:
+        attributes.append(f' table:formula="{_escape_attribute(cell.formula)}"')
+    value: Any = cell.value
+    if value is not _NO_VALUE:
+        if isinstance(value, bool):
+            attributes.append(f' office:boolean-value="{"true" if value else "false"}" office:value-type="boolean"')
+        elif isinstance(value, (float, int)):
+            attributes.append(f' office:value="{value}" office:value-type="float"')
+        else:
+            attributes.append(' office:value-type="string"')
+            text: str = _encode_text(str(value))
+            content = f"<text:p>{text}</text:p>" if text else "<text:p/>"
+    if cell.style_name is not None:
+        attributes.append(f' table:style-name="{_escape_attribute(cell.style_name)}"')
+    if content:
+        return f"<table:table-cell{''.join(attributes)}>{content}</table:table-cell>"
+    return f"<table:table-cell{''.join(attributes)}/>"
+
+
+# Template rows are modified via ezodf, so that written cells keep the template attributes that are not overwritten
+def _get_background_row_xml(row: Any, cells: Dict[int, _PendingCell]) -> str:
+    cell_nodes: List[Any] = [child for child in row if child.tag in _TABLE_CELL_TAGS]
+    column_index: int
+    cell: _PendingCell
+    for column_index, cell in cells.items():
+        while len(cell_nodes) <= column_index:
+            cell_nodes.append(etree.SubElement(row, _TABLE_CELL_TAG))
+        ezodf_cell: Any = wrap(cell_nodes[column_index])
+        if cell.formula is not None:
+            ezodf_cell.formula = cell.formula
+        if cell.value is not _NO_VALUE:
+            ezodf_cell.set_value(cell.value)
+        if cell.style_name is not None:
+            ezodf_cell.style_name = cell.style_name
+    xml: str = etree.tostring(row, encoding="unicode", with_tail=False)
+    # The row was detached from the document: remove the namespace declarations that lxml adds to it (they are already in the document root)
+    end_of_tag: int = xml.index(">")
+    return _NAMESPACE_DECLARATION.sub("", xml[:end_of_tag]) + xml[end_of_tag:]
+
+
+# Same whitespace encoding as ezodf: runs of spaces, tabs and newlines are represented by text:s, text:tab and text:line-break elements
+def _encode_text(text: str) -> str:
+    result: List[str] = []
+    position: int = 0
+    for match in _WHITESPACE.finditer(text):
+        result.append(escape(text[position : match.start()]))
+        spaces, tab, _ = match.groups()
+        if spaces:
+            space_count: int = len(spaces) - 1
+            result.append(" <text:s/>" if space_count == 1 else f' <text:s text:c="{space_count}"/>')
+        elif tab:
+            result.append("<text:tab/>")
+        else:
+            result.append("<text:line-break/>")
+        position = match.end()
+    result.append(escape(text[position:]))
+    return "".join(result)
+
+
+def _escape_attribute(value: str) -> str:
+    return escape(value, {'"': "&quot;"})
@@ -0,0 +1,71 @@
+# Copyright 2021 eprbell
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from datetime import date
+from pathlib import Path
+from typing import Dict, List
+
+from rp2.abstract_country import AbstractCountry
+from rp2.abstract_report_generator import AbstractReportGenerator
+from rp2.computed_data import ComputedData
+from rp2.configuration import MAX_DATE, MIN_DATE, Configuration
+from rp2.logger import LOGGER
+from rp2.open_lot_snapshot import OpenLot, write_open_lot_snapshot
+from rp2.rp2_error import RP2TypeError
+from rp2.transaction_set import TransactionSet
+
+
+# Inventory of the lots that are still open at the end of to_date (or of the last transaction, if to_date is not specified), in a format that
+# can be passed to a later run with --carry-forward: that run then needs only the transactions that follow the snapshot date.
+class Generator(AbstractReportGenerator):
+    OUTPUT_FILE: str = "open_lot_snapshot.csv"
+
+    def generate(
+        self,
+        country: AbstractCountry,
+        years_2_accounting_method_names: Dict[int, str],
+        asset_to_computed_data: Dict[str, ComputedData],
+        output_dir_path: str,
+        output_file_prefix: str,
+        from_date: date,
+        to_date: date,
+        generation_language: str,
+    ) -> None:
+        if not isinstance(asset_to_computed_data, Dict):
+            raise RP2TypeError(f"Parameter 'asset_to_computed_data' has non-Dict value {asset_to_computed_data}")
+        Configuration.type_check_string("output_dir_path", output_dir_path)
+        Configuration.type_check_string("output_file_prefix", output_file_prefix)
+
+        snapshot_date: date = to_date
+        open_lots: List[OpenLot] = []
+        computed_data: ComputedData
+        for computed_data in asset_to_computed_data.values():
+            ComputedData.type_check("computed_data", computed_data)
+            open_lots.extend(computed_data.get_open_lots())
+        if snapshot_date == MAX_DATE:
+            snapshot_date = max((_get_last_transaction_date(computed_data) for computed_data in asset_to_computed_data.values()), default=MIN_DATE)
+
+        output_file_path: Path = Path(output_dir_path) / Path(f"{output_file_prefix}{self.OUTPUT_FILE}")
+        write_open_lot_snapshot(str(output_file_path), snapshot_date, open_lots)
+        LOGGER.info("Plugin '%s' output: %s", self.__module__, output_file_path.resolve())
+
+
+def _get_last_transaction_date(computed_data: ComputedData) -> date:
+    result: date = date.min
+    transaction_set: TransactionSet
+    for transaction_set in [computed_data.in_transaction_set, computed_data.out_transaction_set, computed_data.intra_transaction_set]:
+        for entry in transaction_set:
+            result = max(result, entry.timestamp.date())
+    return result
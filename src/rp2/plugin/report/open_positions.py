@@ -23,6 +23,7 @@ from rp2.in_transaction import InTransaction
 from rp2.localization import _
 from rp2.logger import create_logger
 from rp2.plugin.report.abstract_ods_generator import AbstractODSGenerator
+from rp2.plugin.report.ods_stream_writer import ODSStreamSheet, ODSStreamWriter
 from rp2.rp2_decimal import ZERO, RP2Decimal
 from rp2.rp2_error import RP2TypeError
 
@@ -198,9 +199,10 @@ class Generator(AbstractODSGenerator):
         asset: str
         computed_data: ComputedData
 
-        asset_sheet = output_file.sheets[_ASSET]
-        asset_exchange_sheet = output_file.sheets[_ASSET_EXCHANGE]
-        input_sheet = output_file.sheets[_INPUT]
+        writer: ODSStreamWriter = ODSStreamWriter(output_file)
+        asset_sheet: ODSStreamSheet = writer.get_stream_sheet(output_file.sheets[_ASSET])
+        asset_exchange_sheet: ODSStreamSheet = writer.get_stream_sheet(output_file.sheets[_ASSET_EXCHANGE])
+        input_sheet: ODSStreamSheet = writer.get_stream_sheet(output_file.sheets[_INPUT])
 
         self._fill_header(_("Open Positions by Asset"), self.__asset_header_names_row_1, self.__asset_header_names_row_2, asset_sheet, 0, 0, apply_style=False)
         self._fill_cell(asset_sheet, 0, 6, _("ENTER PRICES ON INPUT TAB"), apply_style=False)
@@ -269,6 +271,13 @@ class Generator(AbstractODSGenerator):
                     if balance_set.exchange not in asset_crypto_balance_holder_exchange[asset][balance_set.holder]:
                         asset_crypto_balance_holder_exchange[asset][balance_set.holder][balance_set.exchange] = balance_set.final_balance
 
+        # The percentage columns of data rows refer to the last data row of their sheet: count data rows in advance, so that each row can be
+        # written in one go.
+        last_asset_row_index: int = self.HEADER_ROWS + sum(len(asset_crypto_balance_holder[asset]) for asset in asset_cost_bases)
+        last_asset_exchange_row_index: int = self.HEADER_ROWS + sum(
+            len(exchanges) for asset in asset_cost_bases for exchanges in asset_crypto_balance_holder_exchange[asset].values()
+        )
+
         # Now looping through the assets to do the reporting.
         for asset, asset_cost_basis in asset_cost_bases.items():
             total_crypto_balance = ZERO
@@ -288,7 +297,6 @@ class Generator(AbstractODSGenerator):
                 unit_data_style = "fiat_unit_7"
 
             # Add this asset to the Input sheet where the user will enter pricing value for the calculations
-            input_sheet.append_rows(1)
             input_row_index: int = row_indexes[_INPUT]
             self._fill_cell(input_sheet, input_row_index, 0, asset)
             self._fill_cell(input_sheet, input_row_index, 1, _INPUT_VALUE_STRING, data_style="fiat_unit_7")
@@ -301,7 +309,6 @@ class Generator(AbstractODSGenerator):
             for holder, holder_crypto_balance in asset_crypto_balance_holder[asset].items():
                 holder_cost_basis: RP2Decimal = holder_crypto_balance * unit_cost_basis
 
-                asset_sheet.append_rows(1)
                 asset_row_index: int = row_indexes[_ASSET]
                 _vlookup_formula = f"VLOOKUP(A{asset_row_index+1};${_('Input')}.A:B;2;0)"
                 _lookup_field = f'=IF({_vlookup_formula}="{_INPUT_VALUE_STRING}";"{_REPORT_INPUT_VALUE_STRING}";{_vlookup_formula}'
@@ -316,6 +323,12 @@ class Generator(AbstractODSGenerator):
                 self._fill_cell(asset_sheet, asset_row_index, 7, f"=C{asset_row_index+1}*G{asset_row_index+1}", data_style="fiat")
                 self._fill_cell(asset_sheet, asset_row_index, 8, f"=H{asset_row_index+1}-E{asset_row_index+1}", data_style="fiat")
                 self._fill_cell(asset_sheet, asset_row_index, 9, f"=(H{asset_row_index+1}-E{asset_row_index+1})/E{asset_row_index+1}", data_style="percent")
+                self._fill_cell(
+                    asset_sheet, asset_row_index, 10, f"=I{asset_row_index+1}/SUM(E${self.HEADER_ROWS+1}:E${last_asset_row_index})", data_style="percent"
+                )
+                self._fill_cell(
+                    asset_sheet, asset_row_index, 11, f"=H{asset_row_index+1}/SUM(H${self.HEADER_ROWS+1}:H${last_asset_row_index})", data_style="percent"
+                )
                 row_indexes[_ASSET] = asset_row_index + 1
 
             # Generate the Asset/Exchange table which will calc vals that will feed the asset table.
@@ -323,7 +336,6 @@ class Generator(AbstractODSGenerator):
                 for exchange, crypto_exchange_balance in exchanges.items():
                     exchange_cost_basis: RP2Decimal = crypto_exchange_balance * unit_cost_basis
 
-                    asset_exchange_sheet.append_rows(1)
                     asset_exchange_row_index: int = row_indexes[_ASSET_EXCHANGE]
                     _vlookup_formula = f"VLOOKUP(A{asset_exchange_row_index+1};${_('Input')}.A:B;2;0)"
                     _lookup_field = f'=IF({_vlookup_formula}="{_INPUT_VALUE_STRING}";"{_REPORT_INPUT_VALUE_STRING}";{_vlookup_formula}'
@@ -349,6 +361,20 @@ class Generator(AbstractODSGenerator):
                         f"=(I{asset_exchange_row_index+1}-F{asset_exchange_row_index+1})/F{asset_exchange_row_index+1}",
                         data_style="percent",
                     )
+                    self._fill_cell(
+                        asset_exchange_sheet,
+                        asset_exchange_row_index,
+                        11,
+                        f"=J{asset_exchange_row_index+1}/SUM(F${self.HEADER_ROWS+1}:F${last_asset_exchange_row_index})",
+                        data_style="percent",
+                    )
+                    self._fill_cell(
+                        asset_exchange_sheet,
+                        asset_exchange_row_index,
+                        12,
+                        f"=I{asset_exchange_row_index+1}/SUM(I${self.HEADER_ROWS+1}:I${last_asset_exchange_row_index})",
+                        data_style="percent",
+                    )
                     row_indexes[_ASSET_EXCHANGE] = asset_exchange_row_index + 1
 
         # There are several portfolio-wide fields in the output that are dependent on values the user enters into the Input tab for
@@ -356,23 +382,12 @@ class Generator(AbstractODSGenerator):
         # full-column sums, e.g. =G4/SUM(G:G), so instead I am using the row index and the header rows info to scope the SUM to the
         # actual rows I know I have placed data into.
 
-        asset_row_index = row_indexes[_ASSET]
-        for row_idx in range(self.HEADER_ROWS, row_indexes[_ASSET]):
-            self._fill_cell(asset_sheet, row_idx, 10, f"=I{row_idx+1}/SUM(E${self.HEADER_ROWS+1}:E${asset_row_index})", data_style="percent")
-            self._fill_cell(asset_sheet, row_idx, 11, f"=H{row_idx+1}/SUM(H${self.HEADER_ROWS+1}:H${asset_row_index})", data_style="percent")
-
-        asset_exchange_row_index = row_indexes[_ASSET_EXCHANGE]
-        for row_idx in range(self.HEADER_ROWS, row_indexes[_ASSET_EXCHANGE]):
-            self._fill_cell(asset_exchange_sheet, row_idx, 11, f"=J{row_idx+1}/SUM(F${self.HEADER_ROWS+1}:F${asset_exchange_row_index})", data_style="percent")
-            self._fill_cell(asset_exchange_sheet, row_idx, 12, f"=I{row_idx+1}/SUM(I${self.HEADER_ROWS+1}:I${asset_exchange_row_index})", data_style="percent")
-
         # Save the last row index containing data so multiple total rows can be added.
         last_data_row_indexes = row_indexes.copy()
 
         # Asset sheet totals.
         if len(holders) > 1:
             for holder in holders:
-                asset_sheet.append_rows(1)
                 asset_row_index = row_indexes[_ASSET]
                 last_data_index = last_data_row_indexes[_ASSET]
                 self._fill_cell(asset_sheet, asset_row_index, 0, _("Total"), visual_style="bold_border")
@@ -417,7 +432,6 @@ class Generator(AbstractODSGenerator):
                 self._fill_cell(asset_sheet, asset_row_index, 11, "", visual_style="bold_border")
                 row_indexes[_ASSET] = asset_row_index + 1
 
-        asset_sheet.append_rows(1)
         asset_row_index = row_indexes[_ASSET]
         last_data_index = last_data_row_indexes[_ASSET]
         self._fill_cell(asset_sheet, asset_row_index, 0, _("Grand Total"), visual_style="bold_border")
@@ -444,7 +458,6 @@ class Generator(AbstractODSGenerator):
         # Asset - Exchange sheet totals.
         if len(holders) > 1:
             for holder in holders:
-                asset_exchange_sheet.append_rows(1)
                 asset_exchange_row_index = row_indexes[_ASSET_EXCHANGE]
                 last_data_index = last_data_row_indexes[_ASSET_EXCHANGE]
                 self._fill_cell(asset_exchange_sheet, asset_exchange_row_index, 0, _("Total"), visual_style="bold_border")
@@ -490,7 +503,6 @@ class Generator(AbstractODSGenerator):
                 self._fill_cell(asset_exchange_sheet, asset_exchange_row_index, 12, "", visual_style="bold_border")
                 row_indexes[_ASSET_EXCHANGE] = asset_exchange_row_index + 1
 
-        asset_exchange_sheet.append_rows(1)
         asset_exchange_row_index = row_indexes[_ASSET_EXCHANGE]
         last_data_index = last_data_row_indexes[_ASSET_EXCHANGE]
         self._fill_cell(asset_exchange_sheet, asset_exchange_row_index, 0, _("Grand Total"), visual_style="bold_border")
@@ -540,5 +552,5 @@ class Generator(AbstractODSGenerator):
         asset_exchange_sheet.name = _("Asset - Exchange")
         input_sheet.name = _("Input")
 
-        output_file.save()
+        writer.save()
         LOGGER.info("Plugin '%s' output: %s", __name__, Path(output_file.docname).resolve())
@@ -0,0 +1,108 @@
+# Copyright 2022 mdavid217
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+from datetime import timezone
+from decimal import ROUND_HALF_EVEN, Context, InvalidOperation, localcontext
+from pathlib import Path
+from typing import Any, Dict, List
+
+from rp2.plugin.report.abstract_flat_report_generator import (
+    AbstractFlatReportGenerator,
+    AbstractTableWriter,
+    Column,
+    ColumnType,
+)
+from rp2.rp2_decimal import RP2Decimal
+from rp2.rp2_error import RP2RuntimeError, RP2ValueError
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+
+    _IS_PYARROW_AVAILABLE: bool = True
+except ImportError:
+    _IS_PYARROW_AVAILABLE = False
+
+# Rows are buffered and written as one row group every _ROW_GROUP_SIZE rows
+_ROW_GROUP_SIZE: int = 65536
+# Decimal columns use a fixed-point type: 38 digits, 18 of which after the decimal point (enough for wei-level precision). Values with more
+# fractional digits (e.g. results of divisions) are rounded. Quantization runs with _DECIMAL_PRECISION digits (the global context has fewer),
+# so it fails exactly on values that don't fit the column type.
+_DECIMAL_PRECISION: int = 38
+_DECIMAL_SCALE: int = 18
+_DECIMAL_QUANTUM: RP2Decimal = RP2Decimal(f"1E-{_DECIMAL_SCALE}")
+
+
+# Parquet file, written one row group at a time (columns are typed: decimals are not converted to float and timestamps are in UTC).
+class _ParquetTableWriter(AbstractTableWriter):
+    def __init__(self, output_file_path: Path, columns: List[Column]) -> None:
+        super().__init__(output_file_path, columns)
+        column_type_2_arrow_type: Dict[ColumnType, Any] = {
+            ColumnType.BOOLEAN: pyarrow.bool_(),
+            ColumnType.DECIMAL: pyarrow.decimal128(_DECIMAL_PRECISION, _DECIMAL_SCALE),
+            ColumnType.INTEGER: pyarrow.int64(),
+            ColumnType.STRING: pyarrow.string(),
+            ColumnType.TIMESTAMP: pyarrow.timestamp("us", tz="UTC"),
+        }
+        self.__schema: Any = pyarrow.schema([(column.name, column_type_2_arrow_type[column.column_type]) for column in columns])
+        self.__decimal_column_indexes: List[int] = [index for index, column in enumerate(columns) if column.column_type == ColumnType.DECIMAL]
+        self.__timestamp_column_indexes: List[int] = [index for index, column in enumerate(columns) if column.column_type == ColumnType.TIMESTAMP]
+        self.__column_values: List[List[Any]] = [[] for _ in columns]
+        self.__writer: Any = pyarrow.parquet.ParquetWriter(str(output_file_path), self.__schema)
+
+    def write_row(self, values: List[Any]) -> None:
+        row: List[Any] = list(values)
+        index: int
+        context: Context
+        with localcontext() as context:
+            context.prec = _DECIMAL_PRECISION
+            for index in self.__decimal_column_indexes:
+                if row[index] is not None:
+                    try:
+                        row[index] = row[index].quantize(_DECIMAL_QUANTUM, rounding=ROUND_HALF_EVEN)
+                    except InvalidOperation as exc:
+                        raise RP2ValueError(
+                            f"Value {row[index]} of column '{self.__schema.names[index]}' doesn't fit Parquet type "
+                            f"decimal128({_DECIMAL_PRECISION}, {_DECIMAL_SCALE})"
+                        ) from exc
+        for index in self.__timestamp_column_indexes:
+            if row[index] is not None:
+                row[index] = row[index].astimezone(timezone.utc)
+        value: Any
+        for index, value in enumerate(row):
+            self.__column_values[index].append(value)
+        if len(self.__column_values[0]) >= _ROW_GROUP_SIZE:
+            self._write_row_group()
+
+    def close(self) -> None:
+        try:
+            if self.__column_values[0]:
+                self._write_row_group()
+        finally:
+            self.__writer.close()
+
+    def _write_row_group(self) -> None:
+        self.__writer.write_table(pyarrow.Table.from_pydict(dict(zip(self.__schema.names, self.__column_values)), schema=self.__schema))
+        self.__column_values = [[] for _ in self.__column_values]
+
+
+class Generator(AbstractFlatReportGenerator):
+    def _get_file_extension(self) -> str:
+        return ".parquet"
+
+    def _create_table_writer(self, output_file_path: Path, columns: List[Column]) -> AbstractTableWriter:
+        if not _IS_PYARROW_AVAILABLE:
+            raise RP2RuntimeError("The parquet_report plugin requires pyarrow: install it with 'pip install rp2[parquet]'")
+        return _ParquetTableWriter(output_file_path, columns)
@@ -19,8 +19,6 @@ from datetime import date
 from pathlib import Path
 from typing import Any, Dict, List, NamedTuple, Optional, Set, cast
 
-import ezodf
-
 from rp2.abstract_country import AbstractCountry
 from rp2.abstract_entry import AbstractEntry
 from rp2.abstract_transaction import AbstractTransaction
@@ -34,6 +32,7 @@ from rp2.localization import _
 from rp2.logger import create_logger
 from rp2.out_transaction import OutTransaction
 from rp2.plugin.report.abstract_ods_generator import AbstractODSGenerator
+from rp2.plugin.report.ods_stream_writer import ODSStreamSheet, ODSStreamWriter
 from rp2.rp2_decimal import ZERO, RP2Decimal
 from rp2.rp2_error import RP2TypeError
 from rp2.transaction_set import TransactionSet
@@ -61,7 +60,6 @@ _ZERO: RP2Decimal = RP2Decimal(0)
 
 
 class Generator(AbstractODSGenerator):
-    MIN_ROWS: int = 40
     MAX_COLUMNS: int = 40
     OUTPUT_FILE: str = "rp2_full_report.ods"
 
@@ -459,7 +457,8 @@ class Generator(AbstractODSGenerator):
         asset: str
         computed_data: ComputedData
 
-        summary_sheet = output_file.sheets["Summary"]
+        writer: ODSStreamWriter = ODSStreamWriter(output_file)
+        summary_sheet: ODSStreamSheet = writer.get_stream_sheet(output_file.sheets["Summary"])
         summary_row_index: int = self._fill_header(
             _("Yearly Gain / Loss Summary"),
             self.__yearly_gain_loss_summary_header_names_row_1,
@@ -472,11 +471,11 @@ class Generator(AbstractODSGenerator):
             if not isinstance(asset, str):
                 raise RP2TypeError(f"Parameter 'asset' has non-string value {asset}")
             ComputedData.type_check("computed_data", computed_data)
-            summary_row_index = self.__generate_asset(computed_data, output_file, summary_row_index)
+            summary_row_index = self.__generate_asset(computed_data, writer, summary_sheet, summary_row_index)
 
         summary_sheet.name = _("Summary")
 
-        output_file.save()
+        writer.save()
         LOGGER.info("Plugin '%s' output: %s", __name__, Path(output_file.docname).resolve())
 
     @staticmethod
@@ -487,30 +486,12 @@ class Generator(AbstractODSGenerator):
     def get_tax_sheet_name(asset: str) -> str:
         return _("{} Tax").format(asset)
 
-    def __get_number_of_rows_in_transaction_sheet(self, computed_data: ComputedData) -> int:
-        return self.MIN_ROWS + computed_data.in_transaction_set.count + computed_data.out_transaction_set.count + computed_data.intra_transaction_set.count
-
-    def __get_number_of_rows_in_output_sheet(self, computed_data: ComputedData) -> int:
-        return self.MIN_ROWS + len(computed_data.yearly_gain_loss_list) + computed_data.balance_set.count + computed_data.gain_loss_set.count
-
-    def __generate_asset(self, computed_data: ComputedData, output_file: Any, summary_row_index: int) -> int:
+    def __generate_asset(self, computed_data: ComputedData, writer: ODSStreamWriter, summary_sheet: ODSStreamSheet, summary_row_index: int) -> int:
         asset: str = computed_data.asset
-        transaction_sheet_name: str = self.get_in_out_sheet_name(asset)
-        output_sheet_name: str = self.get_tax_sheet_name(asset)
-
-        transaction_sheet: Any = ezodf.Table(transaction_sheet_name)
-        output_sheet: Any = ezodf.Table(output_sheet_name)
-        summary_sheet: Any = output_file.sheets["Summary"]
-
-        output_file.sheets += transaction_sheet
-        output_file.sheets += output_sheet
-
-        transaction_sheet.reset(size=(self.__get_number_of_rows_in_transaction_sheet(computed_data), self.MAX_COLUMNS))
-        output_sheet.reset(size=(self.__get_number_of_rows_in_output_sheet(computed_data), self.MAX_COLUMNS))
 
-        new_lines: int = len(computed_data.yearly_gain_loss_list)
-        if new_lines:
-            summary_sheet.append_rows(new_lines)
+        # Rows are written sequentially and streamed to the output file, so sheets don't need to be presized
+        transaction_sheet: ODSStreamSheet = writer.add_stream_sheet(self.get_in_out_sheet_name(asset), self.MAX_COLUMNS)
+        output_sheet: ODSStreamSheet = writer.add_stream_sheet(self.get_tax_sheet_name(asset), self.MAX_COLUMNS)
 
         row_index: int = 0
         row_index = self.__generate_in_table(transaction_sheet, computed_data, row_index)
@@ -25,6 +25,7 @@ from rp2.gain_loss import GainLoss
 from rp2.gain_loss_set import GainLossSet
 from rp2.logger import create_logger
 from rp2.plugin.report.abstract_ods_generator import AbstractODSGenerator
+from rp2.plugin.report.ods_stream_writer import ODSStreamSheet, ODSStreamWriter
 from rp2.rp2_error import RP2TypeError
 
 LOGGER: logging.Logger = create_logger("tax_report_us")
@@ -69,7 +70,6 @@ _TYPE_TO_SHEET: Dict[TransactionType, str] = {
 
 
 class Generator(AbstractODSGenerator):
-    MIN_ROWS: int = 20
     MAX_COLUMNS: int = 20
     OUTPUT_FILE: str = "tax_report_us.ods"
 
@@ -107,13 +107,16 @@ class Generator(AbstractODSGenerator):
             to_date=to_date,
         )
 
+        writer: ODSStreamWriter = ODSStreamWriter(output_file)
+        sheets: Dict[str, ODSStreamSheet] = {sheet.name: writer.get_stream_sheet(sheet) for sheet in output_file.sheets if sheet.name != "Legend"}
+
         asset: str
         computed_data: ComputedData
         for asset, computed_data in asset_to_computed_data.items():
             if not isinstance(asset, str):
                 raise RP2TypeError(f"Parameter 'asset' has non-string value {asset}")
             ComputedData.type_check("computed_data", computed_data)
-            self.__generate(output_file, asset, computed_data.gain_loss_set, row_indexes)
+            self.__generate(sheets, asset, computed_data.gain_loss_set, row_indexes)
 
         # Mark sheets that were not written to
         sheet_indexes_to_remove: List[int] = []
@@ -128,23 +131,15 @@ class Generator(AbstractODSGenerator):
         for index in reversed(sheet_indexes_to_remove):
             del output_file.sheets[index]
 
-        output_file.save()
+        writer.save()
         LOGGER.info("Plugin '%s' output: %s", __name__, Path(output_file.docname).resolve())
 
-    def __generate(self, output_file: Any, asset: str, gain_loss_set: GainLossSet, row_indexes: Dict[str, int]) -> None:
-        sheet: Any
-        for sheet in output_file.sheets:
-            if sheet.name == "Legend":
-                continue
-            sheet_types: Tuple[TransactionType, ...] = _SHEET_TO_TYPES[sheet.name]
-            for sheet_type in sheet_types:
-                sheet.append_rows(self.MIN_ROWS + gain_loss_set.get_transaction_type_count(sheet_type) + 1)
-
+    def __generate(self, sheets: Dict[str, ODSStreamSheet], asset: str, gain_loss_set: GainLossSet, row_indexes: Dict[str, int]) -> None:
         border_suffix: str = "_border"
         for entry in gain_loss_set:
             gain_loss: GainLoss = cast(GainLoss, entry)
-            sheet_type = gain_loss.taxable_event.transaction_type
-            sheet = output_file.sheets[_TYPE_TO_SHEET[sheet_type]]
+            sheet_type: TransactionType = gain_loss.taxable_event.transaction_type
+            sheet: ODSStreamSheet = sheets[_TYPE_TO_SHEET[sheet_type]]
             row_index: int = row_indexes[sheet.name]
             current_taxable_event_fraction: int = gain_loss_set.get_taxable_event_fraction(gain_loss) + 1
             total_taxable_event_fractions: int = gain_loss_set.get_taxable_event_number_of_fractions(gain_loss.taxable_event)
@@ -158,42 +153,72 @@ class Generator(AbstractODSGenerator):
                 f"{gain_loss.taxable_event.crypto_balance_change:.8f} "
                 f"{asset}"
             )
-            transparent_vs: str = f"transparent{border_suffix}"
-            taxable_event_note_vs: str = f"taxable_event_note{border_suffix}"
-            acquired_lot_note_vs: str = f"acquired_lot_note{border_suffix}"
-
-            self._fill_cell(sheet, row_index, 0, gain_loss.crypto_amount, visual_style=transparent_vs, data_style="crypto")
-            self._fill_cell(sheet, row_index, 1, gain_loss.asset, visual_style=transparent_vs)
-            self._fill_cell(sheet, row_index, 3, gain_loss.taxable_event.timestamp.strftime("%m/%d/%Y"), visual_style=taxable_event_note_vs)
-            self._fill_cell(sheet, row_index, 4, gain_loss.taxable_event_fiat_amount_with_fee_fraction, visual_style=taxable_event_note_vs, data_style="fiat")
-            self._fill_cell(sheet, row_index, 6, "", visual_style=transparent_vs)
-            self._fill_cell(sheet, row_index, 7, "", visual_style=transparent_vs)
-            self._fill_cell(sheet, row_index, 8, gain_loss.fiat_gain, visual_style=transparent_vs, data_style="fiat")
-            self._fill_cell(sheet, row_index, 9, transaction_type, visual_style=taxable_event_note_vs)
-            self._fill_cell(sheet, row_index, 12, taxable_event_note, visual_style=taxable_event_note_vs)
-            self._fill_cell(sheet, row_index, 13, gain_loss.taxable_event.unique_id, visual_style=taxable_event_note_vs)
-            self._fill_cell(sheet, row_index, 14, "LONG" if gain_loss.is_long_term_capital_gains() else "SHORT", visual_style=taxable_event_note_vs)
-            self._fill_cell(sheet, row_index, 15, gain_loss.taxable_event.timestamp, visual_style=taxable_event_note_vs)
-
+            transparent_style: str = f"transparent{border_suffix}_default"
+            taxable_event_note_style: str = f"taxable_event_note{border_suffix}_default"
+            acquired_lot_note_style: str = f"acquired_lot_note{border_suffix}_default"
+
+            acquired_lot_timestamp: str = ""
+            fiat_cost_basis: Any = ""
+            acquired_lot_note: str = ""
+            acquired_lot_unique_id: str = ""
+            acquired_lot_style: str = transparent_style
+            acquired_lot_fiat_style: str = transparent_style
             if gain_loss.acquired_lot:
                 current_acquired_lot_fraction: int = gain_loss_set.get_acquired_lot_fraction(gain_loss) + 1
                 total_acquired_lot_fractions: int = gain_loss_set.get_acquired_lot_number_of_fractions(gain_loss.acquired_lot)
-                acquired_lot_note: str = (
+                acquired_lot_timestamp = gain_loss.acquired_lot.timestamp.strftime("%m/%d/%Y")
+                fiat_cost_basis = gain_loss.fiat_cost_basis
+                acquired_lot_note = (
                     f"{current_acquired_lot_fraction}/"
                     f"{total_acquired_lot_fractions}: "
                     f"{gain_loss.crypto_amount:.8f} of "
                     f"{gain_loss.acquired_lot.crypto_balance_change:.8f} "
                     f"{asset}"
                 )
-                self._fill_cell(sheet, row_index, 2, gain_loss.acquired_lot.timestamp.strftime("%m/%d/%Y"), visual_style=acquired_lot_note_vs)
-                self._fill_cell(sheet, row_index, 5, gain_loss.fiat_cost_basis, visual_style=acquired_lot_note_vs, data_style="fiat")
-                self._fill_cell(sheet, row_index, 10, acquired_lot_note, visual_style=acquired_lot_note_vs)
-                self._fill_cell(sheet, row_index, 11, gain_loss.acquired_lot.unique_id, visual_style=acquired_lot_note_vs)
-            else:
-                self._fill_cell(sheet, row_index, 2, "", visual_style=transparent_vs)
-                self._fill_cell(sheet, row_index, 5, "", visual_style=transparent_vs)
-                self._fill_cell(sheet, row_index, 10, "", visual_style=transparent_vs)
-                self._fill_cell(sheet, row_index, 11, "", visual_style=transparent_vs)
+                acquired_lot_unique_id = gain_loss.acquired_lot.unique_id
+                acquired_lot_style = acquired_lot_note_style
+                acquired_lot_fiat_style = f"acquired_lot_note{border_suffix}_fiat"
+
+            self._write_row(
+                sheet,
+                row_index,
+                [
+                    gain_loss.crypto_amount,
+                    gain_loss.asset,
+                    acquired_lot_timestamp,
+                    gain_loss.taxable_event.timestamp.strftime("%m/%d/%Y"),
+                    gain_loss.taxable_event_fiat_amount_with_fee_fraction,
+                    fiat_cost_basis,
+                    "",
+                    "",
+                    gain_loss.fiat_gain,
+                    transaction_type,
+                    acquired_lot_note,
+                    acquired_lot_unique_id,
+                    taxable_event_note,
+                    gain_loss.taxable_event.unique_id,
+                    "LONG" if gain_loss.is_long_term_capital_gains() else "SHORT",
+                    gain_loss.taxable_event.timestamp,
+                ],
+                [
+                    f"transparent{border_suffix}_crypto",
+                    transparent_style,
+                    acquired_lot_style,
+                    taxable_event_note_style,
+                    f"taxable_event_note{border_suffix}_fiat",
+                    acquired_lot_fiat_style,
+                    transparent_style,
+                    transparent_style,
+                    f"transparent{border_suffix}_fiat",
+                    taxable_event_note_style,
+                    acquired_lot_style,
+                    acquired_lot_style,
+                    taxable_event_note_style,
+                    taxable_event_note_style,
+                    taxable_event_note_style,
+                    taxable_event_note_style,
+                ],
+            )
 
             border_suffix = ""
             row_indexes[sheet.name] = row_index + 1
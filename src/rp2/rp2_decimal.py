@@ -13,6 +13,7 @@
 # limitations under the License.
 
 from decimal import Decimal, FloatOperation, getcontext
+from typing import Callable, Dict, Optional, Tuple, Type, cast
 
 from rp2.rp2_error import RP2TypeError
 
@@ -29,14 +30,24 @@ class RP2Decimal(Decimal):
     getcontext().prec = CRYPTO_DECIMALS + 18
     getcontext().traps[FloatOperation] = True
 
+    # Two values are equal within a precision if their difference, rounded (half-even) to the precision, is zero: i.e. if the difference is
+    # within half a unit of the precision. Comparing the difference with precomputed half units is equivalent to quantizing it, but it
+    # doesn't allocate the quantized value.
     @classmethod
     def is_equal_within_precision(cls, first: "RP2Decimal", second: "RP2Decimal", precision_mask: Decimal) -> bool:
-        return (first - second).quantize(precision_mask) == ZERO
+        half_units: Optional[Tuple[Decimal, Decimal]] = _EXPONENT_2_HALF_UNITS.get(precision_mask.as_tuple().exponent)
+        if half_units is None:
+            return (first - second).quantize(precision_mask) == ZERO
+        return _is_within(_decimal_sub(first, second), half_units)
 
+    # Comparison operators compare values rounded to CRYPTO_DECIMALS. Values that compare as equal (or unequal in the checked direction) with
+    # plain Decimal comparison need no allocation; the others allocate only their difference.
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Decimal):
             raise RP2TypeError(f"Operand has non-Decimal value {repr(other)}")
-        return (self - other).quantize(CRYPTO_DECIMAL_MASK).__eq__(ZERO)
+        if _decimal_eq(self, other):
+            return True
+        return _is_within(_decimal_sub(self, other), _CRYPTO_HALF_UNITS)
 
     def __ne__(self, other: object) -> bool:
         return not self.__eq__(other)
@@ -44,12 +55,16 @@ class RP2Decimal(Decimal):
     def __ge__(self, other: object) -> bool:
         if not isinstance(other, Decimal):
             raise RP2TypeError(f"Operand has non-Decimal value {repr(other)}")
-        return (self - other).quantize(CRYPTO_DECIMAL_MASK).__ge__(ZERO)
+        if _decimal_ge(self, other):
+            return True
+        return _decimal_ge(_decimal_sub(self, other), _MINUS_CRYPTO_HALF_UNIT)
 
     def __gt__(self, other: object) -> bool:
         if not isinstance(other, Decimal):
             raise RP2TypeError(f"Operand has non-Decimal value {repr(other)}")
-        return (self - other).quantize(CRYPTO_DECIMAL_MASK).__gt__(ZERO)
+        if _decimal_le(self, other):
+            return False
+        return _decimal_gt(_decimal_sub(self, other), _CRYPTO_HALF_UNIT)
 
     def __le__(self, other: object) -> bool:
         return not self.__gt__(other)
@@ -57,73 +72,113 @@ class RP2Decimal(Decimal):
     def __lt__(self, other: object) -> bool:
         return not self.__ge__(other)
 
+    # Arithmetic operators compute the result with the Decimal implementation and convert it to RP2Decimal. Decimal methods are looked up once,
+    # at module load time (see below).
     def __add__(self, other: object) -> "RP2Decimal":
         if not isinstance(other, Decimal):
             raise RP2TypeError(f"Operand has non-Decimal value {repr(other)}")
-        return RP2Decimal(Decimal.__add__(self, other))
+        return _new_decimal(RP2Decimal, _decimal_add(self, other))
 
     def __sub__(self, other: object) -> "RP2Decimal":
         if not isinstance(other, Decimal):
             raise RP2TypeError(f"Operand has non-Decimal value {repr(other)}")
-        return RP2Decimal(Decimal.__sub__(self, other))
+        return _new_decimal(RP2Decimal, _decimal_sub(self, other))
 
     def __mul__(self, other: object) -> "RP2Decimal":
         if not isinstance(other, Decimal):
             raise RP2TypeError(f"Operand has non-Decimal value {repr(other)}")
-        return RP2Decimal(Decimal.__mul__(self, other))
+        return _new_decimal(RP2Decimal, _decimal_mul(self, other))
 
     def __truediv__(self, other: object) -> "RP2Decimal":
         if not isinstance(other, Decimal):
             raise RP2TypeError(f"Operand has non-Decimal value {repr(other)}")
-        return RP2Decimal(Decimal.__truediv__(self, other))
+        return _new_decimal(RP2Decimal, _decimal_truediv(self, other))
 
     def __floordiv__(self, other: object) -> "RP2Decimal":
         if not isinstance(other, Decimal):
             raise RP2TypeError(f"Operand has non-Decimal value {repr(other)}")
-        return RP2Decimal(Decimal.__floordiv__(self, other))
+        return _new_decimal(RP2Decimal, _decimal_floordiv(self, other))
 
     def __pow__(self, other: object, modulo: object = None) -> "RP2Decimal":
         if not isinstance(other, Decimal):
             raise RP2TypeError(f"Operand has non-Decimal value {repr(other)}")
         if modulo is not None and not isinstance(modulo, Decimal):
             raise RP2TypeError(f"Modulo has non-Decimal value {repr(other)}")
-        return RP2Decimal(Decimal.__pow__(self, other, modulo))
+        return _new_decimal(RP2Decimal, _decimal_pow(self, other, modulo))
 
     def __mod__(self, other: object) -> "RP2Decimal":
         if not isinstance(other, Decimal):
             raise RP2TypeError(f"Operand has non-Decimal value {repr(other)}")
-        return RP2Decimal(Decimal.__mod__(self, other))
+        return _new_decimal(RP2Decimal, _decimal_mod(self, other))
 
     # Reflected operand overrides
     def __radd__(self, other: object) -> "RP2Decimal":
         if not isinstance(other, Decimal):
             raise RP2TypeError(f"Operand has non-Decimal value {repr(other)}")
-        return RP2Decimal(Decimal.__radd__(self, other))
+        return _new_decimal(RP2Decimal, _decimal_radd(self, other))
 
     def __rsub__(self, other: object) -> "RP2Decimal":
         if not isinstance(other, Decimal):
             raise RP2TypeError(f"Operand has non-Decimal value {repr(other)}")
-        return RP2Decimal(Decimal.__rsub__(self, other))
+        return _new_decimal(RP2Decimal, _decimal_rsub(self, other))
 
     def __rmul__(self, other: object) -> "RP2Decimal":
         if not isinstance(other, Decimal):
             raise RP2TypeError(f"Operand has non-Decimal value {repr(other)}")
-        return RP2Decimal(Decimal.__rmul__(self, other))
+        return _new_decimal(RP2Decimal, _decimal_rmul(self, other))
 
     def __rtruediv__(self, other: object) -> "RP2Decimal":
         if not isinstance(other, Decimal):
             raise RP2TypeError(f"Operand has non-Decimal value {repr(other)}")
-        return RP2Decimal(Decimal.__rtruediv__(self, other))
+        return _new_decimal(RP2Decimal, _decimal_rtruediv(self, other))
 
     def __rfloordiv__(self, other: object) -> "RP2Decimal":
         if not isinstance(other, Decimal):
             raise RP2TypeError(f"Operand has non-Decimal value {repr(other)}")
-        return RP2Decimal(Decimal.__rfloordiv__(self, other))
+        return _new_decimal(RP2Decimal, _decimal_rfloordiv(self, other))
 
     def __rmod__(self, other: object) -> "RP2Decimal":
         if not isinstance(other, Decimal):
             raise RP2TypeError(f"Operand has non-Decimal value {repr(other)}")
-        return RP2Decimal(Decimal.__rmod__(self, other))
+        return _new_decimal(RP2Decimal, _decimal_rmod(self, other))
+
+
+# Unbound Decimal methods used by RP2Decimal operators
+_new_decimal: Callable[[Type[RP2Decimal], Decimal], RP2Decimal] = cast(Callable[[Type[RP2Decimal], Decimal], RP2Decimal], Decimal.__new__)
+_decimal_eq: Callable[[Decimal, object], bool] = Decimal.__eq__
+_decimal_ge: Callable[[Decimal, Decimal], bool] = Decimal.__ge__
+_decimal_gt: Callable[[Decimal, Decimal], bool] = Decimal.__gt__
+_decimal_le: Callable[[Decimal, Decimal], bool] = Decimal.__le__
+_decimal_add: Callable[[Decimal, Decimal], Decimal] = Decimal.__add__
+_decimal_sub: Callable[[Decimal, Decimal], Decimal] = Decimal.__sub__
+_decimal_mul: Callable[[Decimal, Decimal], Decimal] = Decimal.__mul__
+_decimal_truediv: Callable[[Decimal, Decimal], Decimal] = Decimal.__truediv__
+_decimal_floordiv: Callable[[Decimal, Decimal], Decimal] = Decimal.__floordiv__
+_decimal_pow: Callable[[Decimal, Decimal, Optional[Decimal]], Decimal] = Decimal.__pow__
+_decimal_mod: Callable[[Decimal, Decimal], Decimal] = Decimal.__mod__
+_decimal_radd: Callable[[Decimal, Decimal], Decimal] = Decimal.__radd__
+_decimal_rsub: Callable[[Decimal, Decimal], Decimal] = Decimal.__rsub__
+_decimal_rmul: Callable[[Decimal, Decimal], Decimal] = Decimal.__rmul__
+_decimal_rtruediv: Callable[[Decimal, Decimal], Decimal] = Decimal.__rtruediv__
+_decimal_rfloordiv: Callable[[Decimal, Decimal], Decimal] = Decimal.__rfloordiv__
+_decimal_rmod: Callable[[Decimal, Decimal], Decimal] = Decimal.__rmod__
+
+# Negative and positive half units of CRYPTO_DECIMALS and FIAT_DECIMALS precision (see RP2Decimal.is_equal_within_precision()). Masks are
+# looked up by exponent, because masks with different precision compare as equal
+_CRYPTO_HALF_UNIT: Decimal = Decimal(f"5E-{CRYPTO_DECIMALS + 1}")
+_MINUS_CRYPTO_HALF_UNIT: Decimal = -_CRYPTO_HALF_UNIT
+_CRYPTO_HALF_UNITS: Tuple[Decimal, Decimal] = (_MINUS_CRYPTO_HALF_UNIT, _CRYPTO_HALF_UNIT)
+_EXPONENT_2_HALF_UNITS: Dict[object, Tuple[Decimal, Decimal]] = {
+    -CRYPTO_DECIMALS: _CRYPTO_HALF_UNITS,
+    -FIAT_DECIMALS: (Decimal(f"-5E-{FIAT_DECIMALS + 1}"), Decimal(f"5E-{FIAT_DECIMALS + 1}")),
+}
+
+
+# NaN differences are never within precision (the quantized NaN is not equal to zero either)
+def _is_within(difference: Decimal, half_units: Tuple[Decimal, Decimal]) -> bool:
+    if difference.is_nan():
+        return False
+    return _decimal_le(half_units[0], difference) and _decimal_le(difference, half_units[1])
 
 
 ZERO: RP2Decimal = RP2Decimal("0")
@@ -16,12 +16,13 @@ import cProfile
 import os
 import sys
 from argparse import SUPPRESS, ArgumentParser, Namespace, RawTextHelpFormatter
+from concurrent.futures import Future, ProcessPoolExecutor
 from datetime import date
 from importlib import import_module
 from pathlib import Path
 from pkgutil import iter_modules
 from types import ModuleType
-from typing import Dict, List, Set
+from typing import Dict, List, Optional, Set, Tuple
 
 from prezzemolo.avl_tree import AVLTree
 
@@ -40,12 +41,31 @@ from rp2.input_data import InputData
 from rp2.localization import set_generation_language
 from rp2.logger import LOG_FILE, LOGGER
 from rp2.ods_parser import open_ods, parse_ods
+from rp2.open_lot_snapshot import OpenLotSnapshot, read_open_lot_snapshot
+from rp2.parse_cache import ParseCache
+from rp2.rp2_error import RP2RuntimeError
+from rp2.text_input_reader import TEXT_INPUT_EXTENSIONS
 from rp2.tax_engine import compute_tax
 
 _VERSION: str = "1.5.0"
 
 _ACCOUNTING_METHOD_PACKAGE = "rp2.plugin.accounting_method"
 
+_DEFAULT_PARSE_CACHE_MAX_SIZE: int = 1024  # MB
+_MEGABYTE: int = 1024 * 1024
+
+_STRICT_VALIDATION: str = "strict"
+_TRUSTED_VALIDATION: str = "trusted"
+
+# Input file handles opened by the current process. They are opened on first use, so the input file is not read at all if all assets are loaded
+# from the parse cache. With --jobs, ODS handles are not picklable, so each worker opens the input file once and reuses it for all the assets it
+# processes.
+_INPUT_FILE_HANDLES: Dict[str, object] = {}
+
+# Computed data of the current report generator worker process (--parallel-generators): it is set once by the pool initializer, instead of being
+# shipped with each generator task.
+_ASSET_TO_COMPUTED_DATA: Dict[str, ComputedData] = {}
+
 
 def rp2_main(country: AbstractCountry) -> None:
     if "RP2_ENABLE_PROFILER" in os.environ:
@@ -122,6 +142,14 @@ def _rp2_main_internal(country: AbstractCountry) -> None:  # pylint: disable=too
 
         LOGGER.info("Configuration file: %s", args.configuration_file)
 
+        if args.jobs < 1:
+            LOGGER.error("Number of jobs must be at least 1: %d", args.jobs)
+            sys.exit(1)
+
+        if args.parse_cache_max_size < 1:
+            LOGGER.error("Parse cache maximum size must be at least 1 MB: %d", args.parse_cache_max_size)
+            sys.exit(1)
+
         if args.plugin:
             LOGGER.error("Command line option '-l' or '--plugin' has been deprecated: use the 'generators' section in the configuration file instead.")
             sys.exit(1)
@@ -132,21 +160,50 @@ def _rp2_main_internal(country: AbstractCountry) -> None:  # pylint: disable=too
             assets = list(configuration.assets)
         assets.sort()
 
-        asset_to_computed_data: Dict[str, ComputedData] = {}
-        asset: str
+        asset_to_computed_data: Dict[str, ComputedData]
 
         LOGGER.info("Input file: %s", args.input_file)
-        input_file_handle: object = open_ods(configuration=configuration, input_file_path=args.input_file)
-        for asset in assets:
-            LOGGER.info("Processing %s", asset)
-
-            input_data: InputData = parse_ods(configuration=configuration, asset=asset, input_file_handle=input_file_handle)
-            LOGGER.debug("InputData object: %s", input_data)
-
-            computed_data: ComputedData = compute_tax(configuration=configuration, accounting_engine=accounting_engine, input_data=input_data)
-            LOGGER.debug("ComputedData object: %s", computed_data)
-
-            asset_to_computed_data[asset] = computed_data
+        open_lot_snapshot: Optional[OpenLotSnapshot] = None
+        if args.carry_forward:
+            open_lot_snapshot = read_open_lot_snapshot(configuration, args.carry_forward)
+            LOGGER.info("Open-lot snapshot: %s (%s)", args.carry_forward, open_lot_snapshot.snapshot_date)
+        parse_cache: Optional[ParseCache] = None
+        if args.parse_cache:
+            parse_cache = ParseCache(
+                configuration=configuration,
+                cache_directory=args.parse_cache,
+                input_file_path=args.input_file,
+                rp2_version=_VERSION,
+                max_size=args.parse_cache_max_size * _MEGABYTE,
+                open_lot_snapshot_path=args.carry_forward,
+            )
+            LOGGER.info("Parse cache: %s", args.parse_cache)
+        if args.jobs > 1 and len(assets) > 1:
+            asset_to_computed_data = _compute_assets_in_parallel(
+                configuration=configuration,
+                accounting_engine=accounting_engine,
+                assets=assets,
+                input_file_path=args.input_file,
+                streaming=args.streaming_ods_reader,
+                parse_cache=parse_cache,
+                open_lot_snapshot=open_lot_snapshot,
+                trusted=args.validation == _TRUSTED_VALIDATION,
+                generation_language=args.generation_language,
+                jobs=args.jobs,
+            )
+        else:
+            asset_to_computed_data = {}
+            for asset in assets:
+                asset_to_computed_data[asset] = _compute_asset(
+                    configuration=configuration,
+                    accounting_engine=accounting_engine,
+                    asset=asset,
+                    input_file_path=args.input_file,
+                    streaming=args.streaming_ods_reader,
+                    parse_cache=parse_cache,
+                    open_lot_snapshot=open_lot_snapshot,
+                    trusted=args.validation == _TRUSTED_VALIDATION,
+                )
 
         # Run report generators (both country-specific and non-country-specific)
         _find_and_run_report_generators(
@@ -158,6 +215,7 @@ def _rp2_main_internal(country: AbstractCountry) -> None:  # pylint: disable=too
             asset_to_computed_data=asset_to_computed_data,
             from_date=configuration.from_date,
             to_date=configuration.to_date,
+            parallel=args.parallel_generators,
         )
     except Exception:  # pylint: disable=broad-except
         LOGGER.exception("Fatal exception occurred:")
@@ -168,6 +226,85 @@ def _rp2_main_internal(country: AbstractCountry) -> None:  # pylint: disable=too
     LOGGER.info("Done")
 
 
+def _compute_asset(
+    configuration: Configuration,
+    accounting_engine: AccountingEngine,
+    asset: str,
+    input_file_path: str,
+    streaming: bool,
+    parse_cache: Optional[ParseCache],
+    open_lot_snapshot: Optional[OpenLotSnapshot] = None,
+    trusted: bool = False,
+) -> ComputedData:
+    LOGGER.info("Processing %s", asset)
+
+    input_data: Optional[InputData] = parse_cache.load(asset) if parse_cache is not None else None
+    if input_data is None:
+        input_data = parse_ods(
+            configuration=configuration,
+            asset=asset,
+            input_file_handle=_get_input_file_handle(configuration=configuration, input_file_path=input_file_path, streaming=streaming),
+            parse_cache=parse_cache,
+            open_lot_snapshot=open_lot_snapshot,
+        )
+    LOGGER.debug("InputData object: %s", input_data)
+
+    computed_data: ComputedData = compute_tax(
+        configuration=configuration, accounting_engine=accounting_engine, input_data=input_data, parse_cache=parse_cache, trusted=trusted
+    )
+    LOGGER.debug("ComputedData object: %s", computed_data)
+
+    return computed_data
+
+
+def _initialize_worker(generation_language: str) -> None:
+    set_generation_language(generation_language)
+
+
+def _get_input_file_handle(configuration: Configuration, input_file_path: str, streaming: bool) -> object:
+    input_file_handle: Optional[object] = _INPUT_FILE_HANDLES.get(input_file_path)
+    if input_file_handle is None:
+        input_file_handle = open_ods(configuration=configuration, input_file_path=input_file_path, streaming=streaming)
+        _INPUT_FILE_HANDLES[input_file_path] = input_file_handle
+    return input_file_handle
+
+
+# Assets are independent (there are no cross-asset transactions), so they can be parsed and computed in separate processes. Results are collected
+# in asset order, so the output is the same as in a serial run. All assets are processed even if some of them fail: each failure is reported
+# with the name of its asset.
+def _compute_assets_in_parallel(
+    configuration: Configuration,
+    accounting_engine: AccountingEngine,
+    assets: List[str],
+    input_file_path: str,
+    streaming: bool,
+    parse_cache: Optional[ParseCache],
+    open_lot_snapshot: Optional[OpenLotSnapshot],
+    trusted: bool,
+    generation_language: str,
+    jobs: int,
+) -> Dict[str, ComputedData]:
+    asset_to_computed_data: Dict[str, ComputedData] = {}
+    failed_assets: List[str] = []
+    LOGGER.info("Processing %d assets with %d jobs", len(assets), jobs)
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_initialize_worker, initargs=(generation_language,)) as executor:
+        asset_to_future: Dict[str, "Future[ComputedData]"] = {
+            asset: executor.submit(_compute_asset, configuration, accounting_engine, asset, input_file_path, streaming, parse_cache, open_lot_snapshot, trusted)
+            for asset in assets
+        }
+        for asset, future in asset_to_future.items():
+            try:
+                asset_to_computed_data[asset] = future.result()
+            except Exception as exc:  # pylint: disable=broad-except
+                LOGGER.error("Error processing %s:", asset, exc_info=exc)
+                failed_assets.append(asset)
+
+    if failed_assets:
+        raise RP2RuntimeError(f"Processing failed for assets: {', '.join(failed_assets)}")
+
+    return asset_to_computed_data
+
+
 def _find_and_run_report_generators(
     configuration: Configuration,
     package_paths: List[str],
@@ -177,8 +314,10 @@ def _find_and_run_report_generators(
     asset_to_computed_data: Dict[str, ComputedData],
     from_date: date,
     to_date: date,
+    parallel: bool = False,
 ) -> None:
     generators = configuration.generators.copy()
+    plugin_names: List[str] = []
     for package_path in package_paths:
         # Load report generator plugins and call their generate() method
         try:
@@ -198,25 +337,107 @@ def _find_and_run_report_generators(
             if hasattr(output_module, "Generator"):
                 generator: AbstractReportGenerator = output_module.Generator()
                 LOGGER.debug("Generator object: '%s'", generator)
-                LOGGER.info("Generating output for plugin '%s'", plugin_name)
                 if not hasattr(generator, "generate"):
                     LOGGER.error("Plugin '%s' has no 'generate' method. Exiting...", plugin_name)
                     sys.exit(1)
-                generator.generate(
-                    country=country,
-                    years_2_accounting_method_names=years_2_accounting_method_names,
-                    asset_to_computed_data=asset_to_computed_data,
-                    output_dir_path=args.output_dir,
-                    output_file_prefix=args.prefix,
-                    from_date=from_date,
-                    to_date=to_date,
-                    generation_language=args.generation_language,
-                )
+                plugin_names.append(plugin_name)
 
     if generators:
         LOGGER.error("Report generator plugins %s not found. Exiting...", ", ".join(generators))
         sys.exit(1)
 
+    generate_arguments: Tuple[AbstractCountry, Dict[int, str], str, str, date, date, str] = (
+        country,
+        years_2_accounting_method_names,
+        args.output_dir,
+        args.prefix,
+        from_date,
+        to_date,
+        args.generation_language,
+    )
+    if parallel and len(plugin_names) > 1:
+        _run_report_generators_in_parallel(plugin_names, asset_to_computed_data, generate_arguments)
+        return
+
+    for plugin_name in plugin_names:
+        _run_report_generator(plugin_name, asset_to_computed_data, *generate_arguments)
+
+
+# Generators only read the computed data, so they can run in separate processes. The computed data is passed to each worker once, via the pool
+# initializer: with the fork start method (default on Linux) it is inherited copy-on-write and not serialized at all. All generators are run even
+# if some of them fail: each failure is reported with the name of its plugin.
+def _run_report_generators_in_parallel(
+    plugin_names: List[str],
+    asset_to_computed_data: Dict[str, ComputedData],
+    generate_arguments: Tuple[AbstractCountry, Dict[int, str], str, str, date, date, str],
+) -> None:
+    failed_plugin_names: List[str] = []
+    generation_language: str = generate_arguments[-1]
+    LOGGER.info("Running %d report generators in parallel", len(plugin_names))
+    with ProcessPoolExecutor(
+        max_workers=min(len(plugin_names), os.cpu_count() or 1),
+        initializer=_initialize_generator_worker,
+        initargs=(generation_language, asset_to_computed_data),
+    ) as executor:
+        plugin_name_to_future: Dict[str, "Future[None]"] = {
+            plugin_name: executor.submit(_run_report_generator_in_worker, plugin_name, *generate_arguments) for plugin_name in plugin_names
+        }
+        for plugin_name, future in plugin_name_to_future.items():
+            try:
+                future.result()
+            except Exception as exc:  # pylint: disable=broad-except
+                LOGGER.error("Error generating output for plugin '%s':", plugin_name, exc_info=exc)
+                failed_plugin_names.append(plugin_name)
+
+    if failed_plugin_names:
+        raise RP2RuntimeError(f"Report generation failed for plugins: {', '.join(failed_plugin_names)}")
+
+
+def _initialize_generator_worker(generation_language: str, asset_to_computed_data: Dict[str, ComputedData]) -> None:
+    set_generation_language(generation_language)
+    _ASSET_TO_COMPUTED_DATA.update(asset_to_computed_data)
+
+
+def _run_report_generator_in_worker(
+    plugin_name: str,
+    country: AbstractCountry,
+    years_2_accounting_method_names: Dict[int, str],
+    output_dir: str,
+    output_file_prefix: str,
+    from_date: date,
+    to_date: date,
+    generation_language: str,
+) -> None:
+    _run_report_generator(
+        plugin_name, _ASSET_TO_COMPUTED_DATA, country, years_2_accounting_method_names, output_dir, output_file_prefix, from_date, to_date, generation_language
+    )
+
+
+def _run_report_generator(
+    plugin_name: str,
+    asset_to_computed_data: Dict[str, ComputedData],
+    country: AbstractCountry,
+    years_2_accounting_method_names: Dict[int, str],
+    output_dir: str,
+    output_file_prefix: str,
+    from_date: date,
+    to_date: date,
+    generation_language: str,
+) -> None:
+    output_module: ModuleType = import_module(plugin_name, package=REPORT_GENERATOR_PACKAGE)
+    generator: AbstractReportGenerator = output_module.Generator()
+    LOGGER.info("Generating output for plugin '%s'", plugin_name)
+    generator.generate(
+        country=country,
+        years_2_accounting_method_names=years_2_accounting_method_names,
+        asset_to_computed_data=asset_to_computed_data,
+        output_dir_path=output_dir,
+        output_file_prefix=output_file_prefix,
+        from_date=from_date,
+        to_date=to_date,
+        generation_language=generation_language,
+    )
+
 
 def _validate_accounting_methods(country: AbstractCountry) -> List[str]:
     # Load accounting method plugins
@@ -269,6 +490,31 @@ def _setup_argument_parser(country: AbstractCountry) -> ArgumentParser:
         metavar="ASSET",
         type=str,
     )
+    parser.add_argument(
+        "-c",
+        "--parse-cache",
+        action="store",
+        help="Cache parsed input data and tax engine checkpoints in CACHE_DIR and reuse them in later runs: unchanged assets are not parsed "
+        "again and the tax engine resumes from the latest checkpoint preceding the earliest changed transaction",
+        metavar="CACHE_DIR",
+        type=str,
+    )
+    parser.add_argument(
+        "--carry-forward",
+        action="store",
+        help="Start from the open lots of SNAPSHOT_FILE (generated by the open_lot_snapshot plugin) instead of from the first transaction: the "
+        "input file must only contain transactions that occurred after the snapshot date",
+        metavar="SNAPSHOT_FILE",
+        type=str,
+    )
+    parser.add_argument(
+        "--parse-cache-max-size",
+        action="store",
+        default=_DEFAULT_PARSE_CACHE_MAX_SIZE,
+        help="Maximum size of the parse cache directory in MB: least recently used entries are evicted (default: %(default)s)",
+        metavar="SIZE",
+        type=int,
+    )
     parser.add_argument(
         "-f",
         "--from_date",
@@ -287,6 +533,15 @@ def _setup_argument_parser(country: AbstractCountry) -> ArgumentParser:
         metavar="GENERATION_LANGUAGE",
         type=str,
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        action="store",
+        default=1,
+        help="Parse and compute assets in parallel, using JOBS worker processes (default: %(default)s)",
+        metavar="JOBS",
+        type=int,
+    )
     parser.add_argument(
         "-l",
         "--plugin",
@@ -313,6 +568,11 @@ def _setup_argument_parser(country: AbstractCountry) -> ArgumentParser:
         metavar="OUTPUT_DIR",
         type=str,
     )
+    parser.add_argument(
+        "--parallel-generators",
+        action="store_true",
+        help="Run report generator plugins in parallel, each in its own worker process",
+    )
     parser.add_argument(
         "-p",
         "--prefix",
@@ -322,6 +582,12 @@ def _setup_argument_parser(country: AbstractCountry) -> ArgumentParser:
         metavar="PREFIX",
         type=str,
     )
+    parser.add_argument(
+        "-s",
+        "--streaming-ods-reader",
+        action="store_true",
+        help="Read the input ODS file incrementally: faster and uses less memory on large spreadsheets",
+    )
     parser.add_argument(
         "-t",
         "--to_date",
@@ -331,6 +597,16 @@ def _setup_argument_parser(country: AbstractCountry) -> ArgumentParser:
         metavar="DATE",
         type=date.fromisoformat,
     )
+    parser.add_argument(
+        "--validation",
+        action="store",
+        default=_STRICT_VALIDATION,
+        choices=[_STRICT_VALIDATION, _TRUSTED_VALIDATION],
+        help=f"Validation level (default: '%(default)s'): '{_STRICT_VALIDATION}' checks the values returned by accounting method plugins and every "
+        f"gain/loss created by the tax engine, '{_TRUSTED_VALIDATION}' only validates input transactions (at parse time) and is faster",
+        metavar="VALIDATION",
+        type=str,
+    )
     parser.add_argument(
         "-v",
         "--version",
@@ -348,7 +624,7 @@ def _setup_argument_parser(country: AbstractCountry) -> ArgumentParser:
     parser.add_argument(
         "input_file",
         action="store",
-        help="ODS file containing input transactions",
+        help="ODS, CSV or JSONL file containing input transactions",
         metavar="INPUT",
         type=str,
     )
@@ -362,8 +638,8 @@ def _setup_paths(parser: ArgumentParser, configuration_file: str, input_file: st
         parser.print_help()
         sys.exit(1)
 
-    if not input_file.endswith(".ods"):
-        print(f"Input file '{input_file}' does not end with '.ods'")
+    if Path(input_file).suffix.lower() not in {".ods"} | TEXT_INPUT_EXTENSIONS:
+        print(f"Input file '{input_file}' does not end with '.ods', '.csv' or '.jsonl'")
         parser.print_help()
         sys.exit(1)
 
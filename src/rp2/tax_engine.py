@@ -12,7 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Iterable, Iterator, Optional, cast
+from datetime import date, datetime
+from heapq import merge
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, cast
 
 from rp2.abstract_entry import AbstractEntry
 from rp2.abstract_transaction import AbstractTransaction
@@ -24,24 +27,41 @@ from rp2.accounting_engine import (
 )
 from rp2.computed_data import ComputedData
 from rp2.configuration import MAX_DATE, MIN_DATE, Configuration
+from rp2.engine_checkpoint import EngineCheckpoint, EngineHistory, EngineHistoryRecorder
 from rp2.gain_loss import GainLoss
 from rp2.gain_loss_set import GainLossSet
 from rp2.in_transaction import InTransaction
 from rp2.input_data import InputData
 from rp2.logger import LOGGER
+from rp2.parse_cache import ParseCache
 from rp2.rp2_decimal import ZERO, RP2Decimal
 from rp2.rp2_error import RP2RuntimeError, RP2ValueError
 from rp2.transaction_set import TransactionSet
 
 
-def compute_tax(configuration: Configuration, accounting_engine: AccountingEngine, input_data: InputData) -> ComputedData:
+# If parse_cache is passed, the gain-loss computation resumes from the latest checkpoint of the previous run that precedes the earliest changed
+# transaction (see EngineHistory) and the history of this run is stored for the next one. If trusted is True, the values returned by the
+# accounting method plugins are not checked in the lot matching loop, and gain-losses are created and added to their set without
+# validation: input transactions are fully validated when they are parsed, so only plugin bugs could be missed (strict mode is the default).
+def compute_tax(
+    configuration: Configuration,
+    accounting_engine: AccountingEngine,
+    input_data: InputData,
+    parse_cache: Optional[ParseCache] = None,
+    trusted: bool = False,
+) -> ComputedData:
     Configuration.type_check("configuration", configuration)
     AccountingEngine.type_check("accounting_engine", accounting_engine)
     InputData.type_check("input_data", input_data)
+    if parse_cache is not None:
+        ParseCache.type_check("parse_cache", parse_cache)
+    Configuration.type_check_bool("trusted", trusted)
 
     unfiltered_taxable_event_set: TransactionSet = _create_unfiltered_taxable_event_set(configuration, input_data)
     LOGGER.debug("%s: Created taxable event set", input_data.asset)
-    unfiltered_gain_loss_set: GainLossSet = _create_unfiltered_gain_and_loss_set(configuration, accounting_engine, input_data, unfiltered_taxable_event_set)
+    unfiltered_gain_loss_set: GainLossSet = _create_unfiltered_gain_and_loss_set(
+        configuration, accounting_engine, input_data, unfiltered_taxable_event_set, parse_cache, trusted
+    )
     LOGGER.debug("%s: Created gain-loss set", input_data.asset)
 
     return ComputedData(
@@ -54,22 +74,55 @@ def compute_tax(configuration: Configuration, accounting_engine: AccountingEngin
     )
 
 
+# The IN, OUT and INTRA sets are already sorted by timestamp: merge their taxable events linearly into a pre-sorted set. On equal timestamps
+# merge() yields entries in argument order, which matches the stable sort of a set filled with IN, OUT and INTRA transactions in this order.
 def _create_unfiltered_taxable_event_set(configuration: Configuration, input_data: InputData) -> TransactionSet:
-    transaction_set: TransactionSet
+    return TransactionSet.from_sorted_entries(
+        configuration,
+        "MIXED",
+        input_data.asset,
+        merge(
+            _get_taxable_events_up_to_date(input_data.unfiltered_in_transaction_set, configuration.to_date),
+            _get_taxable_events_up_to_date(input_data.unfiltered_out_transaction_set, configuration.to_date),
+            _get_taxable_events_up_to_date(input_data.unfiltered_intra_transaction_set, configuration.to_date),
+            key=_get_timestamp,
+        ),
+    )
+
+
+# Taxable events after to_date don't affect the ones before it, so they are skipped
+def _get_taxable_events_up_to_date(transaction_set: TransactionSet, to_date: date) -> Iterator[AbstractTransaction]:
     entry: AbstractEntry
-    transaction: AbstractTransaction
-    taxable_event_set: TransactionSet = TransactionSet(configuration, "MIXED", input_data.asset, MIN_DATE, MAX_DATE)
-    for transaction_set in [
-        input_data.unfiltered_in_transaction_set,
-        input_data.unfiltered_out_transaction_set,
-        input_data.unfiltered_intra_transaction_set,
-    ]:
-        for entry in transaction_set:
-            transaction = cast(AbstractTransaction, entry)
-            if transaction.is_taxable():
-                taxable_event_set.add_entry(transaction)
+    for entry in transaction_set:
+        transaction: AbstractTransaction = cast(AbstractTransaction, entry)
+        if transaction.timestamp.date() > to_date:
+            return
+        if transaction.is_taxable():
+            yield transaction
 
-    return taxable_event_set
+
+def _get_timestamp(transaction: AbstractTransaction) -> datetime:
+    return transaction.timestamp
+
+
+# Acquired lots newer than the last taxable event are never matched, so they are skipped. Lots are compared by absolute timestamp, not by
+# date: with mixed UTC offsets a lot can have a later local date than a taxable event it precedes. The first acquired lot is always returned,
+# because the accounting engine needs at least one.
+def _get_acquired_lots_up_to(in_transaction_set: TransactionSet, last_taxable_event_timestamp: Optional[datetime]) -> Iterator[InTransaction]:
+    index: int
+    acquired_lot: InTransaction
+    for index, acquired_lot in enumerate(cast(Iterable[InTransaction], in_transaction_set)):
+        if index > 0 and (last_taxable_event_timestamp is None or acquired_lot.timestamp > last_taxable_event_timestamp):
+            return
+        yield acquired_lot
+
+
+def _get_last_timestamp(transaction_set: TransactionSet) -> Optional[datetime]:
+    result: Optional[datetime] = None
+    entry: AbstractEntry
+    for entry in transaction_set:
+        result = entry.timestamp
+    return result
 
 
 def _get_next_taxable_event_and_acquired_lot(
@@ -83,41 +136,117 @@ def _get_next_taxable_event_and_acquired_lot(
     new_acquired_lot: Optional[InTransaction]
     new_taxable_event_amount: RP2Decimal
     new_acquired_lot_amount: RP2Decimal
-    (new_taxable_event, new_acquired_lot, new_taxable_event_amount, new_acquired_lot_amount) = accounting_engine.get_next_taxable_event_and_amount(
+    new_taxable_event, new_acquired_lot, new_taxable_event_amount, new_acquired_lot_amount = accounting_engine.get_next_taxable_event_and_amount(
         taxable_event, acquired_lot, taxable_event_amount, acquired_lot_amount
     )
     if acquired_lot == new_acquired_lot:
-        (_, new_acquired_lot, _, new_acquired_lot_amount) = accounting_engine.get_acquired_lot_for_taxable_event(
+        _, new_acquired_lot, _, new_acquired_lot_amount = accounting_engine.get_acquired_lot_for_taxable_event(
             new_taxable_event, new_acquired_lot, new_taxable_event_amount, new_acquired_lot_amount
         )
     return TaxableEventAndAcquiredLot(new_taxable_event, new_acquired_lot, new_taxable_event_amount, new_acquired_lot_amount)
 
 
 def _create_unfiltered_gain_and_loss_set(
-    configuration: Configuration, accounting_engine: AccountingEngine, input_data: InputData, unfiltered_taxable_event_set: TransactionSet
+    configuration: Configuration,
+    accounting_engine: AccountingEngine,
+    input_data: InputData,
+    unfiltered_taxable_event_set: TransactionSet,
+    parse_cache: Optional[ParseCache] = None,
+    trusted: bool = False,
 ) -> GainLossSet:
     gain_loss_set: GainLossSet = GainLossSet(configuration, input_data.asset, MIN_DATE, MAX_DATE)
     # Create a fresh instance of accounting engine
     new_accounting_engine: AccountingEngine = accounting_engine.__class__(accounting_engine.years_2_methods)
     taxable_event_iterator: Iterator[AbstractTransaction] = iter(cast(Iterable[AbstractTransaction], unfiltered_taxable_event_set))
-    acquired_lot_iterator: Iterator[InTransaction] = iter(cast(Iterable[InTransaction], input_data.unfiltered_in_transaction_set))
+    # Taxable events stop at to_date (see _create_unfiltered_taxable_event_set) and acquired lots newer than a taxable event are never matched
+    # to it, so acquired lots after the last taxable event are not needed
+    acquired_lot_iterator: Iterator[InTransaction] = _get_acquired_lots_up_to(
+        input_data.unfiltered_in_transaction_set, _get_last_timestamp(unfiltered_taxable_event_set)
+    )
 
-    new_accounting_engine.initialize(taxable_event_iterator, acquired_lot_iterator)
+    recorder: Optional[EngineHistoryRecorder] = None
+    checkpoint: Optional[EngineCheckpoint] = None
+    accounting_methods_key: str = ""
+    taxable_event_list: List[AbstractTransaction] = []
+    acquired_lot_list: List[InTransaction] = []
+    if parse_cache is not None:
+        # Accounting methods are identified by the representation of the year -> method tree
+        accounting_methods_key = repr(accounting_engine.years_2_methods.root)
+        taxable_event_list = list(cast(Iterable[AbstractTransaction], unfiltered_taxable_event_set))
+        acquired_lot_list = list(acquired_lot_iterator)
+        history: EngineHistory = EngineHistory(taxable_event_list, acquired_lot_list)
+        previous_history: Optional[EngineHistory] = parse_cache.load_engine_history(input_data.asset, accounting_methods_key)
+        if previous_history is not None:
+            checkpoint = history.restore(previous_history)
+        recorder = EngineHistoryRecorder(history, taxable_event_list, acquired_lot_list)
+        # Skip the taxable events that precede the checkpoint (including the checkpoint's own, which is restored below)
+        taxable_event_iterator = islice(iter(taxable_event_list), checkpoint.taxable_event_index + 1 if checkpoint else 0, None)
+        acquired_lot_iterator = iter(acquired_lot_list)
+        new_accounting_engine.initialize(taxable_event_iterator, acquired_lot_iterator, history.partial_amount_journal)
+    else:
+        new_accounting_engine.initialize(taxable_event_iterator, acquired_lot_iterator)
 
     try:
-        gain_loss: GainLoss
-        taxable_event: AbstractTransaction
-        acquired_lot: Optional[InTransaction]
-        taxable_event_amount: RP2Decimal
-        acquired_lot_amount: RP2Decimal
+        state: TaxableEventAndAcquiredLot
         total_amount: RP2Decimal = ZERO
 
-        # Retrieve first taxable event and acquired lot
-        (taxable_event, acquired_lot, taxable_event_amount, acquired_lot_amount) = _get_next_taxable_event_and_acquired_lot(
-            new_accounting_engine, None, None, ZERO, ZERO
-        )
+        if checkpoint is not None and recorder is not None:
+            # Resume from the checkpoint: gain-losses preceding it are rebuilt from the history, using the new transactions
+            LOGGER.debug("%s: Resuming tax engine from taxable event %d", input_data.asset, checkpoint.taxable_event_index)
+            for taxable_event_index, acquired_lot_index, crypto_amount in recorder.history.gain_losses:
+                _add_gain_loss(
+                    configuration,
+                    gain_loss_set,
+                    crypto_amount,
+                    taxable_event_list[taxable_event_index],
+                    acquired_lot_list[acquired_lot_index] if acquired_lot_index >= 0 else None,
+                    None,
+                    trusted,
+                )
+            state = TaxableEventAndAcquiredLot(
+                taxable_event_list[checkpoint.taxable_event_index],
+                acquired_lot_list[checkpoint.acquired_lot_index] if checkpoint.acquired_lot_index >= 0 else None,
+                checkpoint.taxable_event_amount,
+                checkpoint.acquired_lot_amount,
+            )
+            total_amount = checkpoint.total_amount
+        else:
+            # Retrieve first taxable event and acquired lot
+            state = _get_next_taxable_event_and_acquired_lot(new_accounting_engine, None, None, ZERO, ZERO)
+
+        _process_taxable_events(configuration, new_accounting_engine, gain_loss_set, state, total_amount, recorder, trusted)
+
+    except AcquiredLotsExhaustedException:
+        raise RP2ValueError("Total in-transaction crypto value < total taxable crypto value") from None
+    except TaxableEventsExhaustedException:
+        pass
+
+    if parse_cache is not None and recorder is not None:
+        parse_cache.store_engine_history(input_data.asset, accounting_methods_key, recorder.history)
+
+    return gain_loss_set
+
 
-        while taxable_event:
+# Matches taxable events to acquired lots, starting from the given state, and adds the resulting gain-losses to gain_loss_set
+def _process_taxable_events(
+    configuration: Configuration,
+    accounting_engine: AccountingEngine,
+    gain_loss_set: GainLossSet,
+    state: TaxableEventAndAcquiredLot,
+    total_amount: RP2Decimal,
+    recorder: Optional[EngineHistoryRecorder],
+    trusted: bool,
+) -> None:
+    taxable_event: AbstractTransaction
+    acquired_lot: Optional[InTransaction]
+    taxable_event_amount: RP2Decimal
+    acquired_lot_amount: RP2Decimal
+    taxable_event, acquired_lot, taxable_event_amount, acquired_lot_amount = state
+
+    while taxable_event:
+        if recorder is not None:
+            recorder.record_checkpoint(taxable_event, acquired_lot, taxable_event_amount, acquired_lot_amount, total_amount)
+        if not trusted:
             # Type check values returned by accounting method plugin
             AbstractTransaction.type_check("taxable_event", taxable_event)
             if acquired_lot is None:
@@ -127,75 +256,85 @@ def _create_unfiltered_gain_and_loss_set(
             Configuration.type_check_positive_decimal("taxable_event_amount", taxable_event_amount)
             Configuration.type_check_positive_decimal("acquired_lot_amount", acquired_lot_amount)
 
-            if taxable_event.transaction_type.is_earn_type():
-                # Handle earn-typed transactions first: they have no acquired-lot
-                gain_loss = GainLoss(configuration, taxable_event_amount, taxable_event, None)
-                LOGGER.debug(
-                    "tax_engine: taxable is earn: %s / %s + %s = %s: %s",
-                    taxable_event_amount,
-                    total_amount,
-                    taxable_event_amount,
-                    total_amount + taxable_event_amount,
-                    gain_loss,
-                )
-                total_amount += taxable_event_amount
-                gain_loss_set.add_entry(gain_loss)
-                (taxable_event, acquired_lot, taxable_event_amount, acquired_lot_amount) = new_accounting_engine.get_next_taxable_event_and_amount(
-                    taxable_event, acquired_lot, ZERO, acquired_lot_amount
-                )
-                continue
-            if taxable_event_amount == acquired_lot_amount:
-                gain_loss = GainLoss(configuration, taxable_event_amount, taxable_event, acquired_lot)
-                LOGGER.debug(
-                    "tax_engine: taxable == acquired: %s == %s / %s + %s = %s: %s",
-                    taxable_event_amount,
-                    acquired_lot_amount,
-                    total_amount,
-                    taxable_event_amount,
-                    total_amount + taxable_event_amount,
-                    gain_loss,
-                )
-                total_amount += taxable_event_amount
-                gain_loss_set.add_entry(gain_loss)
-                (taxable_event, acquired_lot, taxable_event_amount, acquired_lot_amount) = _get_next_taxable_event_and_acquired_lot(
-                    new_accounting_engine, taxable_event, acquired_lot, taxable_event_amount, acquired_lot_amount
-                )
-            elif taxable_event_amount < acquired_lot_amount:
-                gain_loss = GainLoss(configuration, taxable_event_amount, taxable_event, acquired_lot)
-                LOGGER.debug(
-                    "tax_engine: taxable < acquired: %s < %s / %s + %s = %s: %s",
-                    taxable_event_amount,
-                    acquired_lot_amount,
-                    total_amount,
-                    taxable_event_amount,
-                    total_amount + taxable_event_amount,
-                    gain_loss,
-                )
-                total_amount += taxable_event_amount
-                gain_loss_set.add_entry(gain_loss)
-                (taxable_event, acquired_lot, taxable_event_amount, acquired_lot_amount) = new_accounting_engine.get_next_taxable_event_and_amount(
-                    taxable_event, acquired_lot, taxable_event_amount, acquired_lot_amount
-                )
-            else:  # taxable_amount > acquired_lot_amount
-                gain_loss = GainLoss(configuration, acquired_lot_amount, taxable_event, acquired_lot)
-                LOGGER.debug(
-                    "tax_engine: taxable > acquired: %s > %s / %s + %s = %s: %s",
-                    taxable_event_amount,
-                    acquired_lot_amount,
-                    total_amount,
-                    acquired_lot_amount,
-                    total_amount + acquired_lot_amount,
-                    gain_loss,
-                )
-                total_amount += acquired_lot_amount
-                gain_loss_set.add_entry(gain_loss)
-                (taxable_event, acquired_lot, taxable_event_amount, acquired_lot_amount) = new_accounting_engine.get_acquired_lot_for_taxable_event(
-                    taxable_event, acquired_lot, taxable_event_amount, acquired_lot_amount
-                )
+        if taxable_event.transaction_type.is_earn_type():
+            # Handle earn-typed transactions first: they have no acquired-lot
+            LOGGER.debug(
+                "tax_engine: taxable is earn: %s / %s + %s = %s: %s->None",
+                taxable_event_amount,
+                total_amount,
+                taxable_event_amount,
+                total_amount + taxable_event_amount,
+                taxable_event.internal_id,
+            )
+            total_amount += taxable_event_amount
+            _add_gain_loss(configuration, gain_loss_set, taxable_event_amount, taxable_event, None, recorder, trusted)
+            taxable_event, acquired_lot, taxable_event_amount, acquired_lot_amount = accounting_engine.get_next_taxable_event_and_amount(
+                taxable_event, acquired_lot, ZERO, acquired_lot_amount
+            )
+            continue
+        if taxable_event_amount == acquired_lot_amount:
+            LOGGER.debug(
+                "tax_engine: taxable == acquired: %s == %s / %s + %s = %s: %s->%s",
+                taxable_event_amount,
+                acquired_lot_amount,
+                total_amount,
+                taxable_event_amount,
+                total_amount + taxable_event_amount,
+                taxable_event.internal_id,
+                acquired_lot.internal_id if acquired_lot else None,
+            )
+            total_amount += taxable_event_amount
+            _add_gain_loss(configuration, gain_loss_set, taxable_event_amount, taxable_event, acquired_lot, recorder, trusted)
+            taxable_event, acquired_lot, taxable_event_amount, acquired_lot_amount = _get_next_taxable_event_and_acquired_lot(
+                accounting_engine, taxable_event, acquired_lot, taxable_event_amount, acquired_lot_amount
+            )
+        elif taxable_event_amount < acquired_lot_amount:
+            LOGGER.debug(
+                "tax_engine: taxable < acquired: %s < %s / %s + %s = %s: %s->%s",
+                taxable_event_amount,
+                acquired_lot_amount,
+                total_amount,
+                taxable_event_amount,
+                total_amount + taxable_event_amount,
+                taxable_event.internal_id,
+                acquired_lot.internal_id if acquired_lot else None,
+            )
+            total_amount += taxable_event_amount
+            _add_gain_loss(configuration, gain_loss_set, taxable_event_amount, taxable_event, acquired_lot, recorder, trusted)
+            taxable_event, acquired_lot, taxable_event_amount, acquired_lot_amount = accounting_engine.get_next_taxable_event_and_amount(
+                taxable_event, acquired_lot, taxable_event_amount, acquired_lot_amount
+            )
+        else:  # taxable_amount > acquired_lot_amount
+            LOGGER.debug(
+                "tax_engine: taxable > acquired: %s > %s / %s + %s = %s: %s->%s",
+                taxable_event_amount,
+                acquired_lot_amount,
+                total_amount,
+                acquired_lot_amount,
+                total_amount + acquired_lot_amount,
+                taxable_event.internal_id,
+                acquired_lot.internal_id if acquired_lot else None,
+            )
+            total_amount += acquired_lot_amount
+            _add_gain_loss(configuration, gain_loss_set, acquired_lot_amount, taxable_event, acquired_lot, recorder, trusted)
+            taxable_event, acquired_lot, taxable_event_amount, acquired_lot_amount = accounting_engine.get_acquired_lot_for_taxable_event(
+                taxable_event, acquired_lot, taxable_event_amount, acquired_lot_amount
+            )
 
-    except AcquiredLotsExhaustedException:
-        raise RP2ValueError("Total in-transaction crypto value < total taxable crypto value") from None
-    except TaxableEventsExhaustedException:
-        pass
 
-    return gain_loss_set
+# In trusted validation mode no GainLoss is created: the gain-loss set stores the values in its columns and creates GainLoss objects on demand
+def _add_gain_loss(
+    configuration: Configuration,
+    gain_loss_set: GainLossSet,
+    crypto_amount: RP2Decimal,
+    taxable_event: AbstractTransaction,
+    acquired_lot: Optional[InTransaction],
+    recorder: Optional[EngineHistoryRecorder],
+    trusted: bool,
+) -> None:
+    if trusted:
+        gain_loss_set.add_trusted_gain_loss(taxable_event, acquired_lot, crypto_amount)
+    else:
+        gain_loss_set.add_entry(GainLoss(configuration, crypto_amount, taxable_event, acquired_lot))
+    if recorder is not None:
+        recorder.record_gain_loss(taxable_event, acquired_lot, crypto_amount)
@@ -0,0 +1,77 @@
+# Copyright 2021 eprbell
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import csv
+import json
+from pathlib import Path
+from typing import IO, Iterator, List, Sequence, Set, Tuple, cast
+
+from rp2.rp2_error import RP2ValueError
+
+CSV_EXTENSION: str = ".csv"
+JSONL_EXTENSION: str = ".jsonl"
+TEXT_INPUT_EXTENSIONS: Set[str] = {CSV_EXTENSION, JSONL_EXTENSION}
+
+# utf-8-sig skips the byte order mark that some spreadsheet applications prepend to exported CSV files
+_ENCODING: str = "utf-8-sig"
+
+
+# Reader for text-based input files: CSV (one row per record) or JSONL (one JSON array per line). The file has the same layout as a sheet of
+# the ODS input (IN/OUT/INTRA tables, each with begin keyword, header and TABLE END), but it contains the transactions of all assets: each asset
+# gets the rows whose asset column matches it (see parse_ods()). Cell values are kept as strings, so numeric values are converted to RP2Decimal
+# without precision loss (JSON numbers are not converted to float either). Empty cells are read as None, like empty ODS cells.
+class TextInputReader:
+    def __init__(self, input_file_path: str) -> None:
+        self.__input_file_path: str = input_file_path
+        self.__extension: str = Path(input_file_path).suffix.lower()
+        if self.__extension not in TEXT_INPUT_EXTENSIONS:
+            raise RP2ValueError(f"Error: {input_file_path} is not a CSV or JSONL file")
+
+    @property
+    def input_file_path(self) -> str:
+        return self.__input_file_path
+
+    # Yields (row index, row values) tuples: row values contain max(column_set) + 1 elements (shorter rows are padded with None). The file is
+    # read lazily, so memory usage doesn't depend on its size.
+    def rows(self, column_set: Set[int]) -> Iterator[Tuple[int, List[object]]]:
+        column_count: int = max(column_set) + 1
+        with open(self.__input_file_path, encoding=_ENCODING, newline="") as input_file:
+            row_index: int
+            raw_row: Sequence[object]
+            for row_index, raw_row in enumerate(self._raw_rows(input_file)):
+                row_values: List[object] = [None if value == "" else value for value in raw_row[:column_count]]
+                if len(row_values) < column_count:
+                    row_values.extend([None] * (column_count - len(row_values)))
+                yield (row_index, row_values)
+
+    def _raw_rows(self, input_file: IO[str]) -> Iterator[Sequence[object]]:
+        if self.__extension == CSV_EXTENSION:
+            return csv.reader(input_file)
+        return self._json_rows(input_file)
+
+    def _json_rows(self, input_file: IO[str]) -> Iterator[List[object]]:
+        line_number: int
+        line: str
+        for line_number, line in enumerate(input_file, start=1):
+            if not line.strip():
+                yield []
+                continue
+            try:
+                # Numbers are kept as strings to avoid float precision loss
+                row: object = cast(object, json.loads(line, parse_float=str, parse_int=str))
+            except ValueError as exc:
+                raise RP2ValueError(f"{self.__input_file_path}({line_number}): invalid JSON: {exc}") from exc
+            if not isinstance(row, list):
+                raise RP2ValueError(f"{self.__input_file_path}({line_number}): line is not a JSON array")
+            yield cast(List[object], row)
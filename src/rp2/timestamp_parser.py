@@ -0,0 +1,84 @@
+# Copyright 2021 eprbell
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import re
+from datetime import datetime, tzinfo
+from functools import lru_cache
+from typing import Callable, Dict, Optional, Pattern, cast
+
+from dateutil.parser import parse
+from dateutil.tz import tzoffset, tzutc
+
+_TIMESTAMP_CACHE_SIZE: int = 65536
+_SECONDS_IN_DAY: int = 86400
+
+# Strict subset of ISO 8601 covering the timestamps produced by DaLI, exchanges and spreadsheet exports: e.g. 2020-06-21T23:29:03.117Z,
+# 2020-12-01 03:59:49 -04:00. Everything else goes through dateutil.
+_ISO_8601_TIMESTAMP: Pattern[str] = re.compile(r"(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2})(?::(\d{2})(?:\.(\d{1,6}))?)? ?(?:(Z)|([+-])(\d{2}):?(\d{2})?)")
+
+_UTC: tzinfo = tzutc()
+# Timezone objects are shared by all timestamps with the same UTC offset
+_OFFSET_2_TZINFO: Dict[int, tzinfo] = {}
+
+
+# Parses a timestamp string. Timestamps in strict ISO 8601 format are parsed directly (dateutil is much slower), all others are parsed with
+# dateutil.
+def _parse_timestamp(value: str) -> datetime:
+    result: Optional[datetime] = _parse_iso_8601_timestamp(value)
+    return result if result is not None else parse(value)
+
+
+# Memoized _parse_timestamp(): datetime instances are immutable, so they can be shared by multiple transactions (lru_cache() is untyped, hence
+# the cast).
+parse_timestamp: Callable[[str], datetime] = cast(Callable[[str], datetime], lru_cache(maxsize=_TIMESTAMP_CACHE_SIZE)(_parse_timestamp))
+
+
+def _parse_iso_8601_timestamp(value: str) -> Optional[datetime]:
+    match = _ISO_8601_TIMESTAMP.fullmatch(value)
+    if match is None:
+        return None
+    # Groups that didn't participate in the match are empty strings
+    year, month, day, hour, minute, second, fraction, utc, offset_sign, offset_hours, offset_minutes = match.groups("")
+    timezone: tzinfo = _UTC
+    if not utc:
+        offset: int = int(offset_hours) * 3600 + (int(offset_minutes) * 60 if offset_minutes else 0)
+        if offset_sign == "-":
+            offset = -offset
+        if abs(offset) >= _SECONDS_IN_DAY:
+            return None
+        timezone = _get_tzinfo(offset)
+    try:
+        return datetime(
+            int(year),
+            int(month),
+            int(day),
+            int(hour),
+            int(minute),
+            int(second) if second else 0,
+            int(fraction.ljust(6, "0")) if fraction else 0,
+            tzinfo=timezone,
+        )
+    except ValueError:
+        # Out-of-range field: let dateutil generate the error message
+        return None
+
+
+def _get_tzinfo(offset: int) -> tzinfo:
+    if offset == 0:
+        return _UTC
+    result: Optional[tzinfo] = _OFFSET_2_TZINFO.get(offset)
+    if result is None:
+        result = tzoffset(None, offset)
+        _OFFSET_2_TZINFO[offset] = result
+    return result
@@ -12,10 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from datetime import date
+from typing import Iterable
+
 from rp2.abstract_entry import AbstractEntry
 from rp2.abstract_entry_set import AbstractEntrySet
 from rp2.abstract_transaction import AbstractTransaction
-from rp2.configuration import Configuration
+from rp2.configuration import MAX_DATE, MIN_DATE, Configuration
 from rp2.entry_types import EntrySetType
 from rp2.rp2_error import RP2TypeError, RP2ValueError
 
@@ -34,6 +37,22 @@ class TransactionSet(AbstractEntrySet):
             raise RP2ValueError(f"IN transaction set is empty: {instance}")
         return instance
 
+    # Create a set out of transactions that are already sorted by timestamp and valid for the set (e.g. merged from other transaction sets of
+    # the same asset): see AbstractEntrySet._adopt_sorted_entries().
+    @classmethod
+    def from_sorted_entries(
+        cls,
+        configuration: Configuration,
+        entry_set_type: str,
+        asset: str,
+        entries: Iterable[AbstractTransaction],
+        from_date: date = MIN_DATE,
+        to_date: date = MAX_DATE,
+    ) -> "TransactionSet":
+        result: TransactionSet = cls(configuration, entry_set_type, asset, from_date, to_date)
+        result._adopt_sorted_entries(entries)
+        return result
+
     def add_entry(self, entry: AbstractEntry) -> None:
         AbstractTransaction.type_check("entry", entry)
         super().add_entry(entry)
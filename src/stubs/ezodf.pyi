@@ -12,13 +12,19 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from typing import Optional
+from typing import Optional, Tuple
 
 class PackagedDocument:
     def __init__(self, name: str) -> None: ...
 
 class Table:
-    def __init__(self, name: str) -> None: ...
+    def __init__(self, name: str, size: Tuple[int, int] = ...) -> None: ...
+
+class Config:
+    def set_table_expand_strategy(self, value: str) -> None: ...
+    def reset_table_expand_strategy(self) -> None: ...
+
+config: Config
 
 def opendoc(filename: str) -> PackagedDocument: ...
 def newdoc(doctype: str, filename: str, template: Optional[str]) -> PackagedDocument: ...
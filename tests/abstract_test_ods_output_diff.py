@@ -68,6 +68,9 @@ class AbstractTestODSOutputDiff(unittest.TestCase):
         to_date: date = MAX_DATE,
         generation_language: Optional[str] = None,
         country: str = "us",
+        jobs: int = 1,
+        parallel_generators: bool = False,
+        validation: Optional[str] = None,
     ) -> None:
         config = test_name if config is None else config
         time_interval: str = cls.__get_time_interval(from_date, to_date)
@@ -87,6 +90,12 @@ class AbstractTestODSOutputDiff(unittest.TestCase):
             arguments.extend(["-f", str(from_date)])
         if to_date:
             arguments.extend(["-t", str(to_date)])
+        if jobs > 1:
+            arguments.extend(["-j", str(jobs)])
+        if parallel_generators:
+            arguments.append("--parallel-generators")
+        if validation:
+            arguments.extend(["--validation", validation])
         arguments.extend(
             [
                 str(CONFIG_PATH / Path(f"{config}.ini")),
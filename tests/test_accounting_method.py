@@ -0,0 +1,147 @@
+# Copyright 2022 eprbell
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+from typing import Dict, List, Optional
+
+from prezzemolo.avl_tree import AVLTree
+
+from rp2.abstract_accounting_method import (
+    AbstractAccountingMethod,
+    AcquiredLotAndAmount,
+    AcquiredLotCandidates,
+    AcquiredLotCandidatesOrder,
+    AcquiredLotIndexType,
+)
+from rp2.abstract_transaction import AbstractTransaction
+from rp2.accounting_engine import AccountingEngine
+from rp2.computed_data import ComputedData
+from rp2.configuration import MIN_DATE, Configuration
+from rp2.in_transaction import InTransaction
+from rp2.input_data import InputData
+from rp2.ods_parser import open_ods, parse_ods
+from rp2.plugin.accounting_method.fifo import AccountingMethod as FIFOAccountingMethod
+from rp2.plugin.accounting_method.hifo import AccountingMethod as HIFOAccountingMethod
+from rp2.plugin.accounting_method.lifo import AccountingMethod as LIFOAccountingMethod
+from rp2.plugin.country.us import US
+from rp2.rp2_decimal import ZERO, RP2Decimal
+from rp2.rp2_error import RP2RuntimeError
+from rp2.tax_engine import compute_tax
+
+
+# Reference implementation using the ARBITRARY lot index: it scans all candidates at every taxable event, like third-party plugins do.
+class _ScanAccountingMethod(AbstractAccountingMethod):
+    def __init__(self, order: AcquiredLotCandidatesOrder, select_highest_price: bool) -> None:
+        self.__order: AcquiredLotCandidatesOrder = order
+        self.__select_highest_price: bool = select_highest_price
+
+    def seek_non_exhausted_acquired_lot(
+        self,
+        lot_candidates: AcquiredLotCandidates,
+        taxable_event: Optional[AbstractTransaction],
+        taxable_event_amount: RP2Decimal,
+    ) -> Optional[AcquiredLotAndAmount]:
+        selected_acquired_lot: Optional[InTransaction] = None
+        acquired_lot: InTransaction
+        for acquired_lot in lot_candidates:
+            if not lot_candidates.is_non_exhausted(acquired_lot):
+                continue
+            if selected_acquired_lot is None or (self.__select_highest_price and selected_acquired_lot.spot_price < acquired_lot.spot_price):
+                selected_acquired_lot = acquired_lot
+                if not self.__select_highest_price:
+                    break
+        if selected_acquired_lot is None:
+            return None
+        amount: RP2Decimal = lot_candidates.get_amount(selected_acquired_lot)
+        lot_candidates.clear_partial_amount(selected_acquired_lot)
+        return AcquiredLotAndAmount(acquired_lot=selected_acquired_lot, amount=amount)
+
+    def lot_candidates_order(self) -> AcquiredLotCandidatesOrder:
+        return self.__order
+
+
+# HEAP method that doesn't override heap_key()
+class _BadHeapAccountingMethod(AbstractAccountingMethod):
+    def lot_index_type(self) -> AcquiredLotIndexType:
+        return AcquiredLotIndexType.HEAP
+
+    def lot_candidates_order(self) -> AcquiredLotCandidatesOrder:
+        return AcquiredLotCandidatesOrder.OLDER_TO_NEWER
+
+
+class TestAccountingMethod(unittest.TestCase):
+    _configuration: Configuration
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        TestAccountingMethod._configuration = Configuration("./config/test_data.ini", US())
+
+    def setUp(self) -> None:
+        self.maxDiff = None  # pylint: disable=invalid-name
+
+    def test_lot_index_types(self) -> None:
+        self.assertEqual(FIFOAccountingMethod().lot_index_type(), AcquiredLotIndexType.QUEUE)
+        self.assertEqual(LIFOAccountingMethod().lot_index_type(), AcquiredLotIndexType.STACK)
+        self.assertEqual(HIFOAccountingMethod().lot_index_type(), AcquiredLotIndexType.HEAP)
+        self.assertEqual(_ScanAccountingMethod(AcquiredLotCandidatesOrder.OLDER_TO_NEWER, False).lot_index_type(), AcquiredLotIndexType.ARBITRARY)
+
+    def test_default_heap_key(self) -> None:
+        acquired_lot: InTransaction = InTransaction(
+            self._configuration, "2020-01-01 00:00:00 +00:00", "B1", "Coinbase", "Bob", "BUY", RP2Decimal("100"), RP2Decimal("1"), internal_id=1
+        )
+        self.assertEqual(FIFOAccountingMethod().heap_key(acquired_lot), ZERO)
+        with self.assertRaisesRegex(RP2RuntimeError, "has a HEAP lot index but doesn't override heap_key()"):
+            _BadHeapAccountingMethod().heap_key(acquired_lot)
+
+    def test_indexed_methods_match_scan(self) -> None:
+        method_pairs: Dict[str, List[AbstractAccountingMethod]] = {
+            "fifo": [FIFOAccountingMethod(), _ScanAccountingMethod(AcquiredLotCandidatesOrder.OLDER_TO_NEWER, False)],
+            "lifo": [LIFOAccountingMethod(), _ScanAccountingMethod(AcquiredLotCandidatesOrder.NEWER_TO_OLDER, False)],
+            "hifo": [HIFOAccountingMethod(), _ScanAccountingMethod(AcquiredLotCandidatesOrder.OLDER_TO_NEWER, True)],
+        }
+        for asset in ["B1", "B2", "B3", "B4"]:
+            for method_name, (indexed_method, scan_method) in method_pairs.items():
+                with self.subTest(asset=asset, method=method_name):
+                    self.assertEqual(self._compute_gain_loss_set(asset, indexed_method), self._compute_gain_loss_set(asset, scan_method))
+
+    def test_mixed_methods_match_scan(self) -> None:
+        indexed_years_2_methods = AVLTree[int, AbstractAccountingMethod]()
+        indexed_years_2_methods.insert_node(MIN_DATE.year, HIFOAccountingMethod())
+        indexed_years_2_methods.insert_node(2020, LIFOAccountingMethod())
+        indexed_years_2_methods.insert_node(2021, FIFOAccountingMethod())
+        scan_years_2_methods = AVLTree[int, AbstractAccountingMethod]()
+        scan_years_2_methods.insert_node(MIN_DATE.year, _ScanAccountingMethod(AcquiredLotCandidatesOrder.OLDER_TO_NEWER, True))
+        scan_years_2_methods.insert_node(2020, _ScanAccountingMethod(AcquiredLotCandidatesOrder.NEWER_TO_OLDER, False))
+        scan_years_2_methods.insert_node(2021, _ScanAccountingMethod(AcquiredLotCandidatesOrder.OLDER_TO_NEWER, False))
+        for asset in ["B1", "B2", "B3", "B4"]:
+            with self.subTest(asset=asset):
+                self.assertEqual(
+                    self._compute_gain_loss_set_with_engine(asset, AccountingEngine(indexed_years_2_methods)),
+                    self._compute_gain_loss_set_with_engine(asset, AccountingEngine(scan_years_2_methods)),
+                )
+
+    def _compute_gain_loss_set(self, asset: str, method: AbstractAccountingMethod) -> str:
+        years_2_methods = AVLTree[int, AbstractAccountingMethod]()
+        years_2_methods.insert_node(MIN_DATE.year, method)
+        return self._compute_gain_loss_set_with_engine(asset, AccountingEngine(years_2_methods))
+
+    def _compute_gain_loss_set_with_engine(self, asset: str, accounting_engine: AccountingEngine) -> str:
+        input_file_handle: object = open_ods(self._configuration, "./input/test_data.ods")
+        input_data: InputData = parse_ods(self._configuration, asset, input_file_handle)
+        computed_data: ComputedData = compute_tax(self._configuration, accounting_engine, input_data)
+        return str(computed_data.gain_loss_set)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -19,10 +19,11 @@ from datetime import datetime
 from tempfile import NamedTemporaryFile
 from typing import Optional
 
+from dateutil.parser import parse
 from dateutil.tz import tzoffset, tzutc
 
 from rp2.abstract_country import AbstractCountry
-from rp2.configuration import Configuration, Keyword
+from rp2.configuration import REPORT_GENERATOR_PACKAGE, Configuration, Keyword
 from rp2.plugin.country.us import US
 from rp2.rp2_decimal import ZERO, RP2Decimal
 from rp2.rp2_error import RP2TypeError, RP2ValueError
@@ -310,6 +311,26 @@ class TestConfiguration(unittest.TestCase):
         # Temporarily removed lifo and hifo due to https://github.com/eprbell/rp2/issues/79
         # config[Keyword.ACCOUNTING_METHODS.value] = {"1970": "hifo", "2020": "lifo"}
 
+    def test_generators(self) -> None:
+        config = ConfigParser()
+        config.read("./config/test_data.ini")
+
+        # Without the generators field the default generators of the country are used
+        self.assertEqual(
+            self._test_config(config).generators,
+            {f"{REPORT_GENERATOR_PACKAGE}.{generator}" for generator in self._country.get_report_generators()},
+        )
+
+        config[Keyword.GENERAL.value][Keyword.GENERATORS.value] = "csv_report, us.tax_report_us"
+        self.assertEqual(
+            self._test_config(config).generators,
+            {f"{REPORT_GENERATOR_PACKAGE}.csv_report", f"{REPORT_GENERATOR_PACKAGE}.us.tax_report_us"},
+        )
+
+        config[Keyword.GENERAL.value][Keyword.GENERATORS.value] = ",,,"
+        with self.assertRaisesRegex(RP2ValueError, f"field .* in section '{Keyword.GENERAL.value}' cannot contain empty elements"):
+            self._test_config(config)
+
     def test_creation(self) -> None:
         with self.assertRaisesRegex(RP2TypeError, "Parameter 'country' is not of type AbstractCountry: .*"):
             Configuration("./config/test_data.ini", None)  # type: ignore
@@ -472,6 +493,37 @@ class TestConfiguration(unittest.TestCase):
         with self.assertRaisesRegex(RP2ValueError, "Unknown string format: .*"):
             self._configuration.type_check_timestamp_from_string("timestamp", "foo bar baz")
 
+    def test_timestamp_fast_path(self) -> None:
+        # ISO 8601 timestamps are parsed without dateutil: results must be the same as dateutil's
+        for value in [
+            "2020-06-21T23:29:03.117Z",
+            "2020-06-21T23:29:03Z",
+            "2020-06-21T23:29Z",
+            "2020-06-21 23:29:03.000001+00:00",
+            "2020-12-01 03:59:49 -04:00",
+            "2020-12-01T03:59:49+0530",
+            "2020-12-01T03:59:49-03",
+            "2020-12-01T03:59:49.123456789Z",
+            "12/01/2020 03:59:49 -04:00",
+        ]:
+            with self.subTest(value=value):
+                timestamp: datetime = self._configuration.type_check_timestamp_from_string("timestamp", value)
+                expected_timestamp: datetime = parse(value)
+                self.assertEqual(timestamp.replace(tzinfo=None), expected_timestamp.replace(tzinfo=None))
+                self.assertEqual(timestamp.utcoffset(), expected_timestamp.utcoffset())
+        with self.assertRaisesRegex(RP2ValueError, "day is out of range for month"):
+            self._configuration.type_check_timestamp_from_string("timestamp", "2020-02-30T03:59:49Z")
+
+    def test_timestamp_from_datetime(self) -> None:
+        timestamp: datetime = datetime(2020, 12, 1, 3, 59, 49, tzinfo=tzoffset(None, -14400))
+        self.assertIs(timestamp, self._configuration.type_check_timestamp("timestamp", timestamp))
+        self.assertEqual(timestamp, self._configuration.type_check_timestamp("timestamp", "2020-12-01 03:59:49 -04:00"))
+
+        with self.assertRaisesRegex(RP2ValueError, "Parameter 'timestamp' value has no timezone info: .*"):
+            self._configuration.type_check_timestamp("timestamp", datetime(2020, 12, 1, 3, 59, 49))
+        with self.assertRaisesRegex(RP2TypeError, "Parameter 'timestamp' has non-string value .*"):
+            self._configuration.type_check_timestamp("timestamp", 2020)  # type: ignore
+
     def test_exchange(self) -> None:
         self.assertEqual("Coinbase Pro", self._configuration.type_check_exchange("exchange", "Coinbase Pro"))
 
@@ -0,0 +1,46 @@
+# Copyright 2021 eprbell
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import unittest
+
+from rp2.fixed_point import SCALE, from_scaled_int, to_scaled_int
+from rp2.rp2_decimal import RP2Decimal
+
+
+class TestFixedPoint(unittest.TestCase):
+    def test_scaled_int(self) -> None:
+        self.assertEqual(to_scaled_int(RP2Decimal("0")), 0)
+        self.assertEqual(to_scaled_int(RP2Decimal("2")), 2 * SCALE)
+        self.assertEqual(to_scaled_int(RP2Decimal("-1.50")), -15 * SCALE // 10)
+        self.assertEqual(to_scaled_int(RP2Decimal("0.0000000000001")), 1)
+        self.assertEqual(to_scaled_int(RP2Decimal("1E-13")), 1)
+        self.assertEqual(to_scaled_int(RP2Decimal("123456789.1234567890123")), 1234567891234567890123)
+
+        # No exact scaled representation: too many decimal digits, too large, not finite
+        self.assertIsNone(to_scaled_int(RP2Decimal("0.00000000000001")))
+        self.assertIsNone(to_scaled_int(RP2Decimal("0.33333333333333333")))
+        self.assertIsNone(to_scaled_int(RP2Decimal("1E+17")))
+        self.assertIsNone(to_scaled_int(RP2Decimal("Infinity")))
+        self.assertIsNone(to_scaled_int(RP2Decimal("NaN")))
+
+        for value in ["0", "2", "-1.5", "0.0000000000001", "99999999999999.9999999999999"]:
+            scaled_int = to_scaled_int(RP2Decimal(value))
+            self.assertIsNotNone(scaled_int)
+            self.assertEqual(from_scaled_int(scaled_int), RP2Decimal(value))  # type: ignore
+            self.assertIsInstance(from_scaled_int(scaled_int), RP2Decimal)  # type: ignore
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+# Copyright 2022 mdavid217
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import csv
+import json
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Dict, List, Set, cast
+
+from prezzemolo.avl_tree import AVLTree
+
+from rp2.abstract_accounting_method import AbstractAccountingMethod
+from rp2.abstract_report_generator import AbstractReportGenerator
+from rp2.accounting_engine import AccountingEngine
+from rp2.computed_data import ComputedData
+from rp2.gain_loss import GainLoss
+from rp2.configuration import MAX_DATE, MIN_DATE, Configuration
+from rp2.ods_parser import open_ods, parse_ods
+from rp2.plugin.accounting_method.fifo import AccountingMethod
+from rp2.plugin.country.us import US
+from rp2.plugin.report import csv_report, jsonl_report, parquet_report
+from rp2.plugin.report.abstract_flat_report_generator import (
+    AbstractTableWriter,
+    Column,
+    ColumnType,
+)
+from rp2.plugin.report.parquet_report import _ParquetTableWriter
+from rp2.rp2_decimal import ZERO, RP2Decimal
+from rp2.rp2_error import RP2ValueError
+from rp2.tax_engine import compute_tax
+
+try:
+    import pyarrow.parquet
+
+    _IS_PYARROW_AVAILABLE: bool = True
+except ImportError:
+    _IS_PYARROW_AVAILABLE = False
+
+
+class TestFlatReport(unittest.TestCase):
+    _configuration: Configuration
+    _asset_to_computed_data: Dict[str, ComputedData]
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        TestFlatReport._configuration = Configuration("./config/crypto_example.ini", US())
+        years_2_methods = AVLTree[int, AbstractAccountingMethod]()
+        years_2_methods.insert_node(MIN_DATE.year, AccountingMethod())
+        accounting_engine: AccountingEngine = AccountingEngine(years_2_methods)
+        input_file_handle: object = open_ods(cls._configuration, "./input/crypto_example.ods")
+        TestFlatReport._asset_to_computed_data = {
+            asset: compute_tax(cls._configuration, accounting_engine, parse_ods(cls._configuration, asset, input_file_handle)) for asset in ["BTC", "ETH"]
+        }
+
+    def setUp(self) -> None:
+        self.maxDiff = None  # pylint: disable=invalid-name
+
+    def test_csv_report(self) -> None:
+        with TemporaryDirectory() as output_directory:
+            self._generate(csv_report.Generator(), output_directory)
+            with open(Path(output_directory) / "test_fifo_gain_loss.csv", encoding="utf-8", newline="") as input_file:
+                rows: List[Dict[str, str]] = list(csv.DictReader(input_file))
+            self._verify_gain_loss([row["asset"] for row in rows], [RP2Decimal(row["fiat_gain"]) for row in rows])
+            is_long_term_capital_gains_values: Set[str] = {row["is_long_term_capital_gains"] for row in rows}
+            self.assertSetEqual(is_long_term_capital_gains_values, {"true", "false"})
+            self.assertTrue(all(row["acquired_lot_internal_id"] or row["taxable_event_type"] != "sell" for row in rows))
+
+            with open(Path(output_directory) / "test_fifo_balances.csv", encoding="utf-8", newline="") as input_file:
+                balance_rows: List[Dict[str, str]] = list(csv.DictReader(input_file))
+            self.assertEqual(len(balance_rows), sum((computed_data.balance_set.count for computed_data in self._asset_to_computed_data.values()), 0))
+
+    def test_jsonl_report(self) -> None:
+        with TemporaryDirectory() as output_directory:
+            self._generate(jsonl_report.Generator(), output_directory)
+            with open(Path(output_directory) / "test_fifo_gain_loss.jsonl", encoding="utf-8") as input_file:
+                rows: List[Dict[str, object]] = [cast(Dict[str, object], json.loads(line, parse_float=RP2Decimal, parse_int=RP2Decimal)) for line in input_file]
+            self._verify_gain_loss([str(row["asset"]) for row in rows], [cast(RP2Decimal, row["fiat_gain"]) for row in rows])
+
+            with open(Path(output_directory) / "test_fifo_in_transactions.jsonl", encoding="utf-8") as input_file:
+                in_rows: List[Dict[str, object]] = [cast(Dict[str, object], json.loads(line)) for line in input_file]
+            internal_ids: List[object] = [row["internal_id"] for row in in_rows]
+            expected_internal_ids: List[object] = [
+                transaction.internal_id for computed_data in self._asset_to_computed_data.values() for transaction in computed_data.in_transaction_set
+            ]
+            self.assertEqual(internal_ids, expected_internal_ids)
+
+    def test_parquet_report(self) -> None:
+        if not _IS_PYARROW_AVAILABLE:
+            self.skipTest("pyarrow is not installed")
+        with TemporaryDirectory() as output_directory:
+            self._generate(parquet_report.Generator(), output_directory)
+            rows: List[Dict[str, object]] = self._read_parquet(Path(output_directory) / "test_fifo_gain_loss.parquet")
+            self._verify_gain_loss([str(row["asset"]) for row in rows], [RP2Decimal(str(row["fiat_gain"])) for row in rows])
+
+    def test_parquet_report_large_amount(self) -> None:
+        if not _IS_PYARROW_AVAILABLE:
+            self.skipTest("pyarrow is not installed")
+        with TemporaryDirectory() as output_directory:
+            output_file_path: Path = Path(output_directory) / "large_amount.parquet"
+            writer: AbstractTableWriter = _ParquetTableWriter(output_file_path, [Column("fiat_amount", ColumnType.DECIMAL)])
+            try:
+                # Larger than the 31 digits of the global decimal context, once quantized to 18 fractional digits
+                values: List[object] = [RP2Decimal("12345678901234567890.123456789")]
+                writer.write_row(values)
+                values = [RP2Decimal("123456789012345678901")]
+                with self.assertRaisesRegex(RP2ValueError, "Value .* of column 'fiat_amount' doesn't fit Parquet type decimal128"):
+                    writer.write_row(values)
+            finally:
+                writer.close()
+            rows: List[Dict[str, object]] = self._read_parquet(output_file_path)
+            fiat_amounts: List[RP2Decimal] = [RP2Decimal(str(row["fiat_amount"])) for row in rows]
+            expected_fiat_amounts: List[RP2Decimal] = [RP2Decimal("12345678901234567890.123456789")]
+            self.assertEqual(fiat_amounts, expected_fiat_amounts)
+
+    @staticmethod
+    def _read_parquet(file_path: Path) -> List[Dict[str, object]]:
+        # pyarrow is untyped
+        return cast(List[Dict[str, object]], pyarrow.parquet.read_table(str(file_path)).to_pylist())  # type: ignore[misc]
+
+    def _generate(self, generator: AbstractReportGenerator, output_directory: str) -> None:
+        generator.generate(
+            country=US(),
+            years_2_accounting_method_names={MIN_DATE.year: "fifo"},
+            asset_to_computed_data=self._asset_to_computed_data,
+            output_dir_path=output_directory,
+            output_file_prefix="test_",
+            from_date=MIN_DATE,
+            to_date=MAX_DATE,
+            generation_language="en",
+        )
+
+    def _verify_gain_loss(self, assets: List[str], fiat_gains: List[RP2Decimal]) -> None:
+        expected_assets: List[str] = []
+        for asset, computed_data in self._asset_to_computed_data.items():
+            expected_assets.extend([asset] * computed_data.gain_loss_set.count)
+            expected_fiat_gain: RP2Decimal = sum((cast(GainLoss, gain_loss).fiat_gain for gain_loss in computed_data.gain_loss_set), ZERO)
+            # Parquet decimals are rounded to 18 fractional digits
+            self.assertAlmostEqual(
+                sum((fiat_gain for fiat_gain, fiat_gain_asset in zip(fiat_gains, assets) if fiat_gain_asset == asset), ZERO),
+                expected_fiat_gain,
+                places=10,
+            )
+        self.assertEqual(assets, expected_assets)
+
+
+if __name__ == "__main__":
+    unittest.main()
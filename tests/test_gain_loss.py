@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import pickle
 import unittest
 
 from rp2.configuration import Configuration
@@ -211,6 +212,16 @@ class TestGainLoss(unittest.TestCase):
             "GainLoss(id='30->10', crypto_amount=0.00100000, fiat_cost_basis=10.0100, fiat_gain=2.4900, is_long_term_capital_gains=True, taxable_event_fiat_amount_with_fee_fraction=12.5000, taxable_event_fraction_percentage=10.0000%, taxable_event=IntraTransaction(id='30', timestamp='2021-03-10 11:18:58.000000 -0004', asset='B1', from_exchange='Coinbase Pro', from_holder='Bob', to_exchange='BlockFi', to_holder='Alice', transaction_type=<TransactionType.MOVE: 'move'>, spot_price=12500.0000, crypto_sent=0.40000000, crypto_received=0.39000000, crypto_fee=0.01000000, fiat_fee=125.0000, unique_id=, is_taxable=True, fiat_taxable_amount=125.0000), acquired_lot_fiat_amount_with_fee_fraction=10.0100, acquired_lot_fraction_percentage=0.0500%, acquired_lot=InTransaction(id='10', timestamp='2020-01-02 08:42:43.882000 +0000', asset='B1', exchange='Coinbase Pro', holder='Bob', transaction_type=<TransactionType.BUY: 'buy'>, spot_price=10000.0000, crypto_in=2.00020000, fiat_fee=20.0000, fiat_in_no_fee=20002.0000, fiat_in_with_fee=20022.0000, unique_id=, is_taxable=False, fiat_taxable_amount=0.0000))",
         )
 
+    def test_compact_gain_loss(self) -> None:
+        gain_loss: GainLoss = GainLoss(self._configuration, RP2Decimal("0.001"), self._intra, self._in_buy)
+
+        self.assertFalse(hasattr(gain_loss, "__dict__"))
+
+        unpickled_gain_loss: GainLoss = pickle.loads(pickle.dumps(gain_loss))
+        self.assertEqual(gain_loss, unpickled_gain_loss)
+        self.assertEqual(hash(gain_loss), hash(unpickled_gain_loss))
+        self.assertEqual(str(gain_loss), str(unpickled_gain_loss))
+
     def test_gain_loss_equality_and_hashing(self) -> None:
         gain_loss: GainLoss = GainLoss(self._configuration, RP2Decimal("0.001"), self._intra, self._in_buy)
         gain_loss2: GainLoss = GainLoss(self._configuration, RP2Decimal("0.001"), self._intra, self._in_buy)
@@ -231,6 +242,8 @@ class TestGainLoss(unittest.TestCase):
         self.assertNotEqual(hash(gain_loss), hash(gain_loss4))
         self.assertNotEqual(hash(gain_loss), hash(gain_loss5))
         self.assertNotEqual(hash(gain_loss), hash(gain_loss6))
+        self.assertNotEqual(gain_loss6, gain_loss)
+        self.assertEqual(GainLoss(self._configuration, RP2Decimal("0.1"), self._in_interest, None, trusted=True), gain_loss6)
 
     def test_bad_gain_loss(self) -> None:
         with self.assertRaisesRegex(RP2TypeError, "Parameter 'configuration' is not of type Configuration: .*"):
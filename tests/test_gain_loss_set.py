@@ -13,11 +13,12 @@
 # limitations under the License.
 
 import unittest
-from typing import Dict, List
+from typing import Dict, List, cast
 
 from rp2_test_output import RP2_TEST_OUTPUT
 
 from rp2.configuration import Configuration
+from rp2.fixed_point import to_scaled_int
 from rp2.gain_loss import GainLoss
 from rp2.gain_loss_set import GainLossSet
 from rp2.in_transaction import InTransaction
@@ -292,6 +293,104 @@ class TestGainLossSet(unittest.TestCase):
         for asset in _ASSETS:
             self.assertEqual(str(self._gain_loss_set[asset]), RP2_TEST_OUTPUT[asset])
 
+    # Amounts with more than CRYPTO_DECIMALS decimal digits have no scaled-integer representation: fractions are tracked with RP2Decimal, whose
+    # comparisons ignore digits beyond CRYPTO_DECIMALS
+    def test_high_precision_gain_loss_set(self) -> None:
+        asset: str = "B4"
+        in_transaction: InTransaction = InTransaction(
+            self._configuration, "2020-01-01 08:00:00 +0000", asset, "Coinbase", "Bob", "BUY", RP2Decimal("10000"), RP2Decimal("1"), internal_id=1
+        )
+        out_transaction1: OutTransaction = OutTransaction(
+            self._configuration,
+            "2020-02-01 08:00:00 +0000",
+            asset,
+            "Coinbase",
+            "Bob",
+            "SELL",
+            RP2Decimal("11000"),
+            RP2Decimal("0.5"),
+            RP2Decimal("0"),
+            internal_id=2,
+        )
+        out_transaction2: OutTransaction = OutTransaction(
+            self._configuration,
+            "2020-03-01 08:00:00 +0000",
+            asset,
+            "Coinbase",
+            "Bob",
+            "SELL",
+            RP2Decimal("12000"),
+            RP2Decimal("0.50000000000001"),
+            RP2Decimal("0"),
+            internal_id=3,
+        )
+        gain_loss1: GainLoss = GainLoss(self._configuration, RP2Decimal("0.5"), out_transaction1, in_transaction)
+        gain_loss2: GainLoss = GainLoss(self._configuration, RP2Decimal("0.50000000000001"), out_transaction2, in_transaction)
+        self.assertIsNotNone(to_scaled_int(gain_loss1.crypto_amount))
+        self.assertIsNone(to_scaled_int(gain_loss2.crypto_amount))
+
+        gain_loss_set: GainLossSet = GainLossSet(self._configuration, asset)
+        gain_loss_set.add_entry(gain_loss1)
+        gain_loss_set.add_entry(gain_loss2)
+        self.assertEqual(gain_loss_set.get_acquired_lot_fraction(gain_loss1), 0)
+        self.assertEqual(gain_loss_set.get_acquired_lot_fraction(gain_loss2), 1)
+        self.assertEqual(gain_loss_set.get_acquired_lot_number_of_fractions(in_transaction), 2)
+        self.assertEqual(gain_loss_set.get_taxable_event_number_of_fractions(out_transaction2), 1)
+
+    # Gain/losses are stored as rows and GainLoss objects are created on demand: rows added out of timestamp order (and without GainLoss
+    # objects) are sorted like entries of other sets
+    def test_trusted_gain_loss_rows(self) -> None:
+        asset: str = "B4"
+        in3: InTransaction = self._in3[asset]
+        in2: InTransaction = self._in2[asset]
+        out15: OutTransaction = self._out15[asset]
+        out14: OutTransaction = self._out14[asset]
+
+        gain_loss_set: GainLossSet = GainLossSet(self._configuration, asset)
+        gain_loss_set.add_trusted_gain_loss(out14, in3, RP2Decimal("0.79"))
+        gain_loss_set.add_trusted_gain_loss(out14, in2, RP2Decimal("0.21"))
+        gain_loss_set.add_trusted_gain_loss(in2, None, RP2Decimal("2"))
+        gain_loss_set.add_trusted_entry(GainLoss(self._configuration, RP2Decimal("0.2"), out15, in3, trusted=True))
+        self.assertEqual(gain_loss_set.count, 4)
+
+        gain_losses: List[GainLoss] = [cast(GainLoss, entry) for entry in gain_loss_set]
+        internal_ids: List[str] = [gain_loss.internal_id for gain_loss in gain_losses]
+        expected_internal_ids: List[str] = ["16->4", "3->None", "15->4", "15->3"]
+        self.assertEqual(internal_ids, expected_internal_ids)
+        running_sums: List[RP2Decimal] = [gain_loss_set.get_crypto_amount_running_sum(gain_loss) for gain_loss in gain_losses]
+        expected_running_sums: List[RP2Decimal] = [RP2Decimal("0.2"), RP2Decimal("2.2"), RP2Decimal("2.99"), RP2Decimal("3.2")]
+        self.assertEqual(running_sums, expected_running_sums)
+        taxable_event_fractions: List[int] = [gain_loss_set.get_taxable_event_fraction(gain_loss) for gain_loss in gain_losses]
+        expected_taxable_event_fractions: List[int] = [0, 0, 0, 1]
+        self.assertEqual(taxable_event_fractions, expected_taxable_event_fractions)
+        self.assertEqual(gain_loss_set.get_acquired_lot_fraction(gain_losses[3]), 0)
+        self.assertEqual(gain_loss_set.get_acquired_lot_number_of_fractions(in3), 2)
+        self.assertIsNone(gain_loss_set.get_parent(gain_losses[0]))
+
+        # Lookups work with equal GainLoss instances, not only with the ones created by the iterator
+        gain_loss: GainLoss = GainLoss(self._configuration, RP2Decimal("0.79"), out14, in3)
+        self.assertEqual(gain_loss_set.get_parent(gain_loss), gain_losses[1])
+        self.assertEqual(gain_loss_set.get_acquired_lot_fraction(gain_loss), 1)
+        with self.assertRaisesRegex(RP2ValueError, "Entry has no acquired lot:.*"):
+            gain_loss_set.get_acquired_lot_fraction(gain_losses[1])
+
+        # Duplicates recompute the columns that depend on the time filter
+        filtered_gain_loss_set: GainLossSet = cast(GainLossSet, gain_loss_set.duplicate(to_date=in2.timestamp.date()))
+        filtered_gain_losses: List[GainLoss] = [cast(GainLoss, entry) for entry in filtered_gain_loss_set]
+        self.assertEqual(len(filtered_gain_losses), 2)
+        self.assertEqual(filtered_gain_loss_set.get_taxable_event_fraction(gain_losses[1]), 0)
+        with self.assertRaisesRegex(RP2ValueError, "Entry is after to_date of the set .*"):
+            filtered_gain_loss_set.get_taxable_event_fraction(gain_losses[2])
+        # in3 has one fraction before to_date and one after it
+        self.assertEqual(filtered_gain_loss_set.get_acquired_lot_number_of_fractions(in3), 1)
+        self.assertEqual(gain_loss_set.get_acquired_lot_number_of_fractions(in3), 2)
+        self.assertEqual(filtered_gain_loss_set.get_transaction_type_count(out14.transaction_type), 1)
+        self.assertEqual(gain_loss_set.get_transaction_type_count(out14.transaction_type), 3)
+        with self.assertRaisesRegex(RP2ValueError, "Unknown transaction:.*"):
+            filtered_gain_loss_set.get_taxable_event_number_of_fractions(out14)
+        with self.assertRaisesRegex(RP2ValueError, "Unknown transaction:.*"):
+            filtered_gain_loss_set.get_acquired_lot_number_of_fractions(in2)
+
     def test_bad_gain_loss_set(self) -> None:
         gain_loss_set: GainLossSet
         asset: str = "B4"
@@ -356,7 +455,7 @@ class TestGainLossSet(unittest.TestCase):
             gain_loss_set.get_taxable_event_number_of_fractions(self)  # type: ignore
         with self.assertRaisesRegex(RP2ValueError, "Unknown transaction:.*"):
             # Bad get_taxable_event_fractions parameter
-            gain_loss_set.get_taxable_event_number_of_fractions(out15)
+            gain_loss_set.get_taxable_event_number_of_fractions(out14)
         with self.assertRaisesRegex(RP2TypeError, "Parameter 'transaction' is not of type InTransaction: .*"):
             # Bad get_taxable_event_fractions parameter
             gain_loss_set.get_acquired_lot_number_of_fractions(None)  # type: ignore
@@ -365,7 +464,7 @@ class TestGainLossSet(unittest.TestCase):
             gain_loss_set.get_acquired_lot_number_of_fractions(self)  # type: ignore
         with self.assertRaisesRegex(RP2ValueError, "Unknown transaction:.*"):
             # Bad get_taxable_event_fractions parameter
-            gain_loss_set.get_acquired_lot_number_of_fractions(in3)
+            gain_loss_set.get_acquired_lot_number_of_fractions(in6)
         with self.assertRaisesRegex(RP2ValueError, "Entry already added: GainLoss"):
             gain_loss_set = GainLossSet(self._configuration, asset)
             gain_loss_set.add_entry(gain_loss1)
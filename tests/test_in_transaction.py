@@ -248,6 +248,10 @@ class TestInTransaction(unittest.TestCase):
         self.assertEqual(hash(in_transaction), hash(in_transaction2))
         # These hashes would only be equal in case of hash collision (possible but very unlikely)
         self.assertNotEqual(hash(in_transaction), hash(in_transaction3))
+        # Transactions are identified by their numeric internal id: the string id is only for display
+        self.assertEqual(19, in_transaction.numeric_internal_id)
+        self.assertEqual("19", in_transaction.internal_id)
+        self.assertEqual({in_transaction: 1}[in_transaction2], 1)
 
     def test_bad_to_string(self) -> None:
         in_transaction: InTransaction = InTransaction(
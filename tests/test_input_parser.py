@@ -13,6 +13,8 @@
 # limitations under the License.
 
 import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
 from typing import Dict, List, NamedTuple, Optional, Type
 
 from dateutil.parser import parse
@@ -48,14 +50,26 @@ class TestInputParser(unittest.TestCase):
         self.maxDiff = None  # pylint: disable=invalid-name
 
     def test_good_input(self) -> None:
-        self._verify_good_sheet("B1", out_empty=True, intra_empty=True)
-        self._verify_good_sheet("B2", out_empty=False, intra_empty=True)
-        self._verify_good_sheet("B3", out_empty=True, intra_empty=False)
-        self._verify_good_sheet("B4", out_empty=False, intra_empty=False)
+        for streaming in [False, True]:
+            with self.subTest(streaming=streaming):
+                self._verify_good_sheet("B1", out_empty=True, intra_empty=True, streaming=streaming)
+                self._verify_good_sheet("B2", out_empty=False, intra_empty=True, streaming=streaming)
+                self._verify_good_sheet("B3", out_empty=True, intra_empty=False, streaming=streaming)
+                self._verify_good_sheet("B4", out_empty=False, intra_empty=False, streaming=streaming)
 
-    def _verify_good_sheet(self, sheet_name: str, out_empty: bool, intra_empty: bool) -> None:
+    def test_good_text_input(self) -> None:
+        # Text input files contain the B4 sheet of test_data.ods (same row layout), plus a few transactions of another asset
+        for input_file_path in ["./input/test_data.csv", "./input/test_data.jsonl"]:
+            with self.subTest(input_file_path=input_file_path):
+                self._verify_good_sheet("B4", out_empty=False, intra_empty=False, streaming=False, input_file_path=input_file_path)
+                # B3 only has INTRA transactions in the text input files
+                input_file_handle: object = open_ods(configuration=self._good_input_configuration, input_file_path=input_file_path)
+                with self.assertRaisesRegex(RP2ValueError, "B3: IN table not found or empty"):
+                    parse_ods(self._good_input_configuration, "B3", input_file_handle)
+
+    def _verify_good_sheet(self, sheet_name: str, out_empty: bool, intra_empty: bool, streaming: bool, input_file_path: str = "./input/test_data.ods") -> None:
         asset = sheet_name
-        input_file_handle: object = open_ods(configuration=self._good_input_configuration, input_file_path="./input/test_data.ods")
+        input_file_handle: object = open_ods(configuration=self._good_input_configuration, input_file_path=input_file_path, streaming=streaming)
         input_data: InputData = parse_ods(self._good_input_configuration, asset, input_file_handle)
 
         # In table is always present
@@ -326,11 +340,40 @@ class TestInputParser(unittest.TestCase):
 
         sheet: str
         message: str
-        for sheet, (error_class, message) in sheets_to_expected_messages.items():
-            with self.assertRaisesRegex(error_class, message):
-                asset: str = sheet
-                input_file_handle: object = open_ods(configuration=self._bad_input_configuration, input_file_path="./input/test_bad_data.ods")
-                parse_ods(self._bad_input_configuration, asset, input_file_handle)
+        for streaming in [False, True]:
+            for sheet, (error_class, message) in sheets_to_expected_messages.items():
+                with self.subTest(streaming=streaming, sheet=sheet), self.assertRaisesRegex(error_class, message):
+                    asset: str = sheet
+                    input_file_handle: object = open_ods(
+                        configuration=self._bad_input_configuration, input_file_path="./input/test_bad_data.ods", streaming=streaming
+                    )
+                    parse_ods(self._bad_input_configuration, asset, input_file_handle)
+
+    def test_non_finite_text_input(self) -> None:
+        # IN table of test_data.csv / test_data.jsonl, with a non-finite spot price in the first transaction
+        csv_lines: List[str] = Path("./input/test_data.csv").read_text(encoding="utf-8").splitlines()[:8]
+        jsonl_lines: List[str] = Path("./input/test_data.jsonl").read_text(encoding="utf-8").splitlines()[:8]
+        input_file_name_2_lines: Dict[str, List[str]] = {}
+        for value in ["NaN", "sNaN", "Infinity", "-Infinity"]:
+            input_file_name_2_lines[f"{value}.csv"] = [line.replace("12000.0", value) for line in csv_lines]
+            input_file_name_2_lines[f"{value}_string.jsonl"] = [line.replace("12000.0", f'"{value}"') for line in jsonl_lines]
+        # JSON constants (parsed as floats)
+        for value in ["NaN", "Infinity"]:
+            input_file_name_2_lines[f"{value}.jsonl"] = [line.replace("12000.0", value) for line in jsonl_lines]
+
+        with TemporaryDirectory() as input_directory:
+            for input_file_name, lines in input_file_name_2_lines.items():
+                with self.subTest(input_file_name=input_file_name):
+                    input_file_path: Path = Path(input_directory) / input_file_name
+                    input_file_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+                    input_file_handle: object = open_ods(configuration=self._good_input_configuration, input_file_path=str(input_file_path))
+                    with self.assertRaisesRegex(RP2ValueError, "Argument 'spot_price' has non-numeric value: .*"):
+                        parse_ods(self._good_input_configuration, "B4", input_file_handle)
+
+    def test_streaming_missing_sheet(self) -> None:
+        input_file_handle: object = open_ods(configuration=self._bad_input_configuration, input_file_path="./input/test_data.ods", streaming=True)
+        with self.assertRaisesRegex(RP2ValueError, "Error: sheet B10 does not exist in .*"):
+            parse_ods(self._bad_input_configuration, "B10", input_file_handle)
 
 
 if __name__ == "__main__":
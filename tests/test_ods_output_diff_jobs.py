@@ -0,0 +1,61 @@
+# Copyright 2021 eprbell
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import shutil
+import unittest
+from pathlib import Path
+
+from abstract_test_ods_output_diff import AbstractTestODSOutputDiff, OutputPlugins
+
+ROOT_PATH: Path = Path(os.path.dirname(__file__)).parent.absolute()
+
+
+# Same inputs as TestODSOutputDiff, but assets are processed by multiple worker processes (-j option), report generators run in parallel
+# (--parallel-generators option) and some of the runs use trusted validation (--validation option): output must match the same golden files.
+class TestODSOutputDiffJobs(AbstractTestODSOutputDiff):
+    output_dir: Path
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.output_dir = ROOT_PATH / Path("output") / Path(cls.__module__)
+
+        shutil.rmtree(cls.output_dir, ignore_errors=True)
+
+        AbstractTestODSOutputDiff._generate(cls.output_dir, test_name="crypto_example", config="crypto_example", method="fifo", jobs=2)
+        AbstractTestODSOutputDiff._generate(
+            cls.output_dir, test_name="test_data", config="test_data", method="fifo", jobs=3, parallel_generators=True, validation="trusted"
+        )
+        AbstractTestODSOutputDiff._generate(
+            cls.output_dir, test_name="test_data_multi_method", config="test_data_multi_method", method="mixed", jobs=2, parallel_generators=True
+        )
+
+    def setUp(self) -> None:
+        self.maxDiff = None  # pylint: disable=invalid-name
+
+    def test_crypto_example(self) -> None:
+        for output_plugin in [OutputPlugins.RP2_FULL_REPORT, OutputPlugins.TAX_REPORT_US]:
+            self._compare(output_dir=self.output_dir, test_name="crypto_example", method="fifo", output_plugin=output_plugin)
+
+    def test_test_data(self) -> None:
+        for output_plugin in [OutputPlugins.RP2_FULL_REPORT, OutputPlugins.TAX_REPORT_US]:
+            self._compare(output_dir=self.output_dir, test_name="test_data", method="fifo", output_plugin=output_plugin)
+
+    def test_test_data_multi_method(self) -> None:
+        for output_plugin in [OutputPlugins.RP2_FULL_REPORT, OutputPlugins.TAX_REPORT_US]:
+            self._compare(output_dir=self.output_dir, test_name="test_data_multi_method", method="mixed", output_plugin=output_plugin)
+
+
+if __name__ == "__main__":
+    unittest.main()
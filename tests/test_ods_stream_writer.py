@@ -0,0 +1,95 @@
+# Copyright 2021 eprbell
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any
+
+import ezodf
+
+from rp2.plugin.report.ods_stream_writer import ODSStreamSheet, ODSStreamWriter
+from rp2.rp2_error import RP2RuntimeError, RP2ValueError
+
+
+class TestODSStreamWriter(unittest.TestCase):
+    def test_stream_sheet(self) -> None:
+        with TemporaryDirectory() as output_directory:
+            output_path: Path = Path(output_directory) / "output.ods"
+            output_file: Any = ezodf.newdoc("ods", str(output_path), template=None)
+            writer: ODSStreamWriter = ODSStreamWriter(output_file)
+            sheet: ODSStreamSheet = writer.add_stream_sheet("Sheet", 4)
+
+            sheet.write_row(0, ["a", 1.5, "=B1*2", None], [None, None, None, None])
+            sheet.write_cell(1000, 3, "last")
+            writer.save()
+
+            # Runs of empty rows are written as repeated rows: expand them all when reading
+            ezodf.config.set_table_expand_strategy("all")
+            try:
+                document: Any = ezodf.opendoc(str(output_path))
+                table: Any = document.sheets["Sheet"]
+            finally:
+                ezodf.config.reset_table_expand_strategy()
+            self.assertEqual(table.nrows(), 1001)
+            self.assertEqual(table[0, 0].value, "a")
+            self.assertEqual(table[0, 1].value, 1.5)
+            self.assertEqual(table[0, 2].formula, "=B1*2")
+            self.assertIsNone(table[0, 3].value)
+            self.assertIsNone(table[500, 2].value)
+            self.assertEqual(table[1000, 3].value, "last")
+
+    def test_background_rows(self) -> None:
+        with TemporaryDirectory() as output_directory:
+            output_path: Path = Path(output_directory) / "output.ods"
+            output_file: Any = ezodf.newdoc("ods", str(output_path), template=None)
+            template: Any = ezodf.Table("Template", size=(3, 2))
+            template[0, 0].set_value("header")
+            template[2, 0].set_value("footer")
+            output_file.sheets += template
+            writer: ODSStreamWriter = ODSStreamWriter(output_file)
+            sheet: ODSStreamSheet = writer.get_stream_sheet(output_file.sheets["Template"])
+            self.assertIs(writer.get_stream_sheet(output_file.sheets["Template"]), sheet)
+
+            # Inserted rows shift the following template rows down
+            sheet.write_cell(0, 1, "value")
+            sheet.insert_rows(1, 2)
+            sheet.write_cell(2, 0, "inserted")
+            writer.save()
+
+            document: Any = ezodf.opendoc(str(output_path))
+            table: Any = document.sheets["Template"]
+            self.assertEqual(table.nrows(), 5)
+            self.assertEqual(table[0, 0].value, "header")
+            self.assertEqual(table[0, 1].value, "value")
+            self.assertEqual(table[2, 0].value, "inserted")
+            self.assertEqual(table[4, 0].value, "footer")
+
+    def test_bad_writes(self) -> None:
+        with TemporaryDirectory() as output_directory:
+            output_file: Any = ezodf.newdoc("ods", str(Path(output_directory) / "output.ods"), template=None)
+            writer: ODSStreamWriter = ODSStreamWriter(output_file)
+            sheet: ODSStreamSheet = writer.add_stream_sheet("Sheet", 2)
+
+            with self.assertRaisesRegex(RP2ValueError, "Invalid value for cell"):
+                sheet.write_cell(0, 0, None)
+            sheet.write_cell(200, 0, "value")
+            with self.assertRaisesRegex(RP2RuntimeError, "has already been written"):
+                sheet.write_cell(0, 0, "value")
+            with self.assertRaisesRegex(RP2RuntimeError, "cannot insert rows"):
+                sheet.insert_rows(0, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
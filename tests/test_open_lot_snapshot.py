@@ -0,0 +1,149 @@
+# Copyright 2021 eprbell
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+import unittest
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import List, Optional, Tuple, cast
+
+from prezzemolo.avl_tree import AVLTree
+
+from rp2.abstract_accounting_method import AbstractAccountingMethod
+from rp2.accounting_engine import AccountingEngine
+from rp2.computed_data import ComputedData
+from rp2.configuration import MIN_DATE, Configuration
+from rp2.gain_loss import GainLoss
+from rp2.input_data import InputData
+from rp2.ods_parser import open_ods, parse_ods
+from rp2.open_lot_snapshot import OpenLot, OpenLotSnapshot, read_open_lot_snapshot, write_open_lot_snapshot
+from rp2.plugin.accounting_method.fifo import AccountingMethod
+from rp2.plugin.country.us import US
+from rp2.rp2_decimal import RP2Decimal
+from rp2.rp2_error import RP2ValueError
+from rp2.tax_engine import compute_tax
+
+_SNAPSHOT_DATE: date = date(2020, 12, 31)
+
+# Timestamp, crypto amount, rounded cost basis, rounded gain and long-term flag of a gain/loss
+_GainLossFields = Tuple[datetime, RP2Decimal, Decimal, Decimal, bool]
+_AccountAmount = Tuple[str, str, RP2Decimal]
+
+
+class TestOpenLotSnapshot(unittest.TestCase):
+    _configuration: Configuration
+    _accounting_engine: AccountingEngine
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        TestOpenLotSnapshot._configuration = Configuration("./config/test_data.ini", US())
+        years_2_methods = AVLTree[int, AbstractAccountingMethod]()
+        years_2_methods.insert_node(MIN_DATE.year, AccountingMethod())
+        TestOpenLotSnapshot._accounting_engine = AccountingEngine(years_2_methods)
+
+    def setUp(self) -> None:
+        self.maxDiff = None  # pylint: disable=invalid-name
+
+    def test_carry_forward(self) -> None:
+        with TemporaryDirectory() as directory:
+            # Snapshot at the end of 2020
+            configuration_2020: Configuration = Configuration("./config/test_data.ini", US(), to_date=_SNAPSHOT_DATE)
+            computed_data_2020: ComputedData = self._compute(configuration_2020, "./input/test_data.csv")
+            open_lots: List[OpenLot] = computed_data_2020.get_open_lots()
+            snapshot_path: str = str(Path(directory) / "open_lot_snapshot.csv")
+            write_open_lot_snapshot(snapshot_path, _SNAPSHOT_DATE, open_lots)
+            snapshot: OpenLotSnapshot = read_open_lot_snapshot(self._configuration, snapshot_path)
+            self.assertEqual(snapshot.snapshot_date, _SNAPSHOT_DATE)
+            self.assertSetEqual(set(snapshot.asset_2_open_lots), {"B4"})
+            self.assertEqual(snapshot.asset_2_open_lots["B4"], open_lots)
+
+            # Open lots hold the 2020 year-end balance of each account
+            open_lot_amounts: List[_AccountAmount] = [(open_lot.exchange, open_lot.holder, open_lot.crypto_amount) for open_lot in open_lots]
+            balance_amounts: List[_AccountAmount] = [
+                (balance.exchange, balance.holder, balance.final_balance) for balance in computed_data_2020.balance_set if balance.final_balance
+            ]
+            self.assertCountEqual(open_lot_amounts, balance_amounts)
+
+            # A run starting from the snapshot, with 2021 transactions only, has the same 2021 results as a run on the whole history
+            input_2021_path: str = str(Path(directory) / "input_2021.csv")
+            self._write_input_after(input_2021_path, _SNAPSHOT_DATE)
+            computed_data_2021: ComputedData = self._compute(self._configuration, input_2021_path, snapshot)
+            computed_data: ComputedData = self._compute(self._configuration, "./input/test_data.csv")
+            gain_losses_2021: List[_GainLossFields] = self._get_gain_losses(computed_data_2021, 2021)
+            gain_losses: List[_GainLossFields] = self._get_gain_losses(computed_data, 2021)
+            self.assertEqual(gain_losses_2021, gain_losses)
+            balance_amounts_2021: List[_AccountAmount] = [
+                (balance.exchange, balance.holder, balance.final_balance) for balance in computed_data_2021.balance_set
+            ]
+            balance_amounts = [(balance.exchange, balance.holder, balance.final_balance) for balance in computed_data.balance_set]
+            self.assertEqual(balance_amounts_2021, balance_amounts)
+
+            # Transactions up to the snapshot date must not be in the input
+            with self.assertRaisesRegex(RP2ValueError, "is not after the open-lot snapshot date"):
+                self._compute(self._configuration, "./input/test_data.csv", snapshot)
+
+    def test_bad_snapshot(self) -> None:
+        with TemporaryDirectory() as directory:
+            snapshot_path: Path = Path(directory) / "open_lot_snapshot.csv"
+            snapshot_path.write_text("asset,timestamp\nB4,2020-05-01T14:03:00+00:00\n", encoding="utf-8")
+            with self.assertRaisesRegex(RP2ValueError, "invalid open-lot snapshot header"):
+                read_open_lot_snapshot(self._configuration, str(snapshot_path))
+
+            header: str = "asset,snapshot_date,timestamp,exchange,holder,transaction_type,spot_price,crypto_amount,fiat_cost_basis,fiat_fee,unique_id"
+            snapshot_path.write_text(f"{header}\nB4,2020-12-31,2020-05-01T14:03:00+00:00,Coinbase,Bob,buy,15000,two,30000,200,\n", encoding="utf-8")
+            with self.assertRaisesRegex(RP2ValueError, r"open_lot_snapshot.csv\(2\): invalid value"):
+                read_open_lot_snapshot(self._configuration, str(snapshot_path))
+
+            snapshot_path.write_text(f"{header}\nB4,2020-12-31,2020-05-01T14:03:00+00:00,Binance,Bob,buy,15000,2,30000,200,\n", encoding="utf-8")
+            with self.assertRaisesRegex(RP2ValueError, "Parameter 'exchange' value is not known: Binance"):
+                read_open_lot_snapshot(self._configuration, str(snapshot_path))
+
+    def _compute(self, configuration: Configuration, input_file_path: str, snapshot: Optional[OpenLotSnapshot] = None) -> ComputedData:
+        input_file_handle: object = open_ods(configuration, input_file_path)
+        input_data: InputData = parse_ods(configuration, "B4", input_file_handle, open_lot_snapshot=snapshot)
+        return compute_tax(configuration, self._accounting_engine, input_data)
+
+    # Copy of the CSV input, without the transactions that occurred up to the given date
+    @staticmethod
+    def _write_input_after(output_file_path: str, from_date: date) -> None:
+        lines: List[str] = []
+        line: str
+        for line in Path("./input/test_data.csv").read_text(encoding="utf-8").splitlines():
+            if line[:1].isdigit() and date.fromisoformat(line[:10]) <= from_date:
+                continue
+            lines.append(line)
+        Path(output_file_path).write_text("\n".join(lines), encoding="utf-8")
+
+    @staticmethod
+    def _get_gain_losses(computed_data: ComputedData, year: int) -> List[_GainLossFields]:
+        result: List[_GainLossFields] = []
+        for entry in computed_data.gain_loss_set:
+            gain_loss: GainLoss = cast(GainLoss, entry)
+            if gain_loss.timestamp.year == year:
+                result.append(
+                    (
+                        gain_loss.timestamp,
+                        gain_loss.crypto_amount,
+                        round(gain_loss.fiat_cost_basis, 10),
+                        round(gain_loss.fiat_gain, 10),
+                        gain_loss.is_long_term_capital_gains(),
+                    )
+                )
+        return result
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import pickle
 import re
 import unittest
 
@@ -22,7 +23,7 @@ from rp2.entry_types import TransactionType
 from rp2.intra_transaction import IntraTransaction
 from rp2.out_transaction import OutTransaction
 from rp2.plugin.country.us import US
-from rp2.rp2_decimal import RP2Decimal
+from rp2.rp2_decimal import ZERO, RP2Decimal
 from rp2.rp2_error import RP2TypeError, RP2ValueError
 
 
@@ -126,6 +127,39 @@ class TestOutTransaction(unittest.TestCase):
             ),
         )
 
+    def test_compact_out_transaction(self) -> None:
+        out_transaction: OutTransaction = OutTransaction(
+            self._configuration,
+            "6/1/2020 3:59:59 -04:00",
+            "".join(["B", "1"]),
+            "".join(["Coin", "base"]),
+            "Bob",
+            "SELL",
+            RP2Decimal("900.9"),
+            RP2Decimal("2.2"),
+            RP2Decimal("0.00"),
+            internal_id=38,
+        )
+
+        # Entries have no per-instance dictionary
+        self.assertFalse(hasattr(out_transaction, "__dict__"))
+        with self.assertRaises(AttributeError):
+            setattr(out_transaction, "extra", 1)
+
+        # Zero fees share the ZERO singleton and sums with zero fees share the amount
+        self.assertIs(ZERO, out_transaction.crypto_fee)
+        self.assertIs(ZERO, out_transaction.fiat_fee)
+        self.assertIs(out_transaction.crypto_out_no_fee, out_transaction.crypto_out_with_fee)
+        self.assertIs(out_transaction.fiat_out_no_fee, out_transaction.fiat_out_with_fee)
+
+        # Repeated strings are stored once
+        self.assertIs("B1", out_transaction.asset)
+        self.assertIs("Coinbase", out_transaction.exchange)
+
+        unpickled_out_transaction: OutTransaction = pickle.loads(pickle.dumps(out_transaction))
+        self.assertEqual(out_transaction, unpickled_out_transaction)
+        self.assertEqual(str(out_transaction), str(unpickled_out_transaction))
+
     def test_out_transaction_equality_and_hashing(self) -> None:
         out_transaction: OutTransaction = OutTransaction(
             self._configuration,
@@ -0,0 +1,121 @@
+# Copyright 2021 eprbell
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import shutil
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import List, Optional
+
+from rp2.configuration import Configuration
+from rp2.input_data import InputData
+from rp2.ods_parser import open_ods, parse_ods
+from rp2.parse_cache import ParseCache
+from rp2.plugin.country.us import US
+
+_MAX_SIZE: int = 16 * 1024 * 1024
+
+
+class TestParseCache(unittest.TestCase):
+    _configuration: Configuration
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        TestParseCache._configuration = Configuration("./config/test_data.ini", US())
+
+    def setUp(self) -> None:
+        self.maxDiff = None  # pylint: disable=invalid-name
+
+    def test_unchanged_input_file(self) -> None:
+        with TemporaryDirectory() as cache_directory:
+            for asset in ["B1", "B2", "B3", "B4"]:
+                with self.subTest(asset=asset):
+                    parse_cache: ParseCache = self._create_parse_cache(cache_directory, "./input/test_data.ods")
+                    self.assertIsNone(parse_cache.load(asset))
+                    input_file_handle: object = open_ods(self._configuration, "./input/test_data.ods")
+                    input_data: InputData = parse_ods(self._configuration, asset, input_file_handle, parse_cache)
+
+                    # A new cache instance (i.e. a new run) loads the asset without reading the input file
+                    cached_input_data: Optional[InputData] = self._create_parse_cache(cache_directory, "./input/test_data.ods").load(asset)
+                    if cached_input_data is None:
+                        self.fail(f"Asset {asset} not found in parse cache")
+                    self._assert_input_data_equal(cached_input_data, input_data)
+            self.assertEqual(len(self._get_files(cache_directory, ".entry")), 4)
+
+    def test_changed_rows(self) -> None:
+        with TemporaryDirectory() as cache_directory, TemporaryDirectory() as input_directory:
+            input_file_path: str = str(Path(input_directory) / "test_data.csv")
+            shutil.copyfile("./input/test_data.csv", input_file_path)
+            input_file_handle: object = open_ods(self._configuration, input_file_path)
+            input_data: InputData = parse_ods(self._configuration, "B4", input_file_handle, self._create_parse_cache(cache_directory, input_file_path))
+            self.assertEqual(len(self._get_files(cache_directory, ".entry")), 1)
+
+            # Change a transaction of another asset: the input file is different, but the rows of B4 are unchanged and the cache entry is reused
+            content: str = Path(input_file_path).read_text(encoding="utf-8")
+            Path(input_file_path).write_text(content.replace(",B3,0.5,", ",B3,0.7,"), encoding="utf-8")
+            parse_cache: ParseCache = self._create_parse_cache(cache_directory, input_file_path)
+            self.assertIsNone(parse_cache.load("B4"))
+            input_file_handle = open_ods(self._configuration, input_file_path)
+            cached_input_data: InputData = parse_ods(self._configuration, "B4", input_file_handle, parse_cache)
+            self._assert_input_data_equal(cached_input_data, input_data)
+            self.assertEqual(len(self._get_files(cache_directory, ".entry")), 1)
+            self.assertIsNotNone(self._create_parse_cache(cache_directory, input_file_path).load("B4"))
+
+            # Change a transaction of B4: its rows are parsed again
+            Path(input_file_path).write_text(content.replace(",B4,0.5,", ",B4,0.7,"), encoding="utf-8")
+            parse_cache = self._create_parse_cache(cache_directory, input_file_path)
+            self.assertIsNone(parse_cache.load("B4"))
+            input_file_handle = open_ods(self._configuration, input_file_path)
+            changed_input_data: InputData = parse_ods(self._configuration, "B4", input_file_handle, parse_cache)
+            self.assertNotEqual(str(changed_input_data.unfiltered_intra_transaction_set), str(input_data.unfiltered_intra_transaction_set))
+            self.assertEqual(len(self._get_files(cache_directory, ".entry")), 2)
+
+    def test_eviction(self) -> None:
+        with TemporaryDirectory() as cache_directory:
+            parse_cache: ParseCache = self._create_parse_cache(cache_directory, "./input/test_data.ods")
+            input_file_handle: object = open_ods(self._configuration, "./input/test_data.ods")
+            parse_ods(self._configuration, "B2", input_file_handle, parse_cache)
+            max_size: int = sum(path.stat().st_size for path in Path(cache_directory).iterdir())
+
+            # The cache only fits one asset (B1 data is smaller than B2 data): storing B1 evicts the least recently used files (i.e. B2 ones)
+            parse_cache = ParseCache(self._configuration, cache_directory, "./input/test_data.ods", "test", max_size)
+            parse_ods(self._configuration, "B1", input_file_handle, parse_cache)
+            self.assertLessEqual(sum(path.stat().st_size for path in Path(cache_directory).iterdir()), max_size)
+            self.assertIsNone(parse_cache.load("B2"))
+            self.assertIsNotNone(parse_cache.load("B1"))
+
+    def test_different_configuration(self) -> None:
+        with TemporaryDirectory() as cache_directory:
+            parse_cache: ParseCache = self._create_parse_cache(cache_directory, "./input/test_data.ods")
+            input_file_handle: object = open_ods(self._configuration, "./input/test_data.ods")
+            parse_ods(self._configuration, "B1", input_file_handle, parse_cache)
+            other_configuration: Configuration = Configuration("./config/test_data4.ini", US())
+            parse_cache = ParseCache(other_configuration, cache_directory, "./input/test_data.ods", "test", _MAX_SIZE)
+            self.assertIsNone(parse_cache.load("B1"))
+
+    def _create_parse_cache(self, cache_directory: str, input_file_path: str) -> ParseCache:
+        return ParseCache(self._configuration, cache_directory, input_file_path, "test", _MAX_SIZE)
+
+    def _assert_input_data_equal(self, input_data: InputData, expected_input_data: InputData) -> None:
+        self.assertEqual(str(input_data.unfiltered_in_transaction_set), str(expected_input_data.unfiltered_in_transaction_set))
+        self.assertEqual(str(input_data.unfiltered_out_transaction_set), str(expected_input_data.unfiltered_out_transaction_set))
+        self.assertEqual(str(input_data.unfiltered_intra_transaction_set), str(expected_input_data.unfiltered_intra_transaction_set))
+
+    @staticmethod
+    def _get_files(directory: str, suffix: str) -> List[Path]:
+        return [path for path in Path(directory).iterdir() if path.suffix == suffix]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -13,8 +13,10 @@
 # limitations under the License.
 
 import unittest
+from decimal import Decimal
+from random import Random
 
-from rp2.rp2_decimal import ZERO, RP2Decimal
+from rp2.rp2_decimal import CRYPTO_DECIMAL_MASK, FIAT_DECIMAL_MASK, ZERO, RP2Decimal
 from rp2.rp2_error import RP2TypeError
 
 
@@ -97,6 +99,53 @@ class TestRP2Decimal(unittest.TestCase):
         self.assertTrue(nine % two + decimal3 - decimal1 == one)
         self.assertTrue(nine % two + decimal4 - decimal1 > one)
 
+    def test_half_unit_boundaries(self) -> None:
+        decimal1: RP2Decimal = RP2Decimal("0.2")
+        half_unit_above: RP2Decimal = RP2Decimal("0.20000000000005")
+        half_unit_below: RP2Decimal = RP2Decimal("0.19999999999995")
+        over_half_unit_above: RP2Decimal = RP2Decimal("0.2000000000000500001")
+        over_half_unit_below: RP2Decimal = RP2Decimal("0.1999999999999499999")
+
+        # Differences of exactly half a unit round (half-even) to zero
+        self.assertTrue(decimal1 == half_unit_above)
+        self.assertTrue(decimal1 == half_unit_below)
+        self.assertTrue(decimal1 >= half_unit_above)
+        self.assertFalse(decimal1 < half_unit_above)
+        self.assertFalse(decimal1 > half_unit_below)
+        self.assertTrue(decimal1 <= half_unit_below)
+
+        self.assertFalse(decimal1 == over_half_unit_above)
+        self.assertFalse(decimal1 == over_half_unit_below)
+        self.assertTrue(decimal1 < over_half_unit_above)
+        self.assertTrue(decimal1 > over_half_unit_below)
+
+        self.assertTrue(RP2Decimal.is_equal_within_precision(RP2Decimal("1.005"), RP2Decimal("1"), FIAT_DECIMAL_MASK))
+        self.assertFalse(RP2Decimal.is_equal_within_precision(RP2Decimal("1.0050001"), RP2Decimal("1"), FIAT_DECIMAL_MASK))
+        self.assertFalse(RP2Decimal.is_equal_within_precision(RP2Decimal("1.005"), RP2Decimal("1"), CRYPTO_DECIMAL_MASK))
+        self.assertTrue(RP2Decimal.is_equal_within_precision(RP2Decimal("1.05"), RP2Decimal("1"), Decimal("1.0")))
+        self.assertFalse(RP2Decimal.is_equal_within_precision(RP2Decimal("1.06"), RP2Decimal("1"), Decimal("1.0")))
+
+        self.assertFalse(RP2Decimal("NaN") == decimal1)
+        self.assertTrue(RP2Decimal("NaN") != decimal1)
+
+    # Compare the operators with the quantization-based definition of RP2Decimal comparison on values that are close to each other
+    def test_reference_comparison(self) -> None:
+        random: Random = Random(7)
+        for _ in range(2000):
+            first: RP2Decimal = RP2Decimal(f"{random.randint(-10**6, 10**6)}.{random.randint(0, 10**16):016d}")
+            second: RP2Decimal = first + RP2Decimal(f"{random.randint(-10**4, 10**4)}E-{random.choice((14, 15, 16, 17, 18))}")
+            difference: Decimal = Decimal.__sub__(first, second).quantize(CRYPTO_DECIMAL_MASK)
+            self.assertEqual(first == second, difference == 0, msg=f"{first} == {second}")
+            self.assertEqual(first != second, difference != 0, msg=f"{first} != {second}")
+            self.assertEqual(first > second, difference > 0, msg=f"{first} > {second}")
+            self.assertEqual(first >= second, difference >= 0, msg=f"{first} >= {second}")
+            self.assertEqual(first < second, difference < 0, msg=f"{first} < {second}")
+            self.assertEqual(first <= second, difference <= 0, msg=f"{first} <= {second}")
+            self.assertEqual(
+                RP2Decimal.is_equal_within_precision(first, second, FIAT_DECIMAL_MASK),
+                Decimal.__sub__(first, second).quantize(FIAT_DECIMAL_MASK) == 0,
+            )
+
     def test_bad_rp2_decimal(self) -> None:
         # pylint: disable=pointless-statement
         one: RP2Decimal = RP2Decimal("1")
@@ -13,22 +13,36 @@
 # limitations under the License.
 
 import unittest
+from datetime import date, datetime
+from tempfile import TemporaryDirectory
+from typing import Callable, Dict, Type, cast
 
 from prezzemolo.avl_tree import AVLTree
 from rp2_test_output import RP2_TEST_OUTPUT
 
 from rp2.abstract_accounting_method import AbstractAccountingMethod
+from rp2.abstract_transaction import AbstractTransaction
 from rp2.accounting_engine import AccountingEngine
 from rp2.computed_data import ComputedData
-from rp2.configuration import MIN_DATE, Configuration
+from rp2.configuration import MAX_DATE, MIN_DATE, Configuration
+from rp2.gain_loss import GainLoss
+from rp2.in_transaction import InTransaction
 from rp2.input_data import InputData
 from rp2.ods_parser import open_ods, parse_ods
+from rp2.logger import LOGGER
 from rp2.out_transaction import OutTransaction
+from rp2.parse_cache import ParseCache
+from rp2.plugin.accounting_method import fifo, hifo, lifo
 from rp2.plugin.accounting_method.fifo import AccountingMethod
 from rp2.plugin.country.us import US
 from rp2.rp2_decimal import RP2Decimal
 from rp2.rp2_error import RP2TypeError, RP2ValueError
-from rp2.tax_engine import compute_tax
+from rp2.tax_engine import (
+    _create_unfiltered_gain_and_loss_set,
+    _create_unfiltered_taxable_event_set,
+    compute_tax,
+)
+from rp2.transaction_set import TransactionSet
 
 
 class TestTaxEngine(unittest.TestCase):
@@ -66,6 +80,157 @@ class TestTaxEngine(unittest.TestCase):
         if asset in RP2_TEST_OUTPUT:
             self.assertEqual(str(computed_data.gain_loss_set), RP2_TEST_OUTPUT[asset])
 
+    def test_trusted_validation(self) -> None:
+        for asset in ["B1", "B2", "B3", "B4"]:
+            with self.subTest(asset=asset):
+                input_file_handle: object = open_ods(self._good_input_configuration, "./input/test_data.ods")
+                input_data: InputData = parse_ods(self._good_input_configuration, asset, input_file_handle)
+                strict_computed_data: ComputedData = compute_tax(self._good_input_configuration, self._accounting_engine, input_data)
+                trusted_computed_data: ComputedData = compute_tax(self._good_input_configuration, self._accounting_engine, input_data, trusted=True)
+                self.assertEqual(str(trusted_computed_data.gain_loss_set), str(strict_computed_data.gain_loss_set))
+                self.assertEqual(trusted_computed_data.yearly_gain_loss_list, strict_computed_data.yearly_gain_loss_list)
+
+    def test_engine_history(self) -> None:
+        configuration: Configuration = self._good_input_configuration
+        method_classes: Dict[str, Type[AbstractAccountingMethod]] = {
+            "fifo": fifo.AccountingMethod,
+            "lifo": lifo.AccountingMethod,
+            "hifo": hifo.AccountingMethod,
+        }
+        for asset in ["B2", "B3", "B4"]:
+            input_file_handle: object = open_ods(configuration, "./input/test_data.ods")
+            input_data: InputData = parse_ods(configuration, asset, input_file_handle)
+            changed_transaction: AbstractTransaction = max(
+                (
+                    cast(AbstractTransaction, entry)
+                    for transaction_set in [input_data.unfiltered_out_transaction_set, input_data.unfiltered_intra_transaction_set]
+                    for entry in transaction_set
+                    if entry.timestamp.year == 2020
+                ),
+                key=self._get_timestamp,
+            )
+            # Earlier run without the 2021 transactions (i.e. new transactions were appended to the input) and earlier run without the last
+            # 2020 transaction that is not an in-transaction (i.e. a transaction was changed in the middle of the input)
+            filters: Dict[str, Callable[[AbstractTransaction], bool]] = {
+                "append": lambda transaction: transaction.timestamp.year <= 2020,
+                "change": lambda transaction, changed=changed_transaction: transaction is not changed,  # type: ignore
+            }
+            for method_name, method_class in method_classes.items():
+                years_2_methods = AVLTree[int, AbstractAccountingMethod]()
+                years_2_methods.insert_node(MIN_DATE.year, method_class())
+                accounting_engine: AccountingEngine = AccountingEngine(years_2_methods)
+                expected_output: str = str(compute_tax(configuration, accounting_engine, input_data).gain_loss_set)
+                for filter_name, transaction_filter in filters.items():
+                    with self.subTest(asset=asset, method=method_name, filter=filter_name), TemporaryDirectory() as cache_directory:
+                        parse_cache: ParseCache = ParseCache(configuration, cache_directory, "./input/test_data.ods", "test", 16 * 1024 * 1024)
+                        earlier_input_data: InputData = InputData(
+                            asset,
+                            self._filter_transaction_set(configuration, input_data.unfiltered_in_transaction_set, transaction_filter),
+                            self._filter_transaction_set(configuration, input_data.unfiltered_out_transaction_set, transaction_filter),
+                            self._filter_transaction_set(configuration, input_data.unfiltered_intra_transaction_set, transaction_filter),
+                        )
+                        compute_tax(configuration, accounting_engine, earlier_input_data, parse_cache)
+
+                        # The second run resumes from a checkpoint and yields the same result as a computation from scratch
+                        with self.assertLogs(LOGGER, "DEBUG") as logs:
+                            computed_data: ComputedData = compute_tax(configuration, accounting_engine, input_data, parse_cache)
+                        self.assertTrue(any("Resuming tax engine" in message for message in logs.output))
+                        self.assertEqual(str(computed_data.gain_loss_set), expected_output)
+
+                        # Third run on unchanged input: it resumes from the last checkpoint
+                        self.assertEqual(str(compute_tax(configuration, accounting_engine, input_data, parse_cache).gain_loss_set), expected_output)
+
+    def test_to_date(self) -> None:
+        for to_date in [date(2020, 6, 1), date(2020, 12, 31)]:
+            configuration: Configuration = Configuration("./config/test_data.ini", US(), to_date=to_date)
+            for asset in ["B1", "B2", "B3", "B4"]:
+                with self.subTest(asset=asset, to_date=to_date):
+                    input_file_handle: object = open_ods(configuration, "./input/test_data.ods")
+                    input_data: InputData = parse_ods(configuration, asset, input_file_handle)
+                    computed_data: ComputedData = compute_tax(configuration, self._accounting_engine, input_data)
+
+                    # Same result as processing all transactions and filtering the output at to_date
+                    unfiltered_taxable_event_set: TransactionSet = _create_unfiltered_taxable_event_set(self._good_input_configuration, input_data)
+                    expected_computed_data: ComputedData = ComputedData(
+                        asset,
+                        unfiltered_taxable_event_set,
+                        _create_unfiltered_gain_and_loss_set(self._good_input_configuration, self._accounting_engine, input_data, unfiltered_taxable_event_set),
+                        input_data,
+                        to_date=to_date,
+                    )
+                    self.assertEqual(str(computed_data.taxable_event_set), str(expected_computed_data.taxable_event_set))
+                    self.assertEqual(str(computed_data.gain_loss_set), str(expected_computed_data.gain_loss_set))
+                    self.assertEqual(computed_data.yearly_gain_loss_list, expected_computed_data.yearly_gain_loss_list)
+                    self.assertEqual(str(computed_data.balance_set), str(expected_computed_data.balance_set))
+                    self.assertEqual(computed_data.price_per_unit, expected_computed_data.price_per_unit)
+                    for entry in computed_data.in_transaction_set:
+                        in_transaction: InTransaction = cast(InTransaction, entry)
+                        self.assertEqual(
+                            computed_data.get_crypto_in_running_sum(in_transaction), expected_computed_data.get_crypto_in_running_sum(in_transaction)
+                        )
+                        self.assertEqual(
+                            computed_data.get_in_lot_sold_percentage(in_transaction), expected_computed_data.get_in_lot_sold_percentage(in_transaction)
+                        )
+                    for entry in computed_data.gain_loss_set:
+                        gain_loss: GainLoss = cast(GainLoss, entry)
+                        self.assertEqual(
+                            computed_data.get_crypto_gain_loss_running_sum(gain_loss), expected_computed_data.get_crypto_gain_loss_running_sum(gain_loss)
+                        )
+
+        # Mixed UTC offsets: lot B precedes the sale in absolute time, but its local date is after to_date. LIFO matches the sale to lot B,
+        # regardless of to_date.
+        asset = "B1"
+        to_date = date(2020, 12, 31)
+        configuration = Configuration("./config/test_data.ini", US(), to_date=to_date)
+        in_transaction_set: TransactionSet = TransactionSet(configuration, "IN", asset, MIN_DATE, MAX_DATE)
+        in_transaction_set.add_entry(
+            InTransaction(configuration, "2020-01-01 00:00:00 +00:00", asset, "Coinbase", "Bob", "BUY", RP2Decimal("100"), RP2Decimal("1"), internal_id=1)
+        )
+        lot_b: InTransaction = InTransaction(
+            configuration, "2021-01-01 01:00:00 +14:00", asset, "Coinbase", "Bob", "BUY", RP2Decimal("500"), RP2Decimal("1"), internal_id=2
+        )
+        in_transaction_set.add_entry(lot_b)
+        out_transaction_set: TransactionSet = TransactionSet(configuration, "OUT", asset, MIN_DATE, MAX_DATE)
+        out_transaction_set.add_entry(
+            OutTransaction(
+                configuration,
+                "2020-12-31 23:00:00 -10:00",
+                asset,
+                "Coinbase",
+                "Bob",
+                "SELL",
+                RP2Decimal("1000"),
+                RP2Decimal("0.5"),
+                RP2Decimal("0"),
+                internal_id=3,
+            )
+        )
+        input_data = InputData(asset, in_transaction_set, out_transaction_set, TransactionSet(configuration, "INTRA", asset, MIN_DATE, MAX_DATE))
+        years_2_methods = AVLTree[int, AbstractAccountingMethod]()
+        years_2_methods.insert_node(MIN_DATE.year, lifo.AccountingMethod())
+        lifo_accounting_engine: AccountingEngine = AccountingEngine(years_2_methods)
+        for test_configuration in [configuration, self._good_input_configuration]:
+            with self.subTest(to_date=test_configuration.to_date):
+                computed_data = compute_tax(test_configuration, lifo_accounting_engine, input_data)
+                self.assertEqual(computed_data.gain_loss_set.count, 1)
+                gain_loss = cast(GainLoss, next(iter(computed_data.gain_loss_set)))
+                self.assertEqual(gain_loss.acquired_lot, lot_b)
+                self.assertEqual(gain_loss.fiat_gain, RP2Decimal("250"))
+
+    @staticmethod
+    def _get_timestamp(transaction: AbstractTransaction) -> datetime:
+        return transaction.timestamp
+
+    @staticmethod
+    def _filter_transaction_set(
+        configuration: Configuration, transaction_set: TransactionSet, transaction_filter: Callable[[AbstractTransaction], bool]
+    ) -> TransactionSet:
+        result: TransactionSet = TransactionSet(configuration, transaction_set.entry_set_type.value, transaction_set.asset, MIN_DATE, MAX_DATE)
+        for entry in transaction_set:
+            if transaction_filter(cast(AbstractTransaction, entry)):
+                result.add_entry(entry)
+        return result
+
     def test_bad_input(self) -> None:
         asset = "B4"
         input_file_handle: object = open_ods(self._good_input_configuration, "./input/test_data.ods")
@@ -213,6 +213,11 @@ class TestTransactionSet(unittest.TestCase):
 
         self.assertTrue(str(transaction_set).startswith("TransactionSet:\n  configuration=./config/test_data.ini\n  entry_set_type=EntrySetType.MIXED"))
 
+        # Bulk construction from pre-sorted transactions yields the same set
+        sorted_transaction_set: TransactionSet = TransactionSet.from_sorted_entries(self._configuration, "MIXED", "B1", transactions)
+        self.assertEqual(sorted_transaction_set.count, 5)
+        self.assertEqual(str(sorted_transaction_set), str(transaction_set))
+
     def test_bad_transaction_set(self) -> None:
         in_transaction = InTransaction(
             self._configuration,
@@ -351,6 +356,11 @@ class TestTransactionSet(unittest.TestCase):
             in_transaction_set.add_entry(in_transaction)
             in_transaction_set.add_entry(in_transaction2)
 
+        with self.assertRaisesRegex(RP2ValueError, "Attempting to adopt entries that are not sorted by timestamp: .*"):
+            TransactionSet.from_sorted_entries(self._configuration, "MIXED", "B1", [in_transaction, out_transaction])
+        with self.assertRaisesRegex(RP2ValueError, "Attempting to adopt duplicate entries"):
+            TransactionSet.from_sorted_entries(self._configuration, "IN", "B1", [in_transaction, in_transaction2])
+
 
 if __name__ == "__main__":
     unittest.main()